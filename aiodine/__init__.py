@@ -1,3 +1,4 @@
+from .memo import memoize
 from .providers import Provider
 from .store import Store
 
@@ -5,6 +6,8 @@ from .store import Store
 _STORE = Store()
 
 provider = _STORE.provider
+bulk_register = _STORE.bulk_register
+register_many = _STORE.register_many
 consumer = _STORE.consumer
 has_provider = _STORE.has_provider
 useprovider = _STORE.useprovider
@@ -15,8 +18,15 @@ discover = _STORE.discover
 discover_default = _STORE.discover_default
 freeze = _STORE.freeze
 exit_freeze = _STORE.exit_freeze
+overlay = _STORE.overlay
 session = _STORE.session
+request = _STORE.request
 enter_session = _STORE.enter_session
 exit_session = _STORE.exit_session
+after_fork_in_child = _STORE.after_fork_in_child
+profile = _STORE.profile
+memory_profile = _STORE.memory_profile
+analyze = _STORE.analyze
+warmup = _STORE.warmup
 
 __version__ = "1.2.9"
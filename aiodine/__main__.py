@@ -0,0 +1,105 @@
+import argparse
+import json
+import sys
+from importlib import import_module
+from typing import List
+
+from .check import CheckReport, check
+from .store import Store
+
+
+def load(target: str) -> Store:
+    """Load a store given as ``module:attribute``.
+
+    If no attribute is given, the default store is used.
+    """
+    module_path, _, attribute = target.partition(":")
+    module = import_module(module_path)
+    if not attribute:
+        # pylint: disable=import-outside-toplevel, cyclic-import
+        import aiodine
+
+        return aiodine._STORE  # pylint: disable=protected-access
+    store = getattr(module, attribute)
+    if not isinstance(store, Store):
+        raise TypeError(f"{target} is not a store")
+    return store
+
+
+def format_report(report: CheckReport, max_rebuilt: int = None) -> str:
+    lines = []
+
+    def section(title: str, items: List[str]):
+        if items:
+            lines.append(f"{title}:")
+            lines.extend(f"  {item}" for item in items)
+
+    section("Cycles", [" -> ".join(cycle) for cycle in report.cycles])
+    section(
+        "Session providers depending on shorter-lived providers",
+        [f"{name} -> {dep}" for name, dep in report.stale],
+    )
+    section(
+        "Missing providers",
+        [
+            f"{name}: {', '.join(names)}"
+            for name, names in report.missing.items()
+        ],
+    )
+    section("Unused providers", report.unused)
+    section(
+        "Function-scoped providers evaluated per call",
+        [
+            f"{name}: {count}"
+            + (" (too many)" if _too_many(count, max_rebuilt) else "")
+            for name, count in report.rebuilt.items()
+        ],
+    )
+    return "\n".join(lines) or "No problems found."
+
+
+def _too_many(count: int, max_rebuilt: int = None) -> bool:
+    return max_rebuilt is not None and count > max_rebuilt
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m aiodine")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    check_parser = commands.add_parser(
+        "check",
+        help="check the provider graph of a store without evaluating it",
+    )
+    check_parser.add_argument(
+        "store", help="store to check, as 'module:attribute'"
+    )
+    check_parser.add_argument(
+        "--json", action="store_true", help="output a JSON report"
+    )
+    check_parser.add_argument(
+        "--max-rebuilt",
+        type=int,
+        default=None,
+        help=(
+            "fail if a consumer evaluates more function-scoped "
+            "providers per call"
+        ),
+    )
+
+    args = parser.parse_args(argv)
+    report = check(load(args.store))
+
+    if args.json:
+        print(json.dumps({**report._asdict(), "ok": report.ok}, indent=2))
+    else:
+        print(format_report(report, max_rebuilt=args.max_rebuilt))
+
+    failed = not report.ok or any(
+        _too_many(count, args.max_rebuilt) for count in report.rebuilt.values()
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
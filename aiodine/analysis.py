@@ -0,0 +1,114 @@
+from collections import Counter
+from typing import TYPE_CHECKING, Callable, Dict, List, NamedTuple, Tuple
+
+from . import graph, scopes
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .providers import Provider
+    from .store import Store
+
+
+class Analysis(NamedTuple):
+    """Result of analyzing the resolution of a consumer's providers.
+
+    Times are given in seconds.
+    """
+
+    # Longest chain of dependencies, starting from the consumer.
+    critical_path: List[str]
+    # Time spent resolving providers one after the other (as of today).
+    serial_time: float
+    # Time it would take if independent providers were resolved
+    # concurrently, i.e. the time spent along the critical path.
+    parallel_time: float
+    # Function-scoped providers evaluated more than once per call.
+    recomputed: Dict[str, int]
+    # Number of times each function-scoped provider is evaluated per call.
+    evaluated: Dict[str, int]
+
+
+def _walk(
+    store: "Store",
+    name: str,
+    dependencies: List["Provider"],
+    timings: Dict[str, float],
+    counts: Counter,
+    path: Tuple[str, ...],
+) -> Tuple[float, float, List[str]]:
+    # Return the serial time, critical time and critical path of a node.
+    own = timings.get(name, 0.0)
+    serial, critical, critical_path = own, 0.0, []
+
+    for prov in dependencies:
+        if prov.name in path:
+            # Recursive providers: the graph is invalid anyway.
+            continue
+
+        counts[prov.name] += 1
+        if prov.scope == scopes.FUNCTION:
+            sub_dependencies, _ = graph.dependencies(store, prov.func)
+        else:
+            # Built once per session: its dependencies are not evaluated
+            # when consumers are called.
+            sub_dependencies = []
+
+        sub_serial, sub_critical, sub_path = _walk(
+            store,
+            prov.name,
+            sub_dependencies,
+            timings,
+            counts,
+            (*path, prov.name),
+        )
+        serial += sub_serial
+        if not critical_path or sub_critical > critical:
+            critical, critical_path = sub_critical, sub_path
+
+    return serial, own + critical, [name, *critical_path]
+
+
+def analyze(
+    store: "Store", consumer: Callable, timings: Dict[str, float] = None
+) -> Analysis:
+    """Analyze the resolution of a consumer's providers.
+
+    Parameters
+    ----------
+    store : Store
+    consumer : callable
+    timings : dict, optional
+        Time (in seconds) it takes to evaluate each provider (excluding
+        its dependencies), keyed by name. The time spent in the consumer
+        itself can be given under its name.
+        Typically obtained from a profiler using ``.timings()``.
+        Defaults to zero for all providers.
+    """
+    if timings is None:
+        timings = {}
+
+    name = getattr(consumer, "__name__", None) or repr(consumer)
+    dependencies, _ = graph.dependencies(store, consumer)
+    counts: Counter = Counter()
+
+    serial, parallel, critical_path = _walk(
+        store, name, dependencies, timings, counts, (name,)
+    )
+
+    evaluated = {
+        prov_name: count
+        for prov_name, count in counts.items()
+        if store.providers[prov_name].scope == scopes.FUNCTION
+    }
+    recomputed = {
+        prov_name: count
+        for prov_name, count in evaluated.items()
+        if count > 1
+    }
+
+    return Analysis(
+        critical_path=critical_path,
+        serial_time=serial,
+        parallel_time=parallel,
+        recomputed=recomputed,
+        evaluated=evaluated,
+    )
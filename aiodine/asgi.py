@@ -0,0 +1,52 @@
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Optional
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .store import Store
+
+Scope = Dict[str, Any]
+ASGIApp = Callable[[Scope, Callable, Callable], Any]
+
+# Connection types which open a request scope.
+REQUEST_TYPES = {"http", "websocket"}
+
+
+class AiodineMiddleware:
+    """ASGI middleware which opens a request scope for each connection.
+
+    The ASGI ``scope`` and ``receive`` are available to providers and
+    consumers as providers of the same name. Request-scoped providers are
+    evaluated at most once per connection, and cleaned up once the
+    response is complete.
+
+    Parameters
+    ----------
+    app : ASGI app
+    store : Store
+    prefetch : callable, optional
+        Given the ASGI scope, returns names of request- or session-scoped
+        providers to start evaluating before calling ``app``, e.g. those
+        used by the route's handler. They are then resolved concurrently
+        while the request body is still being received.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        store: "Store",
+        prefetch: Optional[Callable[[Scope], Iterable[str]]] = None,
+    ):
+        self.app = app
+        self.store = store
+        self.prefetch = prefetch
+        self.context = store.create_context_provider("scope", "receive")
+
+    async def __call__(self, scope: Scope, receive: Callable, send: Callable):
+        if scope["type"] not in REQUEST_TYPES:
+            await self.app(scope, receive, send)
+            return
+
+        async with self.store.request() as request:
+            with self.context.assign(scope=scope, receive=receive):
+                if self.prefetch is not None:
+                    request.prefetch(self.prefetch(scope))
+                await self.app(scope, receive, send)
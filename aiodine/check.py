@@ -0,0 +1,141 @@
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Set, Tuple
+
+from . import graph, scopes
+from .analysis import analyze
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .consumers import Consumer
+    from .store import Store
+
+
+class CheckReport(NamedTuple):
+    """Result of checking the provider graph of a store."""
+
+    # Groups of providers which depend on each other.
+    cycles: List[List[str]]
+    # Session providers depending on function- or request-scoped
+    # providers, as `(session provider, dependency)` pairs.
+    stale: List[Tuple[str, str]]
+    # Names of used providers which do not exist, keyed by consumer
+    # or provider.
+    missing: Dict[str, List[str]]
+    # Providers which are not used by any consumer.
+    unused: List[str]
+    # Number of function-scoped providers evaluated per call, by consumer.
+    rebuilt: Dict[str, int]
+
+    @property
+    def ok(self) -> bool:
+        """Whether the graph is valid. Unused providers are allowed."""
+        return not (self.cycles or self.stale or self.missing)
+
+
+def _name(consumer: "Consumer") -> str:
+    return getattr(consumer, "__qualname__", None) or repr(consumer)
+
+
+def _edges(store: "Store") -> Dict[str, List[str]]:
+    # Dependencies of each provider, excluding auto-used providers.
+    edges: Dict[str, List[str]] = {}
+    for name, prov in store.providers.items():
+        dependencies, _ = graph.dependencies(store, graph.unwrap(prov.func))
+        edges[name] = [dep.name for dep in dependencies]
+    return edges
+
+
+def _cycles(edges: Dict[str, List[str]]) -> List[List[str]]:
+    # Tarjan's algorithm for strongly connected components.
+    index: Dict[str, int] = {}
+    lowlink: Dict[str, int] = {}
+    stack: List[str] = []
+    on_stack: Set[str] = set()
+    cycles: List[List[str]] = []
+
+    def visit(node: str):
+        index[node] = lowlink[node] = len(index)
+        stack.append(node)
+        on_stack.add(node)
+
+        for dep in edges[node]:
+            if dep not in index:
+                visit(dep)
+                lowlink[node] = min(lowlink[node], lowlink[dep])
+            elif dep in on_stack:
+                lowlink[node] = min(lowlink[node], index[dep])
+
+        if lowlink[node] == index[node]:
+            component = []
+            while True:
+                other = stack.pop()
+                on_stack.discard(other)
+                component.append(other)
+                if other == node:
+                    break
+            if len(component) > 1 or node in edges[node]:
+                cycles.append(sorted(component))
+
+    for node in sorted(edges):
+        if node not in index:
+            visit(node)
+
+    return sorted(cycles)
+
+
+def check(store: "Store") -> CheckReport:
+    """Check the provider graph of a store, without evaluating providers.
+
+    Consumers are those created by the store (see ``Store.consumers``).
+    """
+    edges = _edges(store)
+    cycles = _cycles(edges)
+
+    stale = sorted(
+        (name, dep)
+        for name, prov in store.providers.items()
+        if prov.scope == scopes.SESSION
+        for dep in edges[name]
+        if store.providers[dep].scope != scopes.SESSION
+    )
+
+    missing: Dict[str, List[str]] = {}
+    for name, prov in store.providers.items():
+        _, names = graph.dependencies(store, graph.unwrap(prov.func))
+        if names:
+            missing[name] = sorted(names)
+
+    # Frozen providers are consumers too, but they are not entry points.
+    frozen = {id(prov.func) for prov in store.providers.values()}
+    consumers = sorted(
+        (
+            consumer
+            for consumer in store.consumers
+            if id(consumer) not in frozen
+        ),
+        key=_name,
+    )
+
+    pending = list(store.autouse_providers)
+    rebuilt: Dict[str, int] = {}
+    for consumer in consumers:
+        dependencies, names = graph.dependencies(store, consumer)
+        pending.extend(dep.name for dep in dependencies)
+        if names:
+            missing[_name(consumer)] = sorted(names)
+        evaluated = analyze(store, consumer).evaluated
+        rebuilt[_name(consumer)] = sum(evaluated.values())
+
+    # Providers reachable from consumers.
+    used: Set[str] = set()
+    while pending:
+        name = pending.pop()
+        if name not in used:
+            used.add(name)
+            pending.extend(edges[name])
+
+    return CheckReport(
+        cycles=cycles,
+        stale=stale,
+        missing=missing,
+        unused=sorted(set(store.providers) - used),
+        rebuilt=rebuilt,
+    )
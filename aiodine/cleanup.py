@@ -0,0 +1,211 @@
+import inspect
+from asyncio import (
+    AbstractEventLoop,
+    Future,
+    Semaphore,
+    ensure_future,
+    gather,
+    get_event_loop,
+)
+from functools import partial
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Set,
+)
+from weakref import WeakKeyDictionary
+
+from .compat import AsyncExitStack
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .consumers import Plan
+    from .providers import Provider
+
+
+def _report(exc: BaseException):
+    get_event_loop().call_exception_handler(
+        {"message": "Exception in deferred cleanup", "exception": exc}
+    )
+
+
+class CleanupQueue:
+    """Runs the cleanup of consumers in the background.
+
+    Cleanups are run on the event loop they were submitted from, and
+    concurrency is limited separately for each event loop.
+
+    Parameters
+    ----------
+    max_concurrency : int, optional
+        Maximum number of cleanups running at the same time.
+        Defaults to ``16``.
+    on_error : callable, optional
+        Called with exceptions raised during cleanup. Defaults to
+        passing them to the event loop's exception handler.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 16,
+        on_error: Callable[[BaseException], None] = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.on_error = _report if on_error is None else on_error
+        self._semaphores: "WeakKeyDictionary[AbstractEventLoop, Semaphore]"
+        self._semaphores = WeakKeyDictionary()
+        self._tasks: "WeakKeyDictionary[AbstractEventLoop, Set[Future]]"
+        self._tasks = WeakKeyDictionary()
+
+    def __len__(self) -> int:
+        return sum(len(tasks) for tasks in self._tasks.values())
+
+    async def _run(self, stack: AsyncExitStack):
+        loop = get_event_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            # Created lazily so that it binds to the running event loop.
+            semaphore = Semaphore(self.max_concurrency)
+            self._semaphores[loop] = semaphore
+        async with semaphore:
+            await stack.aclose()
+
+    def _done(self, tasks: Set[Future], task: Future):
+        tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.on_error(task.exception())
+
+    def submit(self, stack: AsyncExitStack):
+        """Schedule the closing of an exit stack."""
+        tasks = self._tasks.setdefault(get_event_loop(), set())
+        task = ensure_future(self._run(stack))
+        tasks.add(task)
+        task.add_done_callback(partial(self._done, tasks))
+
+    async def drain(self):
+        """Wait for all cleanups scheduled on the running event loop
+        to complete."""
+        tasks = self._tasks.get(get_event_loop(), ())
+        while tasks:
+            await gather(*tasks, return_exceptions=True)
+
+
+def _raise(errors: List[BaseException]):
+    # Raise exceptions one after the other, so that they are chained
+    # the same way as with sequential cleanup.
+    try:
+        raise errors[0]
+    finally:
+        if len(errors) > 1:
+            _raise(errors[1:])
+
+
+class ConcurrentExitStack(AsyncExitStack):
+    """Exit stack which runs async callbacks concurrently.
+
+    Callbacks are grouped by ``level``: callbacks of the same level are
+    run concurrently, and levels are unwound from highest to lowest.
+
+    All callbacks are run even if some of them fail. Exceptions are then
+    chained and the last one is raised, as with a regular exit stack.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.level = 0
+        self._levels: Dict[int, List[Callable[[], Awaitable]]] = {}
+
+    def push_async_callback(self, callback, *args, **kwargs):
+        if not self._levels:
+            super().push_async_callback(self._finalize)
+        callbacks = self._levels.setdefault(self.level, [])
+        callbacks.append(partial(callback, *args, **kwargs))
+        return callback
+
+    async def _finalize(self):
+        levels, self._levels = self._levels, {}
+        errors: List[BaseException] = []
+        for level in sorted(levels, reverse=True):
+            # Keep the LIFO order of regular exit stacks for exceptions.
+            callbacks = reversed(levels[level])
+            results = await gather(
+                *(callback() for callback in callbacks), return_exceptions=True
+            )
+            errors.extend(
+                exc for exc in results if isinstance(exc, BaseException)
+            )
+        if errors:
+            _raise(errors)
+
+
+class LeveledProvider:
+    """Proxy which sets the level of a concurrent exit stack before
+    evaluating a provider."""
+
+    __slots__ = ("provider", "level", "sync", "lazy", "inline")
+
+    def __init__(self, provider: "Provider", level: int):
+        self.provider = provider
+        self.level = level
+        self.sync = provider.sync
+        self.lazy = provider.lazy
+        self.inline = provider.inline
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.provider, name)
+
+    def call_sync(self, stack: ConcurrentExitStack) -> Any:
+        stack.level = self.level
+        return self.provider.call_sync(stack)
+
+    def __call__(self, stack: ConcurrentExitStack) -> Awaitable:
+        stack.level = self.level
+        return self.provider(stack)
+
+    def get_lazy(self, stack: ConcurrentExitStack) -> Any:
+        stack.level = self.level
+        return self.provider.get_lazy(stack)
+
+
+def level_plan(plan: "Plan") -> "Plan":
+    """Return a copy of the plan whose providers are tagged with their
+    dependency level.
+
+    Providers which don't depend on any other provider of the plan have
+    level 0. Other providers have a level higher than their dependencies.
+    """
+    providers = {prov.name: prov for prov, _ in plan.external}
+    providers.update((name, prov) for name, prov, _, _ in plan.injected)
+    levels: Dict[str, int] = {}
+
+    def get_level(name: str, path: tuple) -> int:
+        if name not in levels:
+            dependencies = [
+                dep
+                for dep in inspect.signature(providers[name].func).parameters
+                if dep in providers and dep not in path
+            ]
+            levels[name] = 1 + max(
+                (get_level(dep, (*path, dep)) for dep in dependencies),
+                default=-1,
+            )
+        return levels[name]
+
+    return plan._replace(
+        external=[
+            (LeveledProvider(prov, get_level(prov.name, (prov.name,))), sync)
+            for prov, sync in plan.external
+        ],
+        injected=[
+            (
+                name,
+                LeveledProvider(prov, get_level(name, (name,))),
+                sync,
+                inline,
+            )
+            for name, prov, sync, inline in plan.injected
+        ],
+    )
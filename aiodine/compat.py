@@ -13,9 +13,14 @@ if sys.version_info < (3, 7):  # pragma: no cover
     from aiocontextvars import (  # pylint: disable=unused-import, import-error
         ContextVar,
         Token,
+        copy_context,
     )
 else:  # pragma: no cover
-    from contextvars import ContextVar, Token  # pylint: disable=unused-import
+    from contextvars import (  # pylint: disable=unused-import
+        ContextVar,
+        Token,
+        copy_context,
+    )
 
 
 def wrap_async(func: Callable) -> Callable[..., Awaitable]:
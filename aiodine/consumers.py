@@ -1,6 +1,6 @@
 import inspect
 import sys
-from contextlib import suppress
+from contextlib import ExitStack, suppress
 from functools import WRAPPER_ASSIGNMENTS, partial, update_wrapper
 from typing import (
     TYPE_CHECKING,
@@ -13,7 +13,8 @@ from typing import (
     Union,
 )
 
-from .compat import AsyncExitStack, wrap_async
+from . import cleanup, tracing
+from .compat import AsyncExitStack
 from .datatypes import CoroutineFunction
 from .exceptions import ConsumerDeclarationError
 
@@ -35,6 +36,51 @@ class ResolvedProviders(NamedTuple):
     external: List["Provider"]
 
 
+class Plan(NamedTuple):
+    """Cached result of resolving the providers of a consumer."""
+
+    version: int
+    positional: PositionalProviders
+    keyword: KeywordProviders
+    # Providers to evaluate, as `(provider, sync)` tuples for used providers
+    # and `(name, provider, sync, inline)` tuples for injected ones.
+    external: List[Tuple["Provider", bool]]
+    injected: List[Tuple[str, "Provider", bool, Optional[Callable]]]
+    # Whether all providers (and the consumer function itself) are sync.
+    sync: bool
+
+    def bind(
+        self, values: dict, args: tuple, kwargs: dict
+    ) -> Tuple[list, dict]:
+        # Create a stack out of the positional arguments.
+        # Reverse it so we can `.pop()` out of it while
+        # keeping the final order of arguments.
+        args = list(reversed(args))
+
+        injected_args = []
+        for name, prov in self.positional:
+            if name in kwargs:
+                # Use values from keyword arguments in priority.
+                injected_args.append(kwargs.pop(name))
+            elif prov is _NO_PROVIDER:
+                # No provider exists. Use the next positional argument.
+                with suppress(IndexError):
+                    injected_args.append(args.pop())
+            else:
+                # A provider exists for this argument. Use it!
+                injected_args.append(values[name])
+
+        injected_kwargs = {}
+        for name, prov in self.keyword.items():
+            if name in kwargs or prov is _NO_PROVIDER:
+                with suppress(KeyError):
+                    injected_kwargs[name] = kwargs.pop(name)
+            else:
+                injected_kwargs[name] = values[name]
+
+        return injected_args, injected_kwargs
+
+
 WRAPPER_IGNORE = {"__module__"}
 if sys.version_info < (3, 7):  # pragma: no cover
     WRAPPER_IGNORE.add("__qualname__")
@@ -45,20 +91,40 @@ WRAPPER_SLOTS = {"__wrapped__", *WRAPPER_ASSIGNMENTS}
 
 class Consumer:
 
-    __slots__ = ("store", "func", "signature", *WRAPPER_SLOTS)
+    __slots__ = (
+        "store",
+        "func",
+        "signature",
+        "deferred_cleanup",
+        "concurrent_cleanup",
+        "self_parameter",
+        "_method",
+        "_bound_signature",
+        "_is_async",
+        "_plan",
+        "_leveled",
+        "_traced",
+        "__weakref__",
+        *WRAPPER_SLOTS,
+    )
 
     def __init__(
         self,
         store: "Store",
         consumer_function: Union[partial, Callable, CoroutineFunction],
+        deferred_cleanup: bool = False,
+        concurrent_cleanup: bool = False,
     ):
         self.store = store
+        self.deferred_cleanup = deferred_cleanup
+        self.concurrent_cleanup = concurrent_cleanup
 
         if isinstance(consumer_function, partial):
             if not inspect.iscoroutinefunction(consumer_function.func):
                 raise ConsumerDeclarationError(
                     "'partial' consumer functions must wrap an async function"
                 )
+            is_async = True
         else:
             if not inspect.isfunction(
                 consumer_function
@@ -66,14 +132,51 @@ class Consumer:
                 assert callable(consumer_function), "consumers must be callable"
                 consumer_function = consumer_function.__call__
 
-            if not inspect.iscoroutinefunction(consumer_function):
-                consumer_function = wrap_async(consumer_function)
+            is_async = inspect.iscoroutinefunction(consumer_function)
 
         self.func = consumer_function
+        # Name of the parameter receiving the instance, for methods.
+        self.self_parameter: Optional[str] = None
+        self._method = False
+        self._bound_signature: Optional[inspect.Signature] = None
+        self._is_async = is_async
+        self._plan: Optional[Plan] = None
+        self._leveled: Optional[Tuple[Plan, Plan]] = None
+        self._traced: Optional[Tuple[Plan, tuple, Plan]] = None
         update_wrapper(
             self, self.func, assigned=WRAPPER_ASSIGNMENTS, updated=()
         )
 
+    # Methods.
+
+    def __set_name__(self, owner: type, name: str):
+        self._declare_method()
+
+    def _declare_method(self):
+        self._method = True
+        signature = inspect.signature(self.func)
+        parameters = list(signature.parameters.values())
+        if parameters and parameters[0].kind in (
+            inspect.Parameter.POSITIONAL_ONLY,
+            inspect.Parameter.POSITIONAL_OR_KEYWORD,
+        ):
+            self.self_parameter = parameters[0].name
+            parameters = parameters[1:]
+            # The instance is not provided: resolve again.
+            self._plan = None
+        # Signature of bound consumers, as seen by callers.
+        self._bound_signature = signature.replace(parameters=parameters)
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        if not self._method:
+            # Assigned to the class after its creation.
+            self._declare_method()
+        return BoundConsumer(self, instance)
+
+    # Resolution.
+
     def resolve(self) -> ResolvedProviders:
         positional: PositionalProviders = []
         keyword: KeywordProviders = {}
@@ -83,9 +186,12 @@ class Consumer:
         ]
 
         for name, parameter in inspect.signature(self.func).parameters.items():
-            prov: Optional["Provider"] = self.store.providers.get(
-                name, _NO_PROVIDER
-            )
+            prov: Optional["Provider"]
+            if name == self.self_parameter:
+                # Passed positionally when called from an instance.
+                prov = _NO_PROVIDER
+            else:
+                prov = self.store.providers.get(name, _NO_PROVIDER)
 
             if parameter.kind == inspect.Parameter.KEYWORD_ONLY:
                 keyword[name] = prov
@@ -96,45 +202,180 @@ class Consumer:
             positional=positional, keyword=keyword, external=external
         )
 
-    async def __call__(self, *args, **kwargs):
-        # TODO: cache providers after first call for better performance.
+    def get_plan(self) -> Plan:
+        """Return the resolution plan, resolving providers if necessary.
+
+        The plan is cached until providers are added to the store.
+        """
+        plan = self._plan
+        if plan is not None and plan.version == self.store.version:
+            return plan
+
+        version = self.store.version
         providers = self.resolve()
+        injected = [
+            (name, prov, prov.sync, prov.inline)
+            for name, prov in (
+                *providers.positional,
+                *providers.keyword.items(),
+            )
+            if prov is not _NO_PROVIDER
+        ]
+        external = [(prov, prov.sync) for prov in providers.external]
+
+        self._plan = plan = Plan(
+            version=version,
+            positional=providers.positional,
+            keyword=providers.keyword,
+            external=external,
+            injected=injected,
+            sync=(
+                not self._is_async
+                and all(sync for _, sync in external)
+                and all(sync for _, _, sync, _ in injected)
+            ),
+        )
+        return plan
+
+    @property
+    def sync(self) -> bool:
+        """Whether the consumer can be called without awaiting anything."""
+        return self.get_plan().sync
+
+    def _level(self, plan: Plan) -> Plan:
+        leveled = self._leveled
+        if not (leveled and leveled[0] is plan):
+            leveled = (plan, cleanup.level_plan(plan))
+            self._leveled = leveled
+        return leveled[1]
+
+    def _trace(self, plan: Plan, tracers: tuple) -> Tuple[Plan, list]:
+        traced = self._traced
+        if not (traced and traced[0] is plan and traced[1] is tracers):
+            traced = (plan, tracers, tracing.trace_plan(plan, tracers))
+            self._traced = traced
+        return traced[2], tracing.enter(tracers, "enter_consumer", self)
+
+    async def __call__(self, *args, **kwargs):
+        plan = self.get_plan()
+        exit_stack = AsyncExitStack
+        if self.concurrent_cleanup:
+            plan = self._level(plan)
+            exit_stack = cleanup.ConcurrentExitStack
+        tracers = self.store.tracers
+        tokens = None
+        if tracers:
+            plan, tokens = self._trace(plan, tracers)
+
+        try:
+            async with exit_stack() as stack:
+                for prov, sync in plan.external:
+                    if sync:
+                        prov.call_sync(stack)
+                    elif prov.lazy:
+                        prov.get_lazy(stack)
+                    else:
+                        await prov(stack)
+
+                values = {}
+                for name, prov, sync, inline in plan.injected:
+                    if name in kwargs:
+                        continue
+                    if inline is not None:
+                        values[name] = inline()
+                    elif sync:
+                        values[name] = prov.call_sync(stack)
+                    elif prov.lazy:
+                        values[name] = prov.get_lazy(stack)
+                    else:
+                        values[name] = await prov(stack)
+
+                args, kwargs = plan.bind(values, args, kwargs)
+                value = self.func(*args, **kwargs)
+                if self._is_async:
+                    value = await value
+
+                if self.deferred_cleanup:
+                    # Finalize providers in the background.
+                    self.store.cleanup_queue.submit(stack.pop_all())
+
+                return value
+        finally:
+            if tokens is not None:
+                tracing.exit_(tracers, tokens)
+
+    def call_sync(self, *args, **kwargs):
+        """Call the consumer synchronously.
+
+        Only available if the consumer is ``.sync``.
+        """
+        plan = self.get_plan()
+        assert plan.sync, "consumer cannot be called synchronously"
+        tracers = self.store.tracers
+        tokens = None
+        if tracers:
+            plan, tokens = self._trace(plan, tracers)
+
+        try:
+            with ExitStack() as stack:
+                for prov, _ in plan.external:
+                    prov.call_sync(stack)
+
+                values = {}
+                for name, prov, _, inline in plan.injected:
+                    if name in kwargs:
+                        continue
+                    if inline is not None:
+                        values[name] = inline()
+                    else:
+                        values[name] = prov.call_sync(stack)
+
+                args, kwargs = plan.bind(values, args, kwargs)
+                return self.func(*args, **kwargs)
+        finally:
+            if tokens is not None:
+                tracing.exit_(tracers, tokens)
+
+
+class BoundConsumer:
+    """A consumer bound to an instance, like a bound method.
+
+    Binding is cheap: the resolution plan belongs to the consumer, so it is
+    shared by all instances of the class.
+    """
+
+    __slots__ = ("__func__", "__self__")
+
+    def __init__(self, consumer: Consumer, instance):
+        self.__func__ = consumer
+        self.__self__ = instance
+
+    def __call__(self, *args, **kwargs):
+        return self.__func__(self.__self__, *args, **kwargs)
+
+    def call_sync(self, *args, **kwargs):
+        return self.__func__.call_sync(self.__self__, *args, **kwargs)
+
+    @property
+    def __signature__(self) -> inspect.Signature:
+        # Excludes the instance parameter, like bound methods.
+        # pylint: disable=protected-access
+        return self.__func__._bound_signature
+
+    def __getattr__(self, name: str):
+        # E.g. `sync`, `store`, `__name__` or `__doc__`.
+        return getattr(self.__func__, name)
+
+    def __eq__(self, other) -> bool:
+        return (
+            isinstance(other, BoundConsumer)
+            and self.__func__ is other.__func__
+            and self.__self__ is other.__self__
+        )
+
+    def __hash__(self) -> int:
+        return hash((id(self.__func__), id(self.__self__)))
 
-        async with AsyncExitStack() as stack:
-
-            async def _get_value(prov: "Provider"):
-                if prov.lazy:
-                    return prov(stack)
-                return await prov(stack)
-
-            for prov in providers.external:
-                await _get_value(prov)
-
-            # Create a stack out of the positional arguments.
-            # Reverse it so we can `.pop()` out of it while
-            # keeping the final order of arguments.
-            args = list(reversed(args))
-
-            injected_args = []
-            for name, prov in providers.positional:
-                if name in kwargs:
-                    # Use values from keyword arguments in priority.
-                    injected_args.append(kwargs.pop(name))
-                    continue
-                elif prov is _NO_PROVIDER:
-                    # No provider exists. Use the next positional argument.
-                    with suppress(IndexError):
-                        injected_args.append(args.pop())
-                else:
-                    # A provider exists for this argument. Use it!
-                    injected_args.append(await _get_value(prov))
-
-            injected_kwargs = {}
-            for name, prov in providers.keyword.items():
-                if name in kwargs or prov is _NO_PROVIDER:
-                    with suppress(KeyError):
-                        injected_kwargs[name] = kwargs.pop(name)
-                else:
-                    injected_kwargs[name] = await _get_value(prov)
-
-            return await self.func(*injected_args, **injected_kwargs)
+    def __repr__(self) -> str:
+        name = getattr(self.__func__, "__qualname__", "consumer")
+        return f"<bound consumer {name} of {self.__self__!r}>"
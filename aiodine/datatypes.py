@@ -1,3 +1,9 @@
-from typing import Callable, Awaitable
+from contextlib import ExitStack as SyncExitStack
+from typing import Callable, Awaitable, Union
+
+from .compat import AsyncExitStack
 
 CoroutineFunction = Callable[..., Awaitable]
+
+# Sync providers can be evaluated using either kind of exit stack.
+ExitStack = Union[SyncExitStack, AsyncExitStack]
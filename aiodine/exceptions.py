@@ -30,3 +30,31 @@ class ProviderDoesNotExist(AiodineException):
 
     def __init__(self, name: str):
         super().__init__(f"provider {name} does not exist")
+
+
+class UnknownForkPolicy(AiodineException):
+    """Raised when an unknown fork policy is used."""
+
+
+class ForkedSessionError(AiodineException):
+    """Raised when using a session instance inherited from a parent process
+    while its provider forbids it."""
+
+    def __init__(self, name: str):
+        super().__init__(
+            f"session provider {name} was set up before fork "
+            "and cannot be used in the child process"
+        )
+
+
+class ProviderOverloaded(AiodineException):
+    """Raised when a provider could not be evaluated because too many
+    evaluations were already in progress."""
+
+    def __init__(self, name: str, timeout: float):
+        super().__init__(
+            f"provider {name} is overloaded: "
+            f"no evaluation slot became free within {timeout}s"
+        )
+        self.name = name
+        self.timeout = timeout
@@ -0,0 +1,41 @@
+import os
+from typing import TYPE_CHECKING, Any, List
+from weakref import WeakSet
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .store import Store
+
+# Fork policies for session providers.
+SHARE = "share"
+REINIT = "reinit"
+FORBID = "forbid"
+ALL = {SHARE, REINIT, FORBID}
+
+_STORES: "WeakSet[Store]" = WeakSet()
+
+# Async generators of session providers which were set up in a parent
+# process. They are owned (and finalized) by the parent, so we keep a
+# reference to them in order to prevent the child from ever garbage
+# collecting (and thus finalizing) them.
+_ORPHANS: List[Any] = []
+
+
+def track(store: "Store"):
+    """Apply fork policies to the given store's providers on ``fork()``."""
+    _STORES.add(store)
+
+
+def orphan(value: Any):
+    if value is not None:
+        _ORPHANS.append(value)
+
+
+def after_fork_in_child():
+    for store in list(_STORES):
+        store.after_fork_in_child()
+
+
+if hasattr(os, "register_at_fork"):  # pragma: no cover
+    os.register_at_fork(  # pylint: disable=no-member
+        after_in_child=after_fork_in_child
+    )
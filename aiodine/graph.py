@@ -0,0 +1,58 @@
+import inspect
+from typing import TYPE_CHECKING, Callable, List, Tuple, Union
+
+from .consumers import Consumer
+from .providers import Provider
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .store import Store
+
+
+def unwrap(func: Callable) -> Callable:
+    """Return the function behind a consumer (e.g. a frozen provider)."""
+    while isinstance(func, Consumer):
+        func = func.func
+    return func
+
+
+def parameters(func: Callable) -> List[str]:
+    names = list(inspect.signature(unwrap(func)).parameters)
+    if isinstance(func, Consumer) and func.self_parameter is not None:
+        # Methods receive the instance, not a provider.
+        names.remove(func.self_parameter)
+    return names
+
+
+def used(func: Callable) -> List[Union[str, Provider]]:
+    return list(getattr(unwrap(func), "__useproviders__", []))
+
+
+def dependencies(
+    store: "Store", func: Callable
+) -> Tuple[List[Provider], List[str]]:
+    """Return the providers a function depends on, in evaluation order.
+
+    Also returns the names of used providers which do not exist.
+
+    If ``func`` is a consumer (e.g. a frozen provider), auto-used providers
+    are included too, as consumers evaluate them on each call.
+    """
+    providers: List[Provider] = []
+    missing: List[str] = []
+
+    if isinstance(func, Consumer):
+        providers.extend(store.autouse_providers.values())
+
+    for prov in used(func):
+        if isinstance(prov, Provider):
+            providers.append(prov)
+        elif store.has_provider(prov):
+            providers.append(store.providers[prov])
+        else:
+            missing.append(prov)
+
+    for name in parameters(func):
+        if store.has_provider(name):
+            providers.append(store.providers[name])
+
+    return providers, missing
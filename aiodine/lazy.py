@@ -0,0 +1,61 @@
+from asyncio import Future, ensure_future, shield
+from typing import Any, Awaitable, Callable, Generator, Optional
+
+
+class LazyValue:
+    """Awaitable handle to the value of a lazy provider.
+
+    The provider is evaluated at most once: the first time the handle is
+    awaited, or right away if prefetching. The handle can then be awaited
+    any number of times, including concurrently from multiple tasks.
+
+    Parameters
+    ----------
+    factory : callable
+        Returns an awaitable which computes the value.
+    prefetch : bool, optional
+        Whether to start computing the value in the background right away.
+        Defaults to ``False``.
+    """
+
+    __slots__ = ("_factory", "_future")
+
+    def __init__(
+        self, factory: Callable[[], Awaitable], prefetch: bool = False
+    ):
+        self._factory: Optional[Callable[[], Awaitable]] = factory
+        self._future: Optional[Future] = None
+        if prefetch:
+            self._start()
+
+    def _start(self) -> Future:
+        if self._future is None:
+            self._future = ensure_future(self._factory())
+            self._factory = None
+        return self._future
+
+    def done(self) -> bool:
+        return self._future is not None and self._future.done()
+
+    def __await__(self) -> Generator[Any, None, Any]:
+        future = self._start()
+        if not future.done():
+            # Cancelling one of the awaiting tasks must not cancel
+            # the computation for the others.
+            yield from shield(future).__await__()
+        return future.result()
+
+    def close(self):
+        """Cancel the computation if it is still in progress.
+
+        A value which was never awaited is discarded silently.
+        """
+        self._factory = None
+        future = self._future
+        if future is None:
+            return
+        if not future.done():
+            future.cancel()
+        elif not future.cancelled():
+            # Prevent "exception was never retrieved" warnings.
+            future.exception()
@@ -0,0 +1,162 @@
+import atexit
+import os
+import traceback
+import warnings
+from asyncio import AbstractEventLoop
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+from weakref import WeakSet, ref
+
+from .compat import ContextVar
+from .sessions import running_loop
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .providers import Provider
+
+# Frames from aiodine itself are left out of allocation sites.
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Number of frames kept in allocation sites.
+SITE_DEPTH = 8
+
+
+class LeakWarning(UserWarning):
+    """Issued when a provider instance was never finalized."""
+
+
+class Leak(NamedTuple):
+    """An instance of a provider which was set up but not finalized."""
+
+    provider: str
+    # Where the instance was set up, as formatted stack frames (innermost
+    # last), excluding aiodine's own frames.
+    site: List[str]
+
+
+class _Allocation:
+    __slots__ = ("provider", "site", "loop_id", "reported")
+
+    def __init__(self, provider: str, site: List[str], loop_id: int):
+        self.provider = provider
+        self.site = site
+        # Not a reference: allocations must not keep the loop alive.
+        self.loop_id = loop_id
+        self.reported = False
+
+
+# Allocation site of instances set up in a separate task, captured by the
+# task's creator.
+allocation_site: ContextVar = ContextVar("aiodine_allocation_site", default=None)
+
+
+def get_site() -> List[str]:
+    frames = [
+        frame
+        for frame in traceback.extract_stack()
+        if not os.path.abspath(frame.filename).startswith(_PACKAGE_DIR)
+    ]
+    return traceback.format_list(frames[-SITE_DEPTH:])
+
+
+# Detectors to check when the process exits.
+_DETECTORS: "WeakSet[LeakDetector]" = WeakSet()
+
+
+def _check_all():
+    for detector in list(_DETECTORS):
+        detector.check()
+
+
+atexit.register(_check_all)
+
+
+class LeakDetector:
+    """Tracks instances of session providers which need finalization.
+
+    Generators and context managers of session providers are tracked from
+    setup until the session exits. Those which were never finalized
+    (e.g. because a consumer was called outside of a session) are reported
+    with a ``LeakWarning`` by ``.check()``, which is also called when the
+    process exits. Applications may call it on shutdown too (e.g. before
+    closing their event loop).
+
+    Instances are tracked using weak references, so tracking them does
+    not keep them alive.
+    """
+
+    def __init__(self):
+        self._live: Dict[int, Tuple[ref, _Allocation]] = {}
+        _DETECTORS.add(self)
+
+    def track(self, provider: "Provider", instance: Any):
+        """Record that an instance of a provider was set up."""
+        key = id(instance)
+        loop = running_loop()
+        site = allocation_site.get() or get_site()
+        allocation = _Allocation(provider.name, site, id(loop))
+
+        def discard(_, key=key):
+            # The instance was garbage collected.
+            self._live.pop(key, None)
+
+        self._live[key] = (ref(instance, discard), allocation)
+
+    def untrack(self, instance: Any):
+        """Record that an instance was finalized."""
+        self._live.pop(id(instance), None)
+
+    def live(self) -> Dict[str, int]:
+        """Return the number of live instances of each provider."""
+        counts: Dict[str, int] = {}
+        for _, allocation in self._live.values():
+            counts[allocation.provider] = (
+                counts.get(allocation.provider, 0) + 1
+            )
+        return counts
+
+    def leaks(self, loop: Optional[AbstractEventLoop] = None) -> List[Leak]:
+        """Return the instances which have not been finalized yet.
+
+        If a ``loop`` is given, only instances set up in it are returned.
+        """
+        return [
+            Leak(allocation.provider, allocation.site)
+            for allocation in self._allocations(loop)
+        ]
+
+    def _allocations(
+        self, loop: Optional[AbstractEventLoop]
+    ) -> List[_Allocation]:
+        return [
+            allocation
+            for _, allocation in list(self._live.values())
+            if loop is None or allocation.loop_id == id(loop)
+        ]
+
+    def check(self, loop: Optional[AbstractEventLoop] = None):
+        """Issue a ``LeakWarning`` for each instance not finalized yet.
+
+        Each instance is only reported once.
+        """
+        for allocation in self._allocations(loop):
+            if allocation.reported:
+                continue
+            allocation.reported = True
+            warnings.warn(
+                f"session provider {allocation.provider} was set up "
+                "but never finalized. Was it used outside of a session? "
+                "Set up at:\n" + "".join(allocation.site),
+                LeakWarning,
+                stacklevel=2,
+            )
+
+    def after_fork_in_child(self):
+        # Instances of the parent process are finalized by the parent.
+        self._live.clear()
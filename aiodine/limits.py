@@ -0,0 +1,142 @@
+import inspect
+from asyncio import (
+    AbstractEventLoop,
+    Semaphore,
+    TimeoutError as AsyncTimeoutError,
+    get_event_loop,
+    wait_for,
+)
+from contextlib import suppress
+from functools import wraps
+from time import perf_counter
+from typing import Callable, NamedTuple
+from weakref import WeakKeyDictionary
+
+from .compat import wrap_async, wrap_generator_async
+from .exceptions import ProviderOverloaded
+
+
+class LimiterStats(NamedTuple):
+    """Metrics of a limiter. Times are given in seconds."""
+
+    # Number of evaluations in progress.
+    active: int
+    # Number of evaluations waiting for a slot.
+    waiting: int
+    # Number of evaluations which were given a slot.
+    acquired: int
+    # Number of evaluations which timed out waiting for a slot.
+    rejected: int
+    # Time spent waiting for a slot, in total and at most.
+    total_wait: float
+    max_wait: float
+
+
+class Limiter:
+    """Limits the number of concurrent evaluations of a provider.
+
+    Slots of generator providers are held until they are cleaned up.
+
+    Each event loop has its own slots.
+
+    Parameters
+    ----------
+    name : str
+        Name of the provider.
+    max_concurrency : int
+    queue_timeout : float, optional
+        Maximum number of seconds to wait for a slot, after which
+        ``ProviderOverloaded`` is raised. Defaults to ``None`` (no timeout).
+    """
+
+    def __init__(
+        self, name: str, max_concurrency: int, queue_timeout: float = None
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self._semaphores: "WeakKeyDictionary[AbstractEventLoop, Semaphore]"
+        self._semaphores = WeakKeyDictionary()
+        self._active = 0
+        self._waiting = 0
+        self._acquired = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def stats(self) -> LimiterStats:
+        return LimiterStats(
+            active=self._active,
+            waiting=self._waiting,
+            acquired=self._acquired,
+            rejected=self._rejected,
+            total_wait=self._total_wait,
+            max_wait=self._max_wait,
+        )
+
+    def _get_semaphore(self) -> Semaphore:
+        loop = get_event_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            # Created lazily so that it binds to the running event loop.
+            semaphore = Semaphore(self.max_concurrency)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    async def acquire(self):
+        semaphore = self._get_semaphore()
+
+        start = perf_counter()
+        self._waiting += 1
+        try:
+            if self.queue_timeout is None or not semaphore.locked():
+                await semaphore.acquire()
+            else:
+                await wait_for(semaphore.acquire(), self.queue_timeout)
+        except AsyncTimeoutError:
+            self._rejected += 1
+            raise ProviderOverloaded(self.name, self.queue_timeout) from None
+        finally:
+            self._waiting -= 1
+
+        wait = perf_counter() - start
+        self._total_wait += wait
+        self._max_wait = max(self._max_wait, wait)
+        self._acquired += 1
+        self._active += 1
+
+    def release(self):
+        self._active -= 1
+        self._get_semaphore().release()
+
+    def wrap(self, func: Callable) -> Callable:
+        """Wrap a provider function so that evaluations hold a slot."""
+        if inspect.isgeneratorfunction(func):
+            func = wrap_generator_async(func)
+        elif not inspect.isasyncgenfunction(
+            func
+        ) and not inspect.iscoroutinefunction(func):
+            func = wrap_async(func)
+
+        if inspect.isasyncgenfunction(func):
+
+            async def limited(*args, **kwargs):
+                await self.acquire()
+                try:
+                    agen = func(*args, **kwargs)
+                    yield await agen.asend(None)
+                    with suppress(StopAsyncIteration):
+                        await agen.asend(None)
+                finally:
+                    self.release()
+
+        else:
+
+            async def limited(*args, **kwargs):
+                await self.acquire()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    self.release()
+
+        return wraps(func)(limited)
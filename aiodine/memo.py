@@ -0,0 +1,250 @@
+import inspect
+from asyncio import Future, ensure_future, shield
+from collections import OrderedDict
+from contextlib import contextmanager, suppress
+from functools import partial, wraps
+from time import monotonic
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from .compat import ContextVar
+from .exceptions import ProviderDeclarationError, UnknownScope
+from .sessions import current_key
+
+# Memoization scopes.
+CALL = "call"
+BATCH = "batch"
+SESSION = "session"
+ALL = {CALL, BATCH, SESSION}
+
+_MISSING = object()
+_KWARGS_MARK = object()
+
+# Caches of the current batch, keyed by `Memo`.
+_BATCH: ContextVar = ContextVar("aiodine_memo_batch", default=None)
+
+
+def _make_key(args: tuple, kwargs: dict) -> Hashable:
+    if not kwargs:
+        return args
+    return (*args, _KWARGS_MARK, *sorted(kwargs.items()))
+
+
+class _Cache:
+    """LRU cache whose entries expire after ``ttl`` seconds."""
+
+    __slots__ = ("maxsize", "ttl", "_data")
+
+    def __init__(self, maxsize: Optional[int], ttl: Optional[float]):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key: Hashable) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return _MISSING
+        value, expires = entry
+        if expires is not None and expires <= monotonic():
+            del self._data[key]
+            return _MISSING
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        expires = None if self.ttl is None else monotonic() + self.ttl
+        self._data[key] = (value, expires)
+        self._data.move_to_end(key)
+        if self.maxsize is not None and len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def discard(self, key: Hashable, value: Any = _MISSING):
+        entry = self._data.get(key)
+        if entry is not None and (value is _MISSING or entry[0] is value):
+            del self._data[key]
+
+    def clear(self):
+        self._data.clear()
+
+
+class Memoized:
+    """Memoized version of a function returned by a factory provider.
+
+    Results of async functions are shared by concurrent identical calls:
+    the function is only called once, and failures are not cached.
+    """
+
+    __slots__ = ("func", "cache", "_is_async", "__wrapped__")
+
+    def __init__(self, func: Callable, cache: _Cache):
+        self.func = func
+        self.cache = cache
+        self._is_async = inspect.iscoroutinefunction(func)
+        self.__wrapped__ = func
+
+    def __call__(self, *args, **kwargs) -> Any:
+        key = _make_key(args, kwargs)
+        value = self.cache.get(key)
+        if self._is_async:
+            if value is _MISSING:
+                value = ensure_future(self.func(*args, **kwargs))
+                value.add_done_callback(partial(self._done, key))
+                self.cache.set(key, value)
+            # Cancelling a caller must not cancel the call for others.
+            return shield(value)
+        if value is _MISSING:
+            value = self.func(*args, **kwargs)
+            self.cache.set(key, value)
+        return value
+
+    def _done(self, key: Hashable, future: Future):
+        if future.cancelled() or future.exception() is not None:
+            self.cache.discard(key, future)
+
+    def invalidate(self, *args, **kwargs):
+        """Remove the cached result for the given arguments."""
+        self.cache.discard(_make_key(args, kwargs))
+
+    def cache_clear(self):
+        """Remove all cached results."""
+        self.cache.clear()
+
+
+class Memo:
+    """Memoization settings and session caches of a factory provider.
+
+    Like session instances, session caches are kept separately for each
+    session key.
+    """
+
+    __slots__ = ("scope", "maxsize", "ttl", "key_func", "_session_caches")
+
+    def __init__(
+        self, scope: str, maxsize: Optional[int], ttl: Optional[float]
+    ):
+        if scope not in ALL:
+            raise UnknownScope(scope)
+        self.scope = scope
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # Set by the store, see `SessionProvider.key_func`.
+        self.key_func: Optional[Callable[[], Hashable]] = None
+        self._session_caches: Dict[Hashable, _Cache] = {}
+
+    def _session_cache(self) -> _Cache:
+        key = current_key.get()
+        if key is None and self.key_func is not None:
+            key = self.key_func()  # pylint: disable=not-callable
+        cache = self._session_caches.get(key)
+        if cache is None:
+            # Atomic, in case another thread is doing the same.
+            cache = self._session_caches.setdefault(
+                key, _Cache(self.maxsize, self.ttl)
+            )
+        return cache
+
+    def get_cache(self) -> _Cache:
+        if self.scope == SESSION:
+            return self._session_cache()
+        if self.scope == BATCH:
+            caches: Optional[Dict[Memo, _Cache]] = _BATCH.get()
+            if caches is not None:
+                cache = caches.get(self)
+                if cache is None:
+                    cache = caches[self] = _Cache(self.maxsize, self.ttl)
+                return cache
+        return _Cache(self.maxsize, self.ttl)
+
+    def wrap(self, func: Callable) -> Memoized:
+        if not callable(func):
+            raise ProviderDeclarationError(
+                "Memoized providers must provide a function"
+            )
+        return Memoized(func, self.get_cache())
+
+    def clear(self, key: Hashable = None):
+        """Clear the session cache of a session key."""
+        cache = self._session_caches.pop(key, None)
+        if cache is not None:
+            # Functions provided during the session still refer to it.
+            cache.clear()
+
+
+@contextmanager
+def batch():
+    """Context manager to share the caches of ``batch``-scoped memoized
+    providers.
+
+    Outside of a batch, ``batch``-scoped providers behave as
+    ``call``-scoped ones.
+    """
+    token = _BATCH.set({})
+    try:
+        yield
+    finally:
+        _BATCH.reset(token)
+
+
+def memoize(
+    func: Callable = None,
+    scope: str = CALL,
+    maxsize: Optional[int] = 128,
+    ttl: Optional[float] = None,
+):
+    """Memoize the function provided by a factory provider.
+
+    Results are cached by arguments. The cache is kept:
+
+    - ``call``: for each evaluation of the provider.
+    - ``batch``: for all evaluations within a ``batch()`` block.
+    - ``session``: across evaluations, until the session exits.
+
+    The provided function gains ``.invalidate(*args, **kwargs)`` and
+    ``.cache_clear()`` methods.
+
+    Parameters
+    ----------
+    func : callable
+        A provider function (sync, async, or generator).
+    scope : str, optional
+        Defaults to ``"call"``.
+    maxsize : int, optional
+        Maximum number of cached results, or ``None`` for no limit.
+        Defaults to ``128``.
+    ttl : float, optional
+        Number of seconds after which results expire. Defaults to ``None``
+        (no expiry).
+    """
+    if func is None:
+        return partial(memoize, scope=scope, maxsize=maxsize, ttl=ttl)
+
+    memo = Memo(scope, maxsize, ttl)
+
+    if inspect.isasyncgenfunction(func):
+
+        async def provider(*args, **kwargs):
+            agen = func(*args, **kwargs)
+            yield memo.wrap(await agen.asend(None))
+            with suppress(StopAsyncIteration):
+                await agen.asend(None)
+
+    elif inspect.iscoroutinefunction(func):
+
+        async def provider(*args, **kwargs):
+            return memo.wrap(await func(*args, **kwargs))
+
+    elif inspect.isgeneratorfunction(func):
+
+        def provider(*args, **kwargs):
+            gen = func(*args, **kwargs)
+            yield memo.wrap(next(gen))
+            with suppress(StopIteration):
+                next(gen)
+
+    else:
+
+        def provider(*args, **kwargs):
+            return memo.wrap(func(*args, **kwargs))
+
+    provider = wraps(func)(provider)
+    provider.__memo__ = memo
+    return provider
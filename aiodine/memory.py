@@ -0,0 +1,237 @@
+import sys
+import tracemalloc
+from types import BuiltinFunctionType, FunctionType, ModuleType
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from .compat import ContextVar
+from .tracing import Tracer
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .consumers import Consumer
+    from .providers import Provider
+    from .store import Store
+
+# Measurement methods.
+SIZEOF = "sizeof"
+TRACEMALLOC = "tracemalloc"
+ALL = {SIZEOF, TRACEMALLOC}
+
+# Shared objects which are not accounted to the values referencing them.
+_SHARED = (type, ModuleType, FunctionType, BuiltinFunctionType)
+
+
+class MemoryStats(NamedTuple):
+
+    scope: str
+    # Number of sampled evaluations.
+    samples: int
+    # Bytes, per sampled evaluation.
+    mean: float
+    peak: int
+    last: int
+
+
+class _Measure:
+    __slots__ = ("provider", "start", "nested", "var_token")
+
+    def __init__(self, provider: "Provider"):
+        self.provider = provider
+        self.start = 0
+        # Bytes allocated by nested providers.
+        self.nested = 0
+        self.var_token = None
+
+
+def _referents(obj: Any) -> Iterator[Any]:
+    if isinstance(obj, dict):
+        yield from obj.keys()
+        yield from obj.values()
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        yield from obj
+    else:
+        attributes = getattr(obj, "__dict__", None)
+        if attributes is not None:
+            yield attributes
+        for cls in type(obj).__mro__:
+            for name in getattr(cls, "__slots__", ()):
+                value = getattr(obj, name, None)
+                if value is not None:
+                    yield value
+
+
+def deep_sizeof(obj: Any, max_objects: int = 10000) -> int:
+    """Return the size of an object and of the objects it references.
+
+    Classes, modules and functions are not accounted. Traversal stops
+    after ``max_objects`` objects, to bound the cost of measuring.
+    """
+    seen = set()
+    pending = [obj]
+    size = 0
+    while pending and len(seen) < max_objects:
+        item = pending.pop()
+        if id(item) in seen or isinstance(item, _SHARED):
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item, 0)
+        pending.extend(_referents(item))
+    return size
+
+
+class MemoryProfiler(Tracer):
+    """Sampling memory accounting of providers.
+
+    For 1 in ``sample_every`` consumer calls, records the memory used by
+    the providers they evaluate:
+
+    - ``sizeof``: deep size of the provided values. For session
+    providers, this is the memory retained by the instance, which
+    reveals instances growing over the lifetime of the session.
+    - ``tracemalloc``: bytes allocated while evaluating the provider
+    (excluding nested providers) and not freed yet. This requires
+    tracing all allocations, which is slower.
+
+    Parameters
+    ----------
+    store : Store
+    sample_every : int, optional
+        Defaults to ``100``.
+    method : str, optional
+        ``"sizeof"`` (default) or ``"tracemalloc"``.
+    """
+
+    def __init__(
+        self, store: "Store", sample_every: int = 100, method: str = SIZEOF
+    ):
+        if method not in ALL:
+            raise ValueError(f"unknown memory accounting method: {method}")
+        self._store = store
+        self.sample_every = sample_every
+        self.method = method
+        self._calls = 0
+        self._sampled: ContextVar = ContextVar(
+            f"aiodine_memory_{id(self)}", default=None
+        )
+        self._measure: ContextVar = ContextVar(
+            f"aiodine_memory_measure_{id(self)}", default=None
+        )
+        self._stats: Dict[str, List[Any]] = {}
+        self._started_tracemalloc = False
+
+    # Tracer interface.
+
+    def enter_consumer(self, consumer: "Consumer") -> Any:
+        if self._sampled.get() is not None:
+            # Nested consumer, e.g. a frozen provider.
+            return None
+        self._calls += 1
+        return self._sampled.set(self._calls % self.sample_every == 0)
+
+    def enter_provider(self, provider: "Provider") -> Any:
+        if not self._sampled.get():
+            return None
+        measure = _Measure(provider)
+        if self.method == TRACEMALLOC:
+            measure.var_token = self._measure.set(measure)
+            measure.start = tracemalloc.get_traced_memory()[0]
+        return measure
+
+    def exit(self, token: Any):
+        if token is None:
+            return
+        if isinstance(token, _Measure):
+            if token.var_token is not None:
+                self._measure.reset(token.var_token)
+            return
+        self._sampled.reset(token)
+
+    def exit_provider(self, token: Any, value: Any):
+        if token is None:
+            return
+        if self.method == SIZEOF:
+            self._record(token.provider, deep_sizeof(value))
+            return
+
+        allocated = tracemalloc.get_traced_memory()[0] - token.start
+        self._measure.reset(token.var_token)
+        parent = self._measure.get()
+        if parent is not None:
+            parent.nested += allocated
+        self._record(token.provider, max(allocated - token.nested, 0))
+
+    def _record(self, provider: "Provider", size: int):
+        stats = self._stats.get(provider.name)
+        if stats is None:
+            stats = self._stats[provider.name] = [provider.scope, 0, 0, 0, 0]
+        stats[1] += 1
+        stats[2] += size
+        stats[3] = max(stats[3], size)
+        stats[4] = size
+
+    # Control.
+
+    def start(self):
+        """Start accounting the memory of providers of the store."""
+        if self.method == TRACEMALLOC and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        if self not in self._store.tracers:
+            self._store.tracers = (*self._store.tracers, self)
+
+    def stop(self):
+        """Stop accounting. Recorded statistics are kept."""
+        self._store.tracers = tuple(
+            tracer for tracer in self._store.tracers if tracer is not self
+        )
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def __enter__(self) -> "MemoryProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def clear(self):
+        self._stats.clear()
+
+    # Reporting.
+
+    def stats(self) -> Dict[str, MemoryStats]:
+        """Return memory statistics of each sampled provider."""
+        return {
+            name: MemoryStats(scope, samples, total / samples, peak, last)
+            for name, (scope, samples, total, peak, last) in (
+                self._stats.items()
+            )
+        }
+
+    def top(
+        self, n: int = 10, scope: Optional[str] = None
+    ) -> List[Tuple[str, MemoryStats]]:
+        """Return the ``n`` providers using the most memory, by mean."""
+        stats = [
+            (name, stat)
+            for name, stat in self.stats().items()
+            if scope is None or stat.scope == scope
+        ]
+        stats.sort(key=lambda item: item[1].mean, reverse=True)
+        return stats[:n]
+
+    def by_scope(self) -> Dict[str, float]:
+        """Return the mean memory used by providers of each scope."""
+        totals: Dict[str, float] = {}
+        for stat in self.stats().values():
+            totals[stat.scope] = totals.get(stat.scope, 0) + stat.mean
+        return totals
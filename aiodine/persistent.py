@@ -0,0 +1,274 @@
+import hashlib
+import inspect
+import marshal
+import mmap
+import os
+import pickle
+import struct
+import sys
+import tempfile
+from asyncio import get_event_loop
+from contextlib import suppress
+from typing import Any, Callable, List, Optional, Union
+
+from . import graph
+from .consumers import Consumer
+from .exceptions import ForkedSessionError, ProviderDeclarationError
+from .providers import SessionProvider
+
+# Protocol 5 pickles large buffers (e.g. NumPy arrays) out-of-band, so
+# that they can be loaded from a memory map without copying them.
+OUT_OF_BAND = sys.version_info >= (3, 8)
+PROTOCOL = 5 if OUT_OF_BAND else pickle.HIGHEST_PROTOCOL
+
+# Entry layout: a header containing the size of the pickle and the number
+# of out-of-band buffers, the size of each buffer, the pickle, and the
+# buffers (each aligned on 64 bytes so it can be viewed as an array).
+_HEADER = struct.Struct("QQ")
+_SIZE = struct.Struct("Q")
+_ALIGN = 64
+_MISSING = object()
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _ALIGN) * _ALIGN
+
+
+def user_cache_dir() -> str:
+    """Return the default cache directory, which is private to the user."""
+    if sys.platform == "win32":  # pragma: no cover
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser(
+            os.path.join("~", "AppData", "Local")
+        )
+        return os.path.join(base, "aiodine", "Cache")
+    if sys.platform == "darwin":  # pragma: no cover
+        return os.path.expanduser(
+            os.path.join("~", "Library", "Caches", "aiodine")
+        )
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser(
+        os.path.join("~", ".cache")
+    )
+    return os.path.join(base, "aiodine")
+
+
+class DiskCache:
+    """Directory of pickled provider values, keyed by hash.
+
+    If the entries take more than ``max_size`` bytes, the least recently
+    used ones are removed.
+
+    Parameters
+    ----------
+    directory : str
+    max_size : int, optional
+        Defaults to ``None`` (no limit).
+    """
+
+    def __init__(self, directory: str, max_size: Optional[int] = None):
+        self.directory = directory
+        self.max_size = max_size
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pickle")
+
+    def _entries(self) -> List[os.DirEntry]:
+        try:
+            with os.scandir(self.directory) as entries:
+                return [
+                    entry
+                    for entry in entries
+                    if entry.name.endswith(".pickle")
+                ]
+        except FileNotFoundError:
+            return []
+
+    def load(self, key: str) -> Any:
+        """Return the value stored under ``key``, or a sentinel if none."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            return _MISSING
+
+        try:
+            value = self._unpack(memoryview(data))
+        except Exception:  # pylint: disable=broad-except
+            # Truncated or written by an incompatible version.
+            self.discard(key)
+            return _MISSING
+
+        # Mark the entry as recently used.
+        with suppress(OSError):
+            os.utime(path)
+        return value
+
+    @staticmethod
+    def _unpack(data: memoryview) -> Any:
+        size, count = _HEADER.unpack_from(data, 0)
+        offset = _HEADER.size
+        sizes = []
+        for _ in range(count):
+            sizes.append(_SIZE.unpack_from(data, offset)[0])
+            offset += _SIZE.size
+
+        payload = data[offset : offset + size]
+        offset += size
+
+        # Buffers are views of the memory map: they are not copied.
+        buffers = []
+        for buffer_size in sizes:
+            offset = _aligned(offset)
+            buffers.append(data[offset : offset + buffer_size])
+            offset += buffer_size
+
+        if not OUT_OF_BAND:  # pragma: no cover
+            return pickle.loads(payload)
+        return pickle.loads(payload, buffers=buffers)
+
+    def dump(self, key: str, value: Any):
+        """Store a value under ``key``, and evict old entries if needed."""
+        buffers: List[memoryview] = []
+        if OUT_OF_BAND:
+            payload = pickle.dumps(
+                value,
+                protocol=PROTOCOL,
+                buffer_callback=lambda buffer: buffers.append(buffer.raw()),
+            )
+        else:  # pragma: no cover
+            payload = pickle.dumps(value, protocol=PROTOCOL)
+
+        # Entries are unpickled when loaded: only the user may write them.
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        # Write to a temporary file first, so that other processes never
+        # load a partially written entry.
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(_HEADER.pack(len(payload), len(buffers)))
+                for buffer in buffers:
+                    file.write(_SIZE.pack(buffer.nbytes))
+                file.write(payload)
+                for buffer in buffers:
+                    file.write(b"\0" * (_aligned(file.tell()) - file.tell()))
+                    file.write(buffer)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            with suppress(OSError):
+                os.unlink(tmp)
+            raise
+
+        self.evict()
+
+    def discard(self, key: str):
+        with suppress(OSError):
+            os.unlink(self._path(key))
+
+    def evict(self):
+        """Remove least recently used entries beyond ``max_size``."""
+        if self.max_size is None:
+            return
+        entries = []
+        for entry in self._entries():
+            with suppress(OSError):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            with suppress(OSError):
+                os.unlink(path)
+            total -= size
+
+    def clear(self):
+        """Remove all entries."""
+        for entry in self._entries():
+            with suppress(OSError):
+                os.unlink(entry.path)
+
+
+def source_hash(func: Callable) -> bytes:
+    """Hash the source code of a function, or its bytecode if unavailable."""
+    try:
+        source = inspect.getsource(func).encode()
+    except (OSError, TypeError):
+        # Source is not available (e.g. defined in a REPL).
+        source = marshal.dumps(func.__code__)
+    return hashlib.sha256(source).digest()
+
+
+class PersistentSessionProvider(SessionProvider):
+    """A session provider whose value is cached on disk.
+
+    The value is loaded from the store's cache directory when entering
+    a session, and only built (and saved) if it isn't there. Entries are
+    keyed by a hash of the provider's source code, its version, and the
+    keys of its dependencies, which must be persistent too.
+
+    The provided value must be deterministic and picklable.
+    """
+
+    __slots__ = SessionProvider.__slots__ + ("version", "cache", "_source")
+
+    def __init__(self, *args, persistent: Union[bool, str] = True, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        func = graph.unwrap(self.func)
+        if (
+            inspect.isgeneratorfunction(func)
+            or inspect.isasyncgenfunction(func)
+            or self.context_manager
+        ):
+            raise ProviderDeclarationError(
+                "Persistent providers cannot be generators or context "
+                "managers: their value outlives the session"
+            )
+
+        self.version = "" if persistent is True else str(persistent)
+        # Set by the store when the provider is registered.
+        self.cache: Optional[DiskCache] = None
+        self._source = source_hash(func)
+
+    def key(self) -> str:
+        """Key of the provider's value in the cache."""
+        func = self.func
+        digest = hashlib.sha256()
+        digest.update(f"{sys.version_info[:2]}:{self.name}:".encode())
+        digest.update(self.version.encode())
+        digest.update(self._source)
+
+        if isinstance(func, Consumer):
+            # Frozen provider: its dependencies are injected.
+            dependencies, _ = graph.dependencies(func.store, func)
+            for dep in dependencies:
+                if not isinstance(dep, PersistentSessionProvider):
+                    raise ProviderDeclarationError(
+                        f"persistent provider {self.name} depends on "
+                        f"{dep.name}, which is not persistent"
+                    )
+                digest.update(dep.key().encode())
+
+        return digest.hexdigest()
+
+    @property
+    def sync(self) -> bool:
+        # Loading and saving the value are done off the event loop.
+        return False
+
+    async def _setup(self):
+        if self._forked:
+            raise ForkedSessionError(self.name)
+        if self._instance is not None:
+            return
+        key = self.key()
+        # Entries may be large: don't block the event loop.
+        loop = get_event_loop()
+        value = await loop.run_in_executor(None, self.cache.load, key)
+        if value is _MISSING:
+            await super()._setup()
+            await loop.run_in_executor(
+                None, self.cache.dump, key, self._instance
+            )
+        else:
+            self._instance = value
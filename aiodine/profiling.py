@@ -0,0 +1,189 @@
+from random import random
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Tuple
+
+from .compat import ContextVar
+from .tracing import Tracer
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .consumers import Consumer
+    from .providers import Provider
+    from .store import Store
+
+# Stack under which samples are aggregated once `max_stacks` is reached.
+OTHER = "[other]"
+
+
+class ProfileStats(NamedTuple):
+
+    count: int
+    total: float
+    self_time: float
+
+
+class _Frame:
+    __slots__ = ("path", "start", "children")
+
+    def __init__(self, path: Tuple[str, ...]):
+        self.path = path
+        self.start = perf_counter()
+        # Time spent in nested providers.
+        self.children = 0.0
+
+
+# Marks calls which were not sampled, so that nested consumers
+# don't sample them either.
+_SKIPPED = _Frame(())
+
+
+class Profiler(Tracer):
+    """Sampling profiler for dependency resolution.
+
+    Records how long it takes to evaluate providers, along with the chain
+    of providers which lead to them, e.g. ``handler;repo;db_conn``.
+
+    Statistics are aggregated per stack in a bounded amount of memory,
+    which makes the profiler suitable for use in production.
+
+    Parameters
+    ----------
+    store : Store
+    sample_rate : float, optional
+        Fraction of consumer calls to profile. Defaults to ``1.0``.
+    max_stacks : int, optional
+        Maximum number of distinct stacks to record. Further stacks are
+        aggregated under ``"[other]"``. Defaults to ``1024``.
+    """
+
+    def __init__(
+        self, store: "Store", sample_rate: float = 1.0, max_stacks: int = 1024
+    ):
+        self._store = store
+        self.sample_rate = sample_rate
+        self.max_stacks = max_stacks
+        self._frame: ContextVar = ContextVar(
+            f"aiodine_profiler_{id(self)}", default=None
+        )
+        self._stats: Dict[str, List[float]] = {}
+
+    # Tracer interface.
+
+    def enter_consumer(self, consumer: "Consumer") -> Any:
+        if self._frame.get() is not None:
+            # Nested consumer, e.g. a frozen provider.
+            return None
+
+        if random() >= self.sample_rate:
+            return self._frame.set(_SKIPPED), _SKIPPED
+
+        name = getattr(consumer, "__name__", None) or repr(consumer)
+        frame = _Frame((name,))
+        return self._frame.set(frame), frame
+
+    def enter_provider(self, provider: "Provider") -> Any:
+        parent = self._frame.get()
+        if parent is None or parent is _SKIPPED:
+            return None
+        frame = _Frame((*parent.path, provider.name))
+        return self._frame.set(frame), frame
+
+    def exit(self, token: Any):
+        if token is None:
+            return
+
+        var_token, frame = token
+        self._frame.reset(var_token)
+        if frame is _SKIPPED:
+            return
+
+        elapsed = perf_counter() - frame.start
+        parent = self._frame.get()
+        if parent is not None:
+            parent.children += elapsed
+        self._record(frame.path, elapsed, elapsed - frame.children)
+
+    def _record(self, path: Tuple[str, ...], total: float, self_time: float):
+        key = ";".join(path)
+        stats = self._stats.get(key)
+        if stats is None:
+            if len(self._stats) >= self.max_stacks:
+                key = OTHER
+                stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = [0, 0.0, 0.0]
+        stats[0] += 1
+        stats[1] += total
+        stats[2] += self_time
+
+    # Control.
+
+    def start(self):
+        """Start profiling consumers of the store."""
+        if self not in self._store.tracers:
+            self._store.tracers = (*self._store.tracers, self)
+
+    def stop(self):
+        """Stop profiling. Recorded statistics are kept."""
+        self._store.tracers = tuple(
+            tracer for tracer in self._store.tracers if tracer is not self
+        )
+
+    def __enter__(self) -> "Profiler":
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def clear(self):
+        self._stats.clear()
+
+    # Reporting.
+
+    def stats(self) -> Dict[str, ProfileStats]:
+        """Return statistics for each recorded stack.
+
+        Times are given in seconds.
+        """
+        return {
+            key: ProfileStats(int(count), total, self_time)
+            for key, (count, total, self_time) in self._stats.items()
+        }
+
+    def timings(self) -> Dict[str, float]:
+        """Return the average self time of each provider, keyed by name.
+
+        The result can be passed to ``Store.analyze()``.
+        """
+        totals: Dict[str, List[float]] = {}
+        for key, (count, _, self_time) in self._stats.items():
+            if key == OTHER:
+                continue
+            name = key.rpartition(";")[2]
+            total = totals.setdefault(name, [0, 0.0])
+            total[0] += count
+            total[1] += self_time
+        return {
+            name: self_time / count
+            for name, (count, self_time) in totals.items()
+        }
+
+    def collapsed(self, stat: str = "self_time") -> str:
+        """Export recorded stacks in the collapsed stack format.
+
+        The output can be fed to flamegraph tools such as ``flamegraph.pl``
+        or speedscope. Values are given in microseconds.
+
+        Parameters
+        ----------
+        stat : str, optional
+            Which statistic to export: ``"self_time"`` (default),
+            ``"total"`` or ``"count"``.
+        """
+        lines = []
+        for key, stats in sorted(self.stats().items()):
+            value = getattr(stats, stat)
+            if stat != "count":
+                value = round(value * 1e6)
+            lines.append(f"{key} {value}")
+        return "\n".join(lines)
@@ -1,5 +1,7 @@
 import inspect
+from asyncio import Future, Task, ensure_future, gather, shield
 from contextlib import contextmanager, suppress
+from copy import copy
 from functools import partial
 from typing import (
     TYPE_CHECKING,
@@ -8,21 +10,30 @@ from typing import (
     Awaitable,
     Callable,
     Dict,
+    Generator,
+    Hashable,
     List,
     Optional,
+    Tuple,
     Union,
 )
 
-from . import scopes
+from . import forks, scopes
 from .compat import (
     AsyncExitStack,
     wrap_async,
     wrap_generator_async,
     ContextVar,
     Token,
+    copy_context,
 )
-from .datatypes import CoroutineFunction
-from .exceptions import ProviderDeclarationError
+from .consumers import Consumer
+from .datatypes import CoroutineFunction, ExitStack
+from .exceptions import ForkedSessionError, ProviderDeclarationError
+from .lazy import LazyValue
+from .leaks import LeakDetector, allocation_site, get_site
+from .limits import Limiter
+from .sessions import current_key, current_request
 
 if TYPE_CHECKING:  # pragma: no cover
     from .store import Store
@@ -33,6 +44,37 @@ async def _terminate_agen(async_gen: AsyncGenerator):
         await async_gen.asend(None)
 
 
+def _terminate_gen(gen: Generator):
+    with suppress(StopIteration):
+        next(gen)
+
+
+async def _ready(value: Any) -> Any:
+    return value
+
+
+def _enter(stack: AsyncExitStack, manager: Any) -> Awaitable:
+    # Enter a context manager on the stack, so that its exit receives
+    # exceptions raised by the consumer.
+    if hasattr(manager, "__aenter__"):
+        return stack.enter_async_context(manager)
+    return _ready(stack.enter_context(manager))
+
+
+def _normalize(
+    func: Callable
+) -> Tuple[Union[AsyncGenerator, CoroutineFunction], Optional[Callable]]:
+    # Return an async version of `func`, and a sync one if it has one.
+    if isinstance(func, Consumer):
+        # Frozen provider.
+        return func, func.call_sync
+    if inspect.isasyncgenfunction(func) or inspect.iscoroutinefunction(func):
+        return func, None
+    if inspect.isgeneratorfunction(func):
+        return wrap_generator_async(func), func
+    return wrap_async(func), func
+
+
 class Provider:
     """Base class for providers.
 
@@ -40,39 +82,131 @@ class Provider:
     some metadata.
     """
 
-    __slots__ = ("func", "name", "scope", "lazy", "autouse")
+    __slots__ = (
+        "_func",
+        "_async_func",
+        "_sync_func",
+        "_sync_gen",
+        "name",
+        "scope",
+        "lazy",
+        "prefetch",
+        "autouse",
+        "fork",
+        "limiter",
+        "context_manager",
+    )
 
     def __init__(
-        self, func: Callable, name: str, scope: str, lazy: bool, autouse: bool
+        self,
+        func: Callable,
+        name: str,
+        scope: str,
+        lazy: bool,
+        autouse: bool,
+        fork: str = forks.SHARE,
+        prefetch: bool = False,
+        max_concurrency: int = None,
+        queue_timeout: float = None,
+        context_manager: bool = False,
     ):
-        if lazy and scope != scopes.FUNCTION:
+        if prefetch and not lazy:
             raise ProviderDeclarationError(
-                "Lazy providers must be function-scoped"
+                "Only lazy providers can be prefetched"
             )
 
-        if inspect.isgeneratorfunction(func):
-            func = wrap_generator_async(func)
-        elif inspect.isasyncgenfunction(func):
-            pass
-        elif not inspect.iscoroutinefunction(func):
-            func = wrap_async(func)
-
-        assert inspect.iscoroutinefunction(func) or inspect.isasyncgenfunction(
-            func
-        )
+        self.limiter: Optional[Limiter] = None
+        if max_concurrency is not None:
+            if context_manager:
+                raise ProviderDeclarationError(
+                    "Context manager providers cannot be limited"
+                )
+            if scope != scopes.FUNCTION:
+                raise ProviderDeclarationError(
+                    "Only function-scoped providers can be limited"
+                )
+            self.limiter = Limiter(name, max_concurrency, queue_timeout)
+            func = self.limiter.wrap(func)
+        elif queue_timeout is not None:
+            raise ProviderDeclarationError(
+                "A queue timeout requires a maximum concurrency"
+            )
 
-        self.func: Union[AsyncGenerator, CoroutineFunction] = func
+        self.func = func
         self.name = name
         self.scope = scope
         self.lazy = lazy
+        self.prefetch = prefetch
         self.autouse = autouse
+        self.fork = fork
+        self.context_manager = context_manager
+
+    @property
+    def func(self) -> Callable:
+        return self._func
+
+    @func.setter
+    def func(self, func: Callable):
+        self._func = func
+        self._async_func, self._sync_func = _normalize(func)
+        self._sync_gen = inspect.isgeneratorfunction(func)
+
+    @property
+    def sync(self) -> bool:
+        """Whether the provider can be evaluated without awaiting anything.
+
+        If so, ``.call_sync()`` can be used instead of ``__call__()``, which
+        spares the allocation of a coroutine.
+        """
+        if self.lazy or self.context_manager or self._sync_func is None:
+            return False
+        if isinstance(self._func, Consumer):
+            return self._func.sync
+        return True
+
+    @property
+    def inline(self) -> Optional[Callable[[], Any]]:
+        """A getter for the provider's value, if it can be read inline.
+
+        Consumers call it directly, bypassing the provider entirely.
+        """
+        return None
 
     @classmethod
     def create(cls, func, **kwargs) -> "Provider":
         """Factory method to build a provider of the appropriate scope."""
         scope: Optional[str] = kwargs.get("scope")
+        shared: Union[bool, str] = kwargs.pop("shared", False)
+        persistent: Union[bool, str] = kwargs.pop("persistent", False)
+        if shared:
+            if scope != scopes.SESSION:
+                raise ProviderDeclarationError(
+                    "Shared providers must be session-scoped"
+                )
+            # pylint: disable=import-outside-toplevel, cyclic-import
+            from .shared import SharedSessionProvider
+
+            return SharedSessionProvider(func, shared=shared, **kwargs)
+        if persistent:
+            if scope != scopes.SESSION:
+                raise ProviderDeclarationError(
+                    "Persistent providers must be session-scoped"
+                )
+            # pylint: disable=import-outside-toplevel, cyclic-import
+            from .persistent import PersistentSessionProvider
+
+            return PersistentSessionProvider(
+                func, persistent=persistent, **kwargs
+            )
         if scope == scopes.SESSION:
             return SessionProvider(func, **kwargs)
+        context_manager: bool = kwargs.get("context_manager", False)
+        if scope == scopes.REQUEST:
+            if context_manager:
+                return ContextManagerRequestProvider(func, **kwargs)
+            return RequestProvider(func, **kwargs)
+        if context_manager:
+            return ContextManagerProvider(func, **kwargs)
         return FunctionProvider(func, **kwargs)
 
     # NOTE: the returned value is an awaitable, so we *must not*
@@ -80,6 +214,12 @@ class Provider:
     def __call__(self, stack: AsyncExitStack) -> Awaitable:
         raise NotImplementedError
 
+    def get_lazy(self, stack: AsyncExitStack) -> LazyValue:
+        """Return a handle to the provider's value, to be awaited later."""
+        value = LazyValue(partial(self, stack), prefetch=self.prefetch)
+        stack.callback(value.close)
+        return value
+
 
 class FunctionProvider(Provider):
     """Represents a function-scoped provider.
@@ -88,7 +228,7 @@ class FunctionProvider(Provider):
     """
 
     def __call__(self, stack: AsyncExitStack) -> Awaitable:
-        value: Union[Awaitable, AsyncGenerator] = self.func()
+        value: Union[Awaitable, AsyncGenerator] = self._async_func()
 
         if inspect.isasyncgen(value):
             agen = value
@@ -106,6 +246,58 @@ class FunctionProvider(Provider):
 
         return value
 
+    def call_sync(self, stack: ExitStack) -> Any:
+        value = self._sync_func()
+
+        if self._sync_gen:
+            gen = value
+            value = next(gen)
+            stack.callback(partial(_terminate_gen, gen))
+
+        return value
+
+
+class ContextManagerProvider(FunctionProvider):
+    """Represents a function-scoped provider of context managers.
+
+    The context manager is entered on the consumer's exit stack, and its
+    value is provided.
+    """
+
+    def __call__(self, stack: AsyncExitStack) -> Awaitable:
+        if self._sync_func is None or isinstance(self._func, Consumer):
+            return self._enter_async(stack)
+        return _enter(stack, self._sync_func())
+
+    async def _enter_async(self, stack: AsyncExitStack) -> Any:
+        return await _enter(stack, await self._async_func())
+
+
+class RequestProvider(FunctionProvider):
+    """Represents a request-scoped provider.
+
+    Its value is computed once per request scope (see ``Store.request()``),
+    and cleaned up when the request scope exits. Outside of a request
+    scope, it behaves like a function-scoped provider.
+    """
+
+    @property
+    def sync(self) -> bool:
+        return False
+
+    def evaluate(self, stack: AsyncExitStack) -> Awaitable:
+        return super().__call__(stack)
+
+    def __call__(self, stack: AsyncExitStack) -> Awaitable:
+        request = current_request.get()
+        if request is None:
+            return self.evaluate(stack)
+        return request.get(self)
+
+
+class ContextManagerRequestProvider(RequestProvider, ContextManagerProvider):
+    """Represents a request-scoped provider of context managers."""
+
 
 class SessionProvider(Provider):
     """Represents a session-scoped provider.
@@ -113,20 +305,95 @@ class SessionProvider(Provider):
     When called, it builds its instance if necessary and returns it. This
     means that the underlying provider is only built once and is reused
     across function calls.
+
+    After a ``fork()``, the instance inherited from the parent process is
+    handled according to the provider's fork policy:
+
+    - ``share``: the instance is reused as-is, which allows sharing
+    immutable data through copy-on-write pages. Cleanup is left to the parent.
+    - ``reinit``: the instance is dropped and lazily rebuilt in the child.
+    - ``forbid``: using the instance in the child raises an error.
+
+    Keyed sessions have their own instances, which are held by copies
+    of the provider. If a ``key_func`` is set, it gives the key of the
+    session to use when none was entered explicitly (e.g. the running
+    event loop).
     """
 
-    __slots__ = Provider.__slots__ + ("_instance", "_generator")
+    __slots__ = Provider.__slots__ + (
+        "key_func",
+        "leaks",
+        "_instance",
+        "_generator",
+        "_forked",
+        "_lazy",
+        "_pending",
+        "_keyed",
+    )
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.key_func: Optional[Callable[[], Hashable]] = None
+        # Set by the store if it tracks leaks.
+        self.leaks: Optional[LeakDetector] = None
+        self._reset_state()
+
+    def _reset_state(self):
         self._instance: Optional[Any] = None
-        self._generator: Optional[AsyncGenerator] = None
+        # Finalizes the instance: a generator, or an exit stack if the
+        # provider returned a context manager.
+        self._generator: Optional[
+            Union[AsyncGenerator, Generator, AsyncExitStack]
+        ] = None
+        self._forked = False
+        self._lazy: Optional[LazyValue] = None
+        # Setup in progress, awaited by all consumers needing the instance.
+        self._pending: Optional[Future] = None
+        self._keyed: Dict[Hashable, SessionProvider] = {}
+
+    def _copy_for_session(self) -> "SessionProvider":
+        # A copy holding the instance of a keyed session.
+        prov = copy(self)
+        prov._reset_state()  # pylint: disable=protected-access
+        return prov
+
+    def _for_key(self, key: Hashable) -> "SessionProvider":
+        prov = self._keyed.get(key)
+        if prov is None:
+            # Atomic, in case another thread is doing the same.
+            prov = self._keyed.setdefault(key, self._copy_for_session())
+        return prov
+
+    def after_fork_in_child(self):
+        for prov in self._keyed.values():
+            prov.after_fork_in_child()
+
+        # Pending builds belong to the parent's event loop.
+        self._lazy = None
+        self._pending = None
+
+        if self._instance is None and self._generator is None:
+            return
+
+        if self.fork == forks.FORBID:
+            self._forked = True
+            return
+
+        # The parent process remains in charge of finalization.
+        forks.orphan(self._generator)
+        self._generator = None
 
-    async def enter_session(self):
+        if self.fork == forks.REINIT:
+            self._instance = None
+
+    async def _setup(self):
+        if self._forked:
+            raise ForkedSessionError(self.name)
         if self._instance is not None:
+            # Built by a sync consumer while the setup was pending.
             return
 
-        value = self.func()
+        value = self._async_func()
 
         if inspect.isawaitable(value):
             value = await value
@@ -135,22 +402,158 @@ class SessionProvider(Provider):
             agen = value
             value = await agen.asend(None)
             self._generator = agen
+        elif self.context_manager:
+            stack = AsyncExitStack()
+            value = await _enter(stack, value)
+            self._generator = stack
 
+        if self.leaks is not None and self._generator is not None:
+            self.leaks.track(self, self._generator)
         self._instance = value
 
-    async def exit_session(self):
-        if self._generator is not None:
-            await _terminate_agen(self._generator)
+    def _setup_sync(self):
+        if self._forked:
+            raise ForkedSessionError(self.name)
+
+        value = self._sync_func()
+
+        if self._sync_gen:
+            gen = value
+            value = next(gen)
+            self._generator = gen
+            if self.leaks is not None:
+                self.leaks.track(self, gen)
+
+        self._instance = value
+
+    async def _teardown(self):
+        if self._forked:
+            forks.orphan(self._generator)
             self._generator = None
+            self._forked = False
+
+        if self.leaks is not None and self._generator is not None:
+            self.leaks.untrack(self._generator)
+        if inspect.isgenerator(self._generator):
+            _terminate_gen(self._generator)
+        elif isinstance(self._generator, AsyncExitStack):
+            await self._generator.aclose()
+        elif self._generator is not None:
+            await _terminate_agen(self._generator)
+        self._generator = None
         self._instance = None
 
+    async def enter_session(self, key: Hashable = None):
+        if key is not None:
+            await self._for_key(key).enter_session()
+            return
+        if self.lazy:
+            # Don't block entering the session: the instance is built
+            # on first use, or in the background if prefetching.
+            self._get_lazy()
+            return
+        await self._get_instance()
+
+    async def exit_session(self, key: Hashable = None):
+        if key is not None:
+            prov = self._keyed.pop(key, None)
+            if prov is not None:
+                await prov.exit_session()
+            return
+        if self._lazy is not None:
+            self._lazy.close()
+            self._lazy = None
+        if self._pending is not None:
+            self._pending.cancel()
+            await gather(self._pending, return_exceptions=True)
+        await self._teardown()
+
+    def _current(self) -> "SessionProvider":
+        # The provider holding the instance of the current session.
+        key = current_key.get()
+        if key is None:
+            if self.key_func is None:
+                return self
+            key = self.key_func()  # pylint: disable=not-callable
+            if key is None:
+                return self
+        return self._for_key(key)
+
     async def _get_instance(self) -> Any:
-        if self._instance is None:
-            await self.enter_session()
+        if self._instance is None or self._forked:
+            pending = self._pending
+            if pending is None:
+                # Single-flight: concurrent consumers (e.g. a prefetch
+                # and a handler) wait for the same setup.
+                pending = self._pending = self._start_setup()
+                pending.add_done_callback(self._setup_done)
+            # Cancelling a consumer must not cancel the setup for others.
+            await shield(pending)
         return self._instance
 
+    def _start_setup(self) -> Future:
+        if self.leaks is None:
+            return ensure_future(self._setup())
+        # The task's stack does not include the caller's frames.
+        token = allocation_site.set(get_site())
+        try:
+            return ensure_future(self._setup())
+        finally:
+            allocation_site.reset(token)
+
+    def _setup_done(self, _: Future):
+        self._pending = None
+
+    async def _build_lazy(self) -> Any:
+        try:
+            return await self._get_instance()
+        except Exception:
+            # Don't keep the error for the whole session: consumers
+            # getting a handle from now on will try again.
+            # NOTE: when the session exits, this is cancelled instead.
+            self._lazy = None
+            raise
+
+    def _get_lazy(self) -> LazyValue:
+        # The handle is shared by all consumers within the session.
+        if self._lazy is None:
+            self._lazy = LazyValue(self._build_lazy, prefetch=self.prefetch)
+        return self._lazy
+
     def __call__(self, stack: AsyncExitStack) -> Awaitable:
-        return self._get_instance()
+        # pylint: disable=protected-access
+        return self._current()._get_instance()
+
+    def call_sync(self, stack: ExitStack) -> Any:
+        # pylint: disable=protected-access, unused-argument
+        prov = self._current()
+        if prov._instance is None or prov._forked:
+            prov._setup_sync()
+        return prov._instance
+
+    def get_lazy(self, stack: AsyncExitStack = None) -> LazyValue:
+        # pylint: disable=protected-access
+        return self._current()._get_lazy()
+
+
+class ContextVarProvider(FunctionProvider):
+    """Provides the value of a ``ContextVar``.
+
+    Consumers read the variable inline using its bound ``.get()`` method.
+    """
+
+    __slots__ = ("variable",)
+
+    def __init__(self, variable: ContextVar, **kwargs):
+        def provider():
+            return variable.get()
+
+        super().__init__(provider, **kwargs)
+        self.variable = variable
+
+    @property
+    def inline(self) -> Callable[[], Any]:
+        return self.variable.get
 
 
 class ContextProvider:
@@ -175,25 +578,27 @@ class ContextProvider:
             self._build_provider(name)
 
     def _build_provider(self, name):
-        self._variables[name] = ContextVar(name, default=None)
-
-        async def provider():
-            return self._variables[name].get()
-
-        return self._store.provider(name=name)(provider)
+        variable = ContextVar(name, default=None)
+        self._variables[name] = variable
+        prov = ContextVarProvider(
+            variable,
+            name=name,
+            scope=scopes.FUNCTION,
+            lazy=False,
+            autouse=False,
+        )
+        self._store._add(prov)  # pylint: disable=protected-access
+        return prov
 
     def _set(self, **values: Any) -> List[Token]:
         # Set new values for the given variables.
-        tokens = []
-        for name, val in values.items():
-            token = self._variables[name].set(val)
-            tokens.append(token)
-        return tokens
+        variables = self._variables
+        return [variables[name].set(val) for name, val in values.items()]
 
     def _reset(self, *tokens: Token):
         # Reset variables to their previous value using the given tokens.
         for token in tokens:
-            self._variables[token.var.name].reset(token)
+            token.var.reset(token)
 
     @contextmanager
     def assign(self, **values: Any):
@@ -213,3 +618,22 @@ class ContextProvider:
             yield
         finally:
             self._reset(*tokens)
+
+    def run_in_context(self, values: Dict[str, Any], coro: Awaitable) -> Task:
+        """Run a coroutine in a task, with values assigned to variables.
+
+        The current context is copied once for the task, which spares
+        setting and resetting each variable around the coroutine.
+
+        Parameters
+        ----------
+        values : dict
+        coro : coroutine
+
+        Returns
+        -------
+        task : asyncio.Task
+        """
+        context = copy_context()
+        context.run(self._set, **values)
+        return context.run(ensure_future, coro)
@@ -0,0 +1,132 @@
+"""pytest plugin for aiodine.
+
+It is registered through the ``pytest11`` entry point. Sessions are
+entered once per test session, i.e. once per pytest-xdist worker, and
+consumers of a store can be used as tests directly.
+"""
+
+import asyncio
+from inspect import Parameter, Signature
+from typing import Callable, Iterator, List
+
+import pytest
+
+from .__main__ import load
+from .consumers import Consumer
+from .graph import parameters, unwrap
+from .store import Store
+
+
+def pytest_addoption(parser):
+    parser.addini(
+        "aiodine_store",
+        help=(
+            "store used by the aiodine fixtures, as 'module:attribute' "
+            "(default: the default store)"
+        ),
+    )
+
+
+class Sessions:
+    """Stores whose session was entered during the test session."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self._stores: List[Store] = []
+
+    def enter(self, store: Store):
+        if any(entered is store for entered in self._stores):
+            return
+        self.loop.run_until_complete(store.enter_session())
+        self._stores.append(store)
+
+    def exit(self):
+        while self._stores:
+            self.loop.run_until_complete(self._stores.pop().exit_session())
+
+
+@pytest.fixture(scope="session")
+def aiodine_loop() -> Iterator[asyncio.AbstractEventLoop]:
+    """Event loop in which sessions are entered and consumers are run."""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="session")
+def aiodine_sessions(aiodine_loop) -> Iterator[Sessions]:
+    sessions = Sessions(aiodine_loop)
+    yield sessions
+    sessions.exit()
+
+
+@pytest.fixture(scope="session")
+def aiodine_store(pytestconfig) -> Store:
+    target = pytestconfig.getini("aiodine_store")
+    if target:
+        return load(target)
+    # pylint: disable=import-outside-toplevel, cyclic-import
+    import aiodine
+
+    return aiodine._STORE  # pylint: disable=protected-access
+
+
+@pytest.fixture(scope="session")
+def aiodine_session(aiodine_store, aiodine_sessions) -> Store:
+    """Enter the session of the store, once per test session."""
+    aiodine_sessions.enter(aiodine_store)
+    return aiodine_store
+
+
+@pytest.fixture
+def aiodine_overlay(aiodine_store, aiodine_loop) -> Iterator[Store]:
+    """The store, in which providers can be overridden for one test."""
+    with aiodine_store.overlay():
+        before = dict(aiodine_store.session_providers)
+        yield aiodine_store
+        added = [
+            prov
+            for name, prov in aiodine_store.session_providers.items()
+            if before.get(name) is not prov
+        ]
+    for prov in added:
+        aiodine_loop.run_until_complete(prov.exit_session())
+
+
+@pytest.fixture
+def _aiodine_consumer(request, aiodine_sessions) -> Consumer:
+    # Entering the session here reports it in the setup `--durations`.
+    consumer = request.function.consumer
+    aiodine_sessions.enter(consumer.store)
+    return consumer
+
+
+def _as_test(consumer: Consumer) -> Callable:
+    # Parameters without a provider are requested as pytest fixtures.
+    fixtures = [
+        name
+        for name in parameters(consumer)
+        if not consumer.store.has_provider(name)
+    ]
+
+    def test(_aiodine_consumer, aiodine_loop, **kwargs):
+        aiodine_loop.run_until_complete(_aiodine_consumer(**kwargs))
+
+    test.consumer = consumer
+    test.pytestmark = getattr(unwrap(consumer), "pytestmark", [])
+    test.__signature__ = Signature(
+        [
+            Parameter(name, Parameter.KEYWORD_ONLY)
+            for name in ("_aiodine_consumer", "aiodine_loop", *fixtures)
+        ]
+    )
+    return test
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pycollect_makeitem(collector, name, obj):
+    if isinstance(obj, Consumer) and collector.funcnamefilter(name):
+        return pytest.Function.from_parent(
+            collector, name=name, callobj=_as_test(obj)
+        )
+    return None
@@ -1,3 +1,4 @@
 FUNCTION = "function"
+REQUEST = "request"
 SESSION = "session"
-ALL = {FUNCTION, SESSION}
+ALL = {FUNCTION, REQUEST, SESSION}
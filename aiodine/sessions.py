@@ -1,18 +1,211 @@
-from typing import TYPE_CHECKING
+from asyncio import (
+    AbstractEventLoop,
+    Future,
+    ensure_future,
+    gather,
+    get_running_loop,
+    shield,
+)
+from collections import OrderedDict
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    Optional,
+)
+
+from . import scopes
+from .compat import AsyncExitStack, ContextVar
 
 if TYPE_CHECKING:  # pragma: no cover
+    from .providers import RequestProvider
     from .store import Store
 
+# Key of the session in use in the current context (`None` for the
+# default session).
+current_key: ContextVar = ContextVar("aiodine_session_key", default=None)
+
+
+# Request scope in use in the current context, if any.
+current_request: ContextVar = ContextVar("aiodine_request", default=None)
+
+
+def running_loop() -> Optional[AbstractEventLoop]:
+    """Session key function which isolates sessions by event loop.
+
+    Outside of an event loop, the default session is used.
+    """
+    try:
+        return get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class SessionTable:
+    """Live keyed sessions of a store.
+
+    Sessions remain live after being exited, so that their instances can
+    be reused. If there are more than ``max_sessions`` live sessions, the
+    least recently used idle sessions are closed.
+
+    Parameters
+    ----------
+    store : Store
+    max_sessions : int, optional
+        Defaults to ``None`` (no limit).
+    """
+
+    def __init__(self, store: "Store", max_sessions: Optional[int] = None):
+        self._store = store
+        self.max_sessions = max_sessions
+        # Number of active users of each session, in LRU order.
+        self._active: "OrderedDict[Hashable, int]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._active)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._active
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(list(self._active))
+
+    async def acquire(self, key: Hashable):
+        """Mark a session as active, setting it up if necessary."""
+        if key in self._active:
+            self._active[key] += 1
+            self._active.move_to_end(key)
+        else:
+            self._active[key] = 1
+            await self._evict()
+
+        try:
+            for provider in self._store.session_providers.values():
+                await provider.enter_session(key)
+        except BaseException:
+            self.release(key)
+            raise
+
+    def release(self, key: Hashable):
+        """Mark a session as idle."""
+        if self._active.get(key):  # Not if it was closed already.
+            self._active[key] -= 1
+
+    async def _evict(self):
+        if self.max_sessions is None:
+            return
+        while len(self._active) > self.max_sessions:
+            # Look again after each close: sessions may be re-acquired
+            # by other tasks while a session is being torn down.
+            key = next(
+                (key for key, active in self._active.items() if not active),
+                None,
+            )
+            if key is None:
+                return
+            await self.close(key)
+
+    async def close(self, key: Hashable):
+        """Tear down the instances of a session."""
+        self._active.pop(key, None)
+        for provider in self._store.session_providers.values():
+            await provider.exit_session(key)
+        self._store._clear_memos(key)  # pylint: disable=protected-access
+
+    async def close_all(self):
+        for key in self:
+            await self.close(key)
+
 
 # NOTE: can't use @asynccontextmanager from contextlib because it was
 # only added in Python 3.7.
 class Session:
-    def __init__(self, store: "Store"):
+    def __init__(self, store: "Store", key: Hashable = None):
         self._store = store
+        self._key = key
+        self._token = None
 
     async def __aenter__(self):
-        await self._store.enter_session()
+        if self._key is None:
+            await self._store.enter_session()
+            return None
+        await self._store.sessions.acquire(self._key)
+        self._token = current_key.set(self._key)
         return None
 
     async def __aexit__(self, *args):
-        await self._store.exit_session()
+        if self._key is None:
+            await self._store.exit_session()
+            return
+        current_key.reset(self._token)
+        self._store.sessions.release(self._key)
+
+
+def _retrieve(future: Future):
+    # Prevent "exception was never retrieved" warnings.
+    if not future.cancelled():
+        future.exception()
+
+
+class RequestScope:
+    """Holds the instances of request-scoped providers during a request.
+
+    Request-scoped providers are evaluated at most once within the
+    request scope, and cleaned up when exiting it.
+
+    Parameters
+    ----------
+    store : Store
+    """
+
+    def __init__(self, store: "Store"):
+        self._store = store
+        self._stack = AsyncExitStack()
+        self._values: Dict[str, Future] = {}
+        # Prefetched setups of session providers.
+        self._sessions: Dict[str, Future] = {}
+        self._token = None
+
+    def get(self, provider: "RequestProvider") -> Future:
+        future = self._values.get(provider.name)
+        if future is None:
+            future = ensure_future(provider.evaluate(self._stack))
+            self._values[provider.name] = future
+        # Cancelling a consumer must not cancel the evaluation for others.
+        return shield(future)
+
+    def prefetch(self, names: Iterable[str]):
+        """Start evaluating providers in the background.
+
+        Request-scoped providers are evaluated in the request scope, and
+        session providers are set up. Other providers are ignored.
+        """
+        for name in names:
+            provider = self._store.providers[name]
+            if provider.scope == scopes.REQUEST:
+                self.get(provider)
+            elif (
+                provider.scope == scopes.SESSION
+                and name not in self._sessions
+            ):
+                future = ensure_future(provider(self._stack))
+                future.add_done_callback(_retrieve)
+                self._sessions[name] = future
+
+    async def __aenter__(self) -> "RequestScope":
+        await self._stack.__aenter__()
+        self._token = current_request.set(self)
+        return self
+
+    async def __aexit__(self, *args):
+        current_request.reset(self._token)
+        # NOTE: setups of session providers are left running: they don't
+        # belong to the request, and may be awaited by other requests.
+        futures = list(self._values.values())
+        for future in futures:
+            future.cancel()
+        # Retrieve exceptions of evaluations nobody waited for.
+        await gather(*futures, return_exceptions=True)
+        return await self._stack.__aexit__(*args)
@@ -0,0 +1,197 @@
+import getpass
+import hashlib
+import os
+import struct
+import sys
+from asyncio import get_event_loop, shield
+from contextlib import suppress
+from typing import Optional, Union
+
+from . import forks, graph
+from .exceptions import ProviderDeclarationError
+from .persistent import source_hash, user_cache_dir
+from .providers import SessionProvider
+
+try:  # pragma: no cover
+    from multiprocessing import resource_tracker, shared_memory
+except ImportError:  # pragma: no cover
+    resource_tracker = shared_memory = None
+
+try:  # pragma: no cover
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+# Segment layout: a header containing the size of the value and the number
+# of sessions using the segment, followed by the value itself (aligned
+# on 64 bytes so that it can be viewed as an array of any type).
+_HEADER = struct.Struct("QQ")
+_OFFSET = 64
+
+
+def _open(name: str, size: int = 0) -> Optional["shared_memory.SharedMemory"]:
+    # Attach to an existing segment, or create one if a `size` is given.
+    kwargs = {}
+    if sys.version_info >= (3, 13):  # pragma: no cover
+        kwargs["track"] = False
+    try:
+        shm = shared_memory.SharedMemory(
+            name=name, create=size > 0, size=size, **kwargs
+        )
+    except FileNotFoundError:
+        return None
+
+    if not kwargs:  # pragma: no cover
+        # We manage the lifetime of segments ourselves, so prevent the
+        # resource tracker from unlinking them when this process exits.
+        with suppress(Exception):
+            # pylint: disable=protected-access
+            resource_tracker.unregister(shm._name, "shared_memory")
+
+    return shm
+
+
+class _SegmentLock:
+    """Inter-process lock guarding the creation and refcount of a segment."""
+
+    def __init__(self, name: str):
+        # Not in the temporary directory: other users could hold the lock.
+        self._directory = os.path.join(user_cache_dir(), "locks")
+        self._path = os.path.join(self._directory, f"{name}.lock")
+        self._fd: Optional[int] = None
+
+    async def __aenter__(self):
+        os.makedirs(self._directory, mode=0o700, exist_ok=True)
+        fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o600)
+        if fcntl is not None:  # pragma: no cover
+            # Acquiring may block while another process builds the value.
+            acquired = get_event_loop().run_in_executor(
+                None, fcntl.flock, fd, fcntl.LOCK_EX
+            )
+            try:
+                await shield(acquired)
+            except BaseException:
+                # The executor can't be interrupted: release the lock
+                # as soon as it is acquired, or it is held forever.
+                acquired.add_done_callback(lambda _: os.close(fd))
+                raise
+        self._fd = fd
+
+    async def __aexit__(self, *args):
+        os.close(self._fd)  # Releases the lock too.
+        self._fd = None
+
+
+class SharedSessionProvider(SessionProvider):
+    """A session provider whose value lives in shared memory.
+
+    The value is built by the first process entering a session and stored
+    in a named ``multiprocessing.shared_memory`` segment. Other processes
+    attach to the segment instead of building the value, and are provided
+    a zero-copy, read-only ``memoryview`` of it.
+
+    The segment is reference-counted: it is destroyed once all processes
+    using it have exited their session. Unless a name is given, it is
+    named after the provider's source code and the user, so that other
+    deployments (or users) never attach to it.
+
+    The provided value must be a C-contiguous bytes-like object (e.g.
+    ``bytes``, ``bytearray`` or a NumPy array).
+    """
+
+    __slots__ = SessionProvider.__slots__ + ("segment_name", "_segment")
+
+    def __init__(self, *args, shared: Union[bool, str] = True, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        if shared_memory is None:  # pragma: no cover
+            raise ProviderDeclarationError(
+                "Shared providers require Python 3.8+"
+            )
+
+        if self.fork != forks.SHARE:
+            raise ProviderDeclarationError(
+                "Shared providers are always shared across processes"
+            )
+
+        if shared is True:
+            digest = hashlib.sha256()
+            digest.update(
+                f"{sys.version_info[:2]}:{getpass.getuser()}:".encode()
+            )
+            digest.update(source_hash(graph.unwrap(self.func)))
+            shared = f"aiodine-{self.name}-{digest.hexdigest()[:16]}"
+        self.segment_name = shared
+        self._segment: Optional["shared_memory.SharedMemory"] = None
+
+    def _copy_for_session(self) -> "SharedSessionProvider":
+        # Keyed sessions attach to the same segment: the value is
+        # the same, and the segment is reference-counted.
+        prov = super()._copy_for_session()
+        prov._segment = None  # pylint: disable=protected-access
+        return prov
+
+    def after_fork_in_child(self):
+        super().after_fork_in_child()
+        if self._segment is None:
+            return
+        # The reference to the segment belongs to the parent: drop it
+        # (without closing the parent's mapping) and attach again on
+        # first use, which takes a reference for this process.
+        forks.orphan((self._segment, self._instance))
+        self._segment = self._instance = None
+
+    @property
+    def sync(self) -> bool:
+        # Attaching to the segment requires acquiring an inter-process lock.
+        return False
+
+    async def _build(self) -> memoryview:
+        # Build the value using the regular session machinery, then
+        # finalize it right away: it is copied into the segment.
+        await super()._setup()
+        try:
+            return memoryview(self._instance).cast("B")
+        except TypeError:
+            raise TypeError(
+                f"shared provider {self.name} must provide a bytes-like object"
+            ) from None
+        finally:
+            await super()._teardown()
+
+    async def _setup(self):
+        async with _SegmentLock(self.segment_name):
+            shm = _open(self.segment_name)
+            if shm is None:
+                data = await self._build()
+                shm = _open(self.segment_name, size=_OFFSET + data.nbytes)
+                shm.buf[_OFFSET : _OFFSET + data.nbytes] = data
+                _HEADER.pack_into(shm.buf, 0, data.nbytes, 0)
+
+            size, refcount = _HEADER.unpack_from(shm.buf, 0)
+            _HEADER.pack_into(shm.buf, 0, size, refcount + 1)
+
+        self._segment = shm
+        # Read-only: a buggy process must not corrupt the others' value.
+        self._instance = shm.buf[_OFFSET : _OFFSET + size].toreadonly()
+
+    async def _teardown(self):
+        if self._segment is None:
+            return
+
+        shm, view = self._segment, self._instance
+        self._segment = self._instance = None
+
+        async with _SegmentLock(self.segment_name):
+            size, refcount = _HEADER.unpack_from(shm.buf, 0)
+            # Never below zero: the segment is then already unlinked.
+            if refcount > 0:
+                _HEADER.pack_into(shm.buf, 0, size, refcount - 1)
+                if refcount == 1:
+                    shm.unlink()
+
+        # NOTE: this fails if consumers still hold views of the value.
+        # The memory is then released when the views are garbage collected.
+        with suppress(BufferError):
+            view.release()
+            shm.close()
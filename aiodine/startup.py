@@ -0,0 +1,80 @@
+from time import perf_counter
+from typing import TYPE_CHECKING, Dict, Iterable, NamedTuple
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .consumers import Consumer
+    from .store import Store
+
+
+class WarmupReport(NamedTuple):
+    """Result of warming up a store.
+
+    Times are given in seconds.
+    """
+
+    # Time spent importing the providers module.
+    discover: float
+    # Time spent resolving the providers of consumers.
+    plans: float
+    # Time spent setting up session providers.
+    sessions: float
+    # Number of consumers whose plan was resolved.
+    consumers: int
+    # Setup time of each session provider.
+    session_providers: Dict[str, float]
+
+    @property
+    def total(self) -> float:
+        return self.discover + self.plans + self.sessions
+
+
+async def warmup(
+    store: "Store",
+    consumers: Iterable["Consumer"] = None,
+    sessions: bool = True,
+) -> WarmupReport:
+    """Do the work which would otherwise slow down the first calls.
+
+    - Import the providers module.
+    - Resolve and cache the plans of consumers. This also validates
+    that the providers they use exist.
+    - Set up session providers, if ``sessions`` is true.
+
+    Parameters
+    ----------
+    store : Store
+    consumers : iterable of Consumer, optional
+        Defaults to all consumers created by the store.
+    sessions : bool, optional
+        Defaults to ``True``.
+    """
+    start = perf_counter()
+    store.discover_default()
+    discover = perf_counter() - start
+
+    start = perf_counter()
+    if consumers is None:
+        consumers = list(store.consumers)
+    count = 0
+    for consumer in consumers:
+        consumer.get_plan()
+        count += 1
+    plans = perf_counter() - start
+
+    session_providers: Dict[str, float] = {}
+    if sessions:
+        # Same session as `store.enter_session()`.
+        # pylint: disable=protected-access
+        key = store._session_key()
+        for name, provider in store._own(store.session_providers).items():
+            start = perf_counter()
+            await provider.enter_session(key)
+            session_providers[name] = perf_counter() - start
+
+    return WarmupReport(
+        discover=discover,
+        plans=plans,
+        sessions=sum(session_providers.values()),
+        consumers=count,
+        session_providers=session_providers,
+    )
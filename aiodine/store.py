@@ -1,25 +1,86 @@
 import inspect
+from collections import ChainMap
+from collections.abc import Mapping as MappingABC
 from contextlib import contextmanager
+from copy import copy
 from functools import partial
 from importlib import import_module
 from importlib.util import find_spec
-from typing import Any, Callable, Dict, Optional, Union
+from threading import Lock, local
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
+from weakref import WeakSet
 
-from . import scopes
+from . import forks, scopes
+from .analysis import Analysis, analyze
+from .check import CheckReport, check
+from .cleanup import CleanupQueue
 from .consumers import Consumer
 from .datatypes import CoroutineFunction
 from .exceptions import (
     RecursiveProviderError,
+    UnknownForkPolicy,
     UnknownScope,
     ProviderDoesNotExist,
 )
+from .graph import unwrap
+from .leaks import LeakDetector
+from .memory import MemoryProfiler
+from .persistent import (
+    DiskCache,
+    PersistentSessionProvider,
+    user_cache_dir,
+)
+from .profiling import Profiler
 from .providers import ContextProvider, Provider, SessionProvider
-from .sessions import Session
+from .sessions import RequestScope, Session, SessionTable
+from .startup import WarmupReport, warmup
+from .tracing import Tracer
 
 DEFAULT_PROVIDER_MODULE = "providerconf"
 _MISSING = object()
 
 
+class _Inherited(MappingABC):
+    """Live view of a registry of a parent store.
+
+    Registries are replaced when providers are added, so child stores
+    must not hold on to them.
+    """
+
+    __slots__ = ("_store", "_attribute", "_rebind")
+
+    def __init__(
+        self,
+        store: "Store",
+        attribute: str,
+        rebind: Callable[[Provider], Provider],
+    ):
+        self._store = store
+        self._attribute = attribute
+        self._rebind = rebind
+
+    def __getitem__(self, name: str) -> Provider:
+        return self._rebind(getattr(self._store, self._attribute)[name])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(getattr(self._store, self._attribute))
+
+    def __len__(self) -> int:
+        return len(getattr(self._store, self._attribute))
+
+
 class Store:
 
     __slots__ = (
@@ -29,6 +90,19 @@ class Store:
         "default_scope",
         "providers_module",
         "session_providers",
+        "tracers",
+        "cleanup_queue",
+        "sessions",
+        "consumers",
+        "parent",
+        "session_key",
+        "cache",
+        "leaks",
+        "_bulk",
+        "_rebound",
+        "_version",
+        "_lock",
+        "__weakref__",
     )
 
     def __init__(
@@ -36,19 +110,75 @@ class Store:
         providers_module=DEFAULT_PROVIDER_MODULE,
         scope_aliases: Dict[str, str] = None,
         default_scope: str = scopes.FUNCTION,
+        parent: "Store" = None,
+        max_sessions: int = None,
+        session_key: Callable[[], Hashable] = None,
+        cache_dir: str = None,
+        max_cache_size: int = None,
+        track_leaks: bool = False,
     ):
         if scope_aliases is None:
             scope_aliases = {}
 
-        self.providers: Dict[str, Provider] = {}
-        self.session_providers: Dict[str, SessionProvider] = {}
-        self.autouse_providers: Dict[str, Provider] = {}
+        self.parent = parent
+        self.session_key = session_key
+        self._lock = Lock()
+        self._rebound: Dict[str, Tuple[Provider, Consumer, Provider]] = {}
+        self._set_registries({}, {}, {})
         self.scope_aliases = scope_aliases
         self.default_scope = default_scope
         self.providers_module = providers_module
+        self.tracers: Tuple[Tracer, ...] = ()
+        self.cleanup_queue = CleanupQueue()
+        self.sessions = SessionTable(self, max_sessions=max_sessions)
+        if cache_dir is None:
+            cache_dir = user_cache_dir()
+        self.cache = DiskCache(cache_dir, max_size=max_cache_size)
+        self.leaks = LeakDetector() if track_leaks else None
+        self.consumers: "WeakSet[Consumer]" = WeakSet()
+        # Pending bulk registration of each thread (see `.bulk_register()`).
+        self._bulk = local()
+        self._version = 0
+        forks.track(self)
 
     # Inspection.
 
+    @property
+    def version(self) -> int:
+        """Incremented whenever providers change, which invalidates the
+        resolution plans of consumers."""
+        if self.parent is not None:
+            return self._version + self.parent.version
+        return self._version
+
+    def _own(self, providers: Mapping[str, Provider]) -> Mapping[str, Provider]:
+        # Providers registered on this store, excluding the parent's.
+        if self.parent is not None:
+            return providers.maps[0]
+        return providers
+
+    def child(self) -> "Store":
+        """Create a child store.
+
+        Providers registered on the child override those of the parent,
+        and other names are looked up in the parent. Session instances of
+        the parent are shared with the child.
+
+        Creating a child store does not copy the parent's providers.
+        """
+        child = Store(
+            self.providers_module,
+            scope_aliases=self.scope_aliases,
+            default_scope=self.default_scope,
+            parent=self,
+            max_sessions=self.sessions.max_sessions,
+            session_key=self.session_key,
+            cache_dir=self.cache.directory,
+            max_cache_size=self.cache.max_size,
+        )
+        child.leaks = self.leaks
+        return child
+
     def empty(self):
         return not self.providers
 
@@ -91,7 +221,14 @@ class Store:
         scope: str = None,
         name: str = None,
         lazy: bool = False,
+        prefetch: bool = False,
         autouse: bool = False,
+        fork: str = forks.SHARE,
+        shared: Union[bool, str] = False,
+        persistent: Union[bool, str] = False,
+        max_concurrency: int = None,
+        queue_timeout: float = None,
+        context_manager: bool = False,
     ) -> Provider:
         if func is None:
             return partial(
@@ -99,7 +236,14 @@ class Store:
                 scope=scope,
                 name=name,
                 lazy=lazy,
+                prefetch=prefetch,
                 autouse=autouse,
+                fork=fork,
+                shared=shared,
+                persistent=persistent,
+                max_concurrency=max_concurrency,
+                queue_timeout=queue_timeout,
+                context_manager=context_manager,
             )
 
         if scope is None:
@@ -110,26 +254,182 @@ class Store:
         if scope not in scopes.ALL:
             raise UnknownScope(scope)
 
+        if fork not in forks.ALL:
+            raise UnknownForkPolicy(fork)
+
         if name is None:
             name = func.__name__
 
         # NOTE: save the new provider before checking for recursion,
         # so that its dependants can detect it as a dependency.
         prov = Provider.create(
-            func, name=name, scope=scope, lazy=lazy, autouse=autouse
+            func,
+            name=name,
+            scope=scope,
+            lazy=lazy,
+            prefetch=prefetch,
+            autouse=autouse,
+            fork=fork,
+            shared=shared,
+            persistent=persistent,
+            max_concurrency=max_concurrency,
+            queue_timeout=queue_timeout,
+            context_manager=context_manager,
         )
+        pending = getattr(self._bulk, "providers", None)
+        if pending is not None:
+            # Added and validated when the bulk registration exits.
+            pending.append(prov)
+            return prov
+
         self._add(prov)
 
         self._check_for_recursive_providers(name, func)
 
         return prov
 
+    @contextmanager
+    def bulk_register(self):
+        """Context manager to register many providers at once.
+
+        Providers registered within it are added to the store when it
+        exits, and the provider graph is validated once, instead of after
+        each registration. Until then, they cannot be used.
+
+        If a ``RecursiveProviderError`` is raised, or the block raises an
+        exception, none of the providers are added.
+
+        Only registrations from the current thread are deferred.
+        """
+        if getattr(self._bulk, "providers", None) is not None:
+            # Nested: the outermost block registers the providers.
+            yield self
+            return
+
+        self._bulk.providers = providers = []
+        try:
+            yield self
+        finally:
+            self._bulk.providers = None
+        self._check_for_recursive_providers_many(providers)
+        self._add_many(providers)
+
+    def register_many(
+        self, funcs: Iterable[Callable], **kwargs: Any
+    ) -> List[Provider]:
+        """Register providers in bulk.
+
+        Keyword arguments are passed to ``.provider()`` for each function.
+        See also ``.bulk_register()``.
+        """
+        with self.bulk_register():
+            return [self.provider(func, **kwargs) for func in funcs]
+
+    def _set_registries(
+        self,
+        providers: Dict[str, Provider],
+        session_providers: Dict[str, SessionProvider],
+        autouse_providers: Dict[str, Provider],
+    ):
+        if self.parent is not None:
+            # Look names up in this store first, then in the parent.
+            parent, rebind = self.parent, self._rebind
+            providers = ChainMap(
+                providers, _Inherited(parent, "providers", rebind)
+            )
+            session_providers = ChainMap(
+                session_providers,
+                _Inherited(parent, "session_providers", rebind),
+            )
+            autouse_providers = ChainMap(
+                autouse_providers,
+                _Inherited(parent, "autouse_providers", rebind),
+            )
+        self.providers = providers
+        self.session_providers = session_providers
+        self.autouse_providers = autouse_providers
+
+    def _rebind(self, prov: Provider) -> Provider:
+        # Frozen providers of the parent resolve their dependencies in the
+        # child, so that they see its overrides. Session providers are
+        # left alone: their instances are shared with the parent.
+        consumer = prov.func
+        if (
+            not isinstance(consumer, Consumer)
+            or isinstance(prov, SessionProvider)
+            or consumer.store is self
+        ):
+            return prov
+        rebound = self._rebound.get(prov.name)
+        if rebound is not None:
+            frozen, func, copied = rebound
+            if frozen is prov and func is consumer:
+                return copied
+        copied = copy(prov)
+        copied.func = Consumer(
+            self,
+            consumer.func,
+            deferred_cleanup=consumer.deferred_cleanup,
+            concurrent_cleanup=consumer.concurrent_cleanup,
+        )
+        self._rebound[prov.name] = (prov, consumer, copied)
+        return copied
+
     def _add(self, prov: Provider):
-        self.providers[prov.name] = prov
-        if isinstance(prov, SessionProvider):
-            self.session_providers[prov.name] = prov
-        if prov.autouse:
-            self.autouse_providers[prov.name] = prov
+        self._add_many([prov])
+
+    def _add_many(self, provs: List[Provider]):
+        for prov in provs:
+            if isinstance(prov, SessionProvider):
+                if self.session_key is not None:
+                    prov.key_func = self.session_key
+                prov.leaks = self.leaks
+            if isinstance(prov, PersistentSessionProvider):
+                prov.cache = self.cache
+            memo = getattr(unwrap(prov.func), "__memo__", None)
+            if memo is not None and self.session_key is not None:
+                memo.key_func = self.session_key
+
+        # Registries are copied on write, so that they can be read from
+        # any thread without locking.
+        with self._lock:
+            providers = dict(self._own(self.providers))
+            session_providers = dict(self._own(self.session_providers))
+            autouse_providers = dict(self._own(self.autouse_providers))
+
+            for prov in provs:
+                providers[prov.name] = prov
+                if isinstance(prov, SessionProvider):
+                    session_providers[prov.name] = prov
+                if prov.autouse:
+                    autouse_providers[prov.name] = prov
+
+            self._set_registries(
+                providers, session_providers, autouse_providers
+            )
+            self._version += 1
+
+    @contextmanager
+    def overlay(self):
+        """Context manager to register providers temporarily.
+
+        Providers registered within it (e.g. overrides in tests) are
+        removed on exit, and the providers they replaced are restored.
+        Restoring does not copy registries.
+        """
+        # Registries are copied on write, so they can be restored as-is.
+        with self._lock:
+            saved = (
+                self._own(self.providers),
+                self._own(self.session_providers),
+                self._own(self.autouse_providers),
+            )
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._set_registries(*saved)
+                self._version += 1
 
     # Provider recursion check.
 
@@ -138,12 +438,57 @@ class Store:
             if name in self._get_providers(other.func):
                 raise RecursiveProviderError(name, other_name)
 
+    def _check_for_recursive_providers_many(self, provs: List[Provider]):
+        # Equivalent to checking each provider as it is registered, but
+        # each signature is only inspected once.
+        batch = {prov.name: index for index, prov in enumerate(provs)}
+        pending = {prov.name: prov for prov in provs}
+        params: Dict[str, Iterable[str]] = {}
+
+        def get(name: str) -> Optional[Provider]:
+            prov = pending.get(name)
+            return prov if prov is not None else self._get(name, default=None)
+
+        def dependencies(prov: Provider) -> Iterable[str]:
+            if prov.name not in params:
+                params[prov.name] = inspect.signature(prov.func).parameters
+            return params[prov.name]
+
+        for index, prov in enumerate(provs):
+            if batch[prov.name] != index:
+                continue  # Overridden later in the batch.
+            for other_name in dependencies(prov):
+                other = get(other_name)
+                if other is None:
+                    continue
+                # Pairs are detected when the second one is registered.
+                if batch.get(other_name, -1) > index:
+                    continue
+                if prov.name in dependencies(other):
+                    raise RecursiveProviderError(prov.name, other_name)
+
     # Consumers.
 
     def consumer(
-        self, consumer_function: Union[partial, Callable, CoroutineFunction]
+        self,
+        consumer_function: Union[partial, Callable, CoroutineFunction] = None,
+        deferred_cleanup: bool = False,
+        concurrent_cleanup: bool = False,
     ) -> Consumer:
-        return Consumer(self, consumer_function)
+        if consumer_function is None:
+            return partial(
+                self.consumer,
+                deferred_cleanup=deferred_cleanup,
+                concurrent_cleanup=concurrent_cleanup,
+            )
+        consumer = Consumer(
+            self,
+            consumer_function,
+            deferred_cleanup=deferred_cleanup,
+            concurrent_cleanup=concurrent_cleanup,
+        )
+        self.consumers.add(consumer)
+        return consumer
 
     # Used providers.
 
@@ -169,8 +514,11 @@ class Store:
     # Provider-in-providers freezing.
 
     def freeze(self):
-        for prov in self.providers.values():
-            prov.func = self.consumer(prov.func)
+        for prov in self._own(self.providers).values():
+            if not isinstance(prov.func, Consumer):
+                prov.func = self.consumer(prov.func)
+        with self._lock:
+            self._version += 1
 
     @contextmanager
     def exit_freeze(self):
@@ -179,13 +527,119 @@ class Store:
 
     # Sessions.
 
+    # NOTE: session instances of the parent store are managed by the parent.
+
+    def _session_key(self) -> Optional[Hashable]:
+        if self.session_key is None:
+            return None
+        return self.session_key()
+
     async def enter_session(self):
-        for provider in self.session_providers.values():
-            await provider.enter_session()
+        key = self._session_key()
+        for provider in self._own(self.session_providers).values():
+            await provider.enter_session(key)
 
     async def exit_session(self):
-        for provider in self.session_providers.values():
-            await provider.exit_session()
-
-    def session(self):
-        return Session(self)
+        # Deferred cleanups may still use session providers.
+        await self.cleanup_queue.drain()
+        key = self._session_key()
+        for provider in self._own(self.session_providers).values():
+            await provider.exit_session(key)
+        self._clear_memos(key)
+
+    def _clear_memos(self, key: Optional[Hashable]):
+        # Session-scoped memoization caches.
+        for provider in self._own(self.providers).values():
+            memo = getattr(unwrap(provider.func), "__memo__", None)
+            if memo is not None:
+                memo.clear(key)
+
+    def session(self, key: Hashable = None):
+        """Return a session context manager.
+
+        If a ``key`` is given, session providers have separate instances
+        for each key. Keyed sessions remain live after being exited,
+        until they are evicted or closed using ``.sessions``.
+        """
+        return Session(self, key=key)
+
+    def request(self) -> RequestScope:
+        """Return a request scope context manager.
+
+        Request-scoped providers are evaluated at most once within it,
+        and cleaned up when it exits.
+        """
+        return RequestScope(self)
+
+    # Profiling.
+
+    def profile(
+        self, sample_rate: float = 1.0, max_stacks: int = 1024
+    ) -> Profiler:
+        """Build a profiler for the resolution of providers.
+
+        Use it as a context manager, or call ``.start()`` to profile
+        consumers continuously.
+        """
+        return Profiler(self, sample_rate=sample_rate, max_stacks=max_stacks)
+
+    def memory_profile(
+        self, sample_every: int = 100, method: str = "sizeof"
+    ) -> MemoryProfiler:
+        """Build a sampling memory profiler for the store's providers.
+
+        Use it as a context manager, or call ``.start()`` to account
+        memory continuously.
+        """
+        return MemoryProfiler(self, sample_every=sample_every, method=method)
+
+    def analyze(
+        self, consumer: Callable, timings: Dict[str, float] = None
+    ) -> Analysis:
+        """Analyze the resolution of a consumer's providers.
+
+        Reports the critical path, the serial and ideal parallel resolution
+        times, and function-scoped providers evaluated more than once
+        per call.
+
+        See also: ``aiodine.analysis.analyze()``.
+        """
+        return analyze(self, consumer, timings=timings)
+
+    def check(self) -> CheckReport:
+        """Check the provider graph without evaluating any provider.
+
+        Reports cycles, session providers depending on shorter-lived
+        providers, missing and unused providers, and the number of
+        function-scoped providers each consumer evaluates per call.
+
+        See also: ``python -m aiodine check``.
+        """
+        return check(self)
+
+    # Warm-up.
+
+    async def warmup(
+        self, consumers: Iterable[Consumer] = None, sessions: bool = True
+    ) -> WarmupReport:
+        """Prepare the store for serving calls at full speed.
+
+        Imports the providers module, resolves the providers of consumers,
+        and enters the session.
+
+        See also: ``aiodine.startup.warmup()``.
+        """
+        return await warmup(self, consumers=consumers, sessions=sessions)
+
+    # Forking.
+
+    def after_fork_in_child(self):
+        """Apply the fork policies of session providers.
+
+        Called automatically in child processes where
+        ``os.register_at_fork()`` is available.
+        """
+        if self.leaks is not None and self.parent is None:
+            self.leaks.after_fork_in_child()
+        for provider in self._own(self.session_providers).values():
+            provider.after_fork_in_child()
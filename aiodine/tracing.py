@@ -0,0 +1,100 @@
+from typing import TYPE_CHECKING, Any, List, Sequence
+
+from .datatypes import ExitStack
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .consumers import Consumer, Plan
+    from .providers import Provider
+    from .lazy import LazyValue
+
+
+class Tracer:
+    """Base class for tracers.
+
+    Tracers observe the resolution of providers. They are attached to
+    a store, and notified every time a consumer is called and every
+    time it evaluates a provider.
+
+    Methods return a token which is passed back to ``.exit()`` when the
+    consumer returns or the provider has been evaluated.
+    """
+
+    def enter_consumer(self, consumer: "Consumer") -> Any:
+        return None
+
+    def enter_provider(self, provider: "Provider") -> Any:
+        return None
+
+    def exit(self, token: Any):
+        pass
+
+    def exit_provider(self, token: Any, value: Any):
+        """Called instead of ``.exit()`` when a provider was evaluated
+        successfully, with the value it provided."""
+        self.exit(token)
+
+
+def enter(tracers: Sequence[Tracer], method: str, obj: Any) -> List[Any]:
+    return [getattr(tracer, method)(obj) for tracer in tracers]
+
+
+def exit_(tracers: Sequence[Tracer], tokens: List[Any]):
+    for tracer, token in zip(reversed(tracers), reversed(tokens)):
+        tracer.exit(token)
+
+
+def exit_provider(tracers: Sequence[Tracer], tokens: List[Any], value: Any):
+    for tracer, token in zip(reversed(tracers), reversed(tokens)):
+        tracer.exit_provider(token, value)
+
+
+class TracedProvider:
+    """Proxy which notifies tracers when evaluating a provider."""
+
+    __slots__ = ("provider", "tracers", "sync", "lazy")
+
+    # Values must go through the proxy to be traced.
+    inline = None
+
+    def __init__(self, provider: "Provider", tracers: Sequence[Tracer]):
+        self.provider = provider
+        self.tracers = tracers
+        self.sync = provider.sync
+        self.lazy = provider.lazy
+
+    def call_sync(self, stack: ExitStack) -> Any:
+        tokens = enter(self.tracers, "enter_provider", self.provider)
+        try:
+            value = self.provider.call_sync(stack)
+        except BaseException:
+            exit_(self.tracers, tokens)
+            raise
+        exit_provider(self.tracers, tokens, value)
+        return value
+
+    async def __call__(self, stack: ExitStack) -> Any:
+        tokens = enter(self.tracers, "enter_provider", self.provider)
+        try:
+            value = await self.provider(stack)
+        except BaseException:
+            exit_(self.tracers, tokens)
+            raise
+        exit_provider(self.tracers, tokens, value)
+        return value
+
+    def get_lazy(self, stack: ExitStack) -> "LazyValue":
+        return self.provider.get_lazy(stack)
+
+
+def trace_plan(plan: "Plan", tracers: Sequence[Tracer]) -> "Plan":
+    """Return a copy of the plan whose providers notify the tracers."""
+    return plan._replace(
+        external=[
+            (TracedProvider(prov, tracers), sync)
+            for prov, sync in plan.external
+        ],
+        injected=[
+            (name, TracedProvider(prov, tracers), sync, None)
+            for name, prov, sync, _ in plan.injected
+        ],
+    )
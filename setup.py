@@ -23,6 +23,7 @@ setuptools.setup(
         "aiocontextvars;python_version<'3.7'",
     ],
     python_requires=">=3.6",
+    entry_points={"pytest11": ["aiodine = aiodine.pytest_plugin"]},
     url=GITHUB,
     license="MIT",
     classifiers=[
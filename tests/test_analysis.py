@@ -0,0 +1,146 @@
+import pytest
+
+from aiodine import Store
+
+pytestmark = pytest.mark.asyncio
+
+
+def declare(store: Store):
+    with store.exit_freeze():
+
+        @store.provider
+        def settings():
+            return {}
+
+        @store.provider
+        def db_conn(settings):
+            return "conn"
+
+        @store.provider
+        def cache(settings):
+            return "cache"
+
+        @store.provider
+        def repo(db_conn, cache):
+            return db_conn, cache
+
+        @store.provider(scope="session")
+        def pool(settings):
+            return "pool"
+
+    @store.consumer
+    def handler(repo, pool, settings):
+        return repo
+
+    return handler
+
+
+async def test_analyze_with_timings():
+    store = Store()
+    handler = declare(store)
+
+    analysis = store.analyze(
+        handler,
+        timings={
+            "handler": 1,
+            "repo": 2,
+            "db_conn": 10,
+            "cache": 3,
+            "settings": 1,
+            "pool": 0,
+        },
+    )
+
+    assert analysis.critical_path == [
+        "handler",
+        "repo",
+        "db_conn",
+        "settings",
+    ]
+    assert analysis.parallel_time == 1 + 2 + 10 + 1
+    # settings is evaluated three times, but pool is built once per session.
+    assert analysis.serial_time == 1 + 2 + 10 + 3 + 3 * 1 + 0
+    assert analysis.recomputed == {"settings": 3}
+    assert analysis.evaluated == {
+        "repo": 1,
+        "db_conn": 1,
+        "cache": 1,
+        "settings": 3,
+    }
+
+
+async def test_analyze_without_timings():
+    store = Store()
+    handler = declare(store)
+
+    analysis = store.analyze(handler)
+    assert analysis.serial_time == analysis.parallel_time == 0
+    assert analysis.critical_path[0] == "handler"
+
+
+async def test_analyze_with_profiler_timings():
+    store = Store()
+    handler = declare(store)
+
+    with store.profile() as profiler:
+        await handler()
+
+    timings = profiler.timings()
+    assert set(timings) == {
+        "handler",
+        "repo",
+        "db_conn",
+        "cache",
+        "settings",
+        "pool",
+    }
+
+    analysis = store.analyze(handler, timings=timings)
+    assert 0 < analysis.parallel_time <= analysis.serial_time
+    assert analysis.recomputed == {"settings": 3}
+
+
+async def test_autouse_and_used_providers_are_dependencies():
+    store = Store()
+
+    with store.exit_freeze():
+
+        @store.provider(autouse=True)
+        def tracer():
+            pass
+
+        @store.provider
+        def db_conn():
+            pass
+
+    @store.consumer
+    @store.useprovider(db_conn, "unknown")
+    def handler():
+        pass
+
+    analysis = store.analyze(handler, timings={"db_conn": 2, "tracer": 1})
+    # The frozen `db_conn` evaluates the auto-used provider too.
+    assert analysis.critical_path == ["handler", "db_conn", "tracer"]
+    assert analysis.serial_time == 4
+    assert analysis.recomputed == {"tracer": 2}
+
+
+async def test_analyze_providers_which_are_not_frozen():
+    store = Store()
+
+    @store.provider
+    def settings():
+        pass
+
+    @store.provider
+    def db_conn(settings):
+        pass
+
+    @store.consumer
+    @store.useprovider("settings")
+    def handler(db_conn, user_id):
+        pass
+
+    analysis = store.analyze(handler, timings={"db_conn": 1, "settings": 1})
+    assert analysis.critical_path == ["handler", "db_conn", "settings"]
+    assert analysis.recomputed == {"settings": 2}
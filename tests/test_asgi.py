@@ -0,0 +1,297 @@
+from asyncio import Event, sleep, wait_for
+
+import pytest
+
+from aiodine import Store
+from aiodine.asgi import AiodineMiddleware
+
+pytestmark = pytest.mark.asyncio
+
+
+async def call(app, scope_type="http", receive=None):
+    scope = {"type": scope_type, "path": "/"}
+    sent = []
+
+    async def default_receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive or default_receive, send)
+    return sent
+
+
+def make_app(store: Store, handler):
+    async def app(scope, receive, send):
+        body = await handler()
+        await send({"type": "http.response.start", "status": 200})
+        await send({"type": "http.response.body", "body": body})
+
+    return app
+
+
+async def test_scope_and_receive_are_provided(store: Store):
+    received = {}
+
+    @store.consumer
+    async def handler(scope, receive):
+        received["path"] = scope["path"]
+        received["body"] = (await receive())["body"]
+        return b"ok"
+
+    middleware = AiodineMiddleware(make_app(store, handler), store)
+    sent = await call(middleware)
+    assert received == {"path": "/", "body": b""}
+    assert sent[-1]["body"] == b"ok"
+
+
+async def test_request_providers_are_evaluated_once_per_request(store: Store):
+    events = []
+
+    @store.provider(scope="request")
+    async def db():
+        events.append("setup")
+        return object()
+
+    @store.provider
+    async def users(db):
+        return db
+
+    @store.consumer
+    async def handler(db, users):
+        assert db is users
+        events.append("handle")
+        return b"ok"
+
+    store.freeze()
+    middleware = AiodineMiddleware(make_app(store, handler), store)
+    await call(middleware)
+    assert events == ["setup", "handle"]
+    await call(middleware)
+    assert events == ["setup", "handle"] * 2
+
+
+async def test_request_providers_are_cleaned_up_after_the_response(
+    store: Store,
+):
+    events = []
+
+    @store.provider(scope="request")
+    async def transaction():
+        yield
+        events.append("commit")
+
+    @store.consumer
+    async def handler(transaction):
+        return b"ok"
+
+    async def app(scope, receive, send):
+        await handler()
+        events.append("handled")
+        await send({"type": "http.response.start", "status": 200})
+        events.append("sent")
+
+    await call(AiodineMiddleware(app, store))
+    assert events == ["handled", "sent", "commit"]
+
+
+async def test_other_connection_types_pass_through(store: Store):
+    @store.provider(scope="request")
+    async def db():
+        return object()
+
+    seen = []
+
+    async def app(scope, receive, send):
+        @store.consumer
+        async def handler(db):
+            return db
+
+        seen.append(await handler())
+        seen.append(await handler())
+
+    await call(AiodineMiddleware(app, store), scope_type="lifespan")
+    # No request scope: evaluated like a function-scoped provider.
+    assert seen[0] is not seen[1]
+
+
+async def test_prefetch_overlaps_with_receiving_the_body():
+    store = Store()
+    started = Event()
+
+    @store.provider(scope="request")
+    async def user(scope):
+        started.set()
+        await sleep(0)
+        return scope["path"]
+
+    @store.consumer
+    async def handler(receive, user):
+        await receive()
+        return user.encode()
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.body", "body": await handler()})
+
+    async def receive():
+        # The body only arrives once prefetching has started.
+        await wait_for(started.wait(), timeout=1)
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    middleware = AiodineMiddleware(
+        app, store, prefetch=lambda scope: ["user", "receive"]
+    )
+    store.freeze()
+    sent = await call(middleware, receive=receive)
+    assert sent == [{"type": "http.response.body", "body": b"/"}]
+
+
+async def test_prefetch_sets_up_session_providers():
+    store = Store()
+    setups = []
+
+    @store.provider(scope="session")
+    async def pool():
+        setups.append("pool")
+        return "pool"
+
+    @store.consumer
+    async def handler(pool):
+        return pool.encode()
+
+    middleware = AiodineMiddleware(
+        make_app(store, handler), store, prefetch=lambda scope: ["pool"]
+    )
+    async with store.session():
+        sent = await call(middleware)
+        await call(middleware)
+    assert sent[-1]["body"] == b"pool"
+    assert setups == ["pool"]
+
+
+async def test_prefetched_session_providers_are_set_up_once():
+    store = Store()
+    events = []
+
+    @store.provider(scope="session")
+    async def db():
+        await sleep(0.01)
+        events.append("build")
+        yield "db"
+        events.append("teardown")
+
+    @store.consumer
+    async def handler(db):
+        return db.encode()
+
+    middleware = AiodineMiddleware(
+        make_app(store, handler), store, prefetch=lambda scope: ["db"]
+    )
+    # Without entering the session first.
+    assert (await call(middleware))[-1]["body"] == b"db"
+    assert (await call(middleware))[-1]["body"] == b"db"
+    await store.exit_session()
+    assert events == ["build", "teardown"]
+
+
+async def test_prefetched_sync_session_providers_are_set_up_once():
+    store = Store()
+    events = []
+
+    @store.provider(scope="session")
+    def db():
+        events.append("build")
+        yield "db"
+        events.append("teardown")
+
+    @store.consumer
+    def handler(db):
+        return db.encode()
+
+    async def app(scope, receive, send):
+        # Let the prefetch start the setup before the handler runs.
+        await sleep(0)
+        body = handler.call_sync()
+        await send({"type": "http.response.start", "status": 200})
+        await send({"type": "http.response.body", "body": body})
+
+    middleware = AiodineMiddleware(app, store, prefetch=lambda scope: ["db"])
+    assert (await call(middleware))[-1]["body"] == b"db"
+    assert (await call(middleware))[-1]["body"] == b"db"
+    await store.exit_session()
+    assert events == ["build", "teardown"]
+
+
+async def test_session_setup_outlives_the_request():
+    store = Store()
+    events = []
+
+    @store.provider(scope="session")
+    async def db():
+        await sleep(0.01)
+        events.append("build")
+        return "db"
+
+    @store.consumer
+    async def handler():
+        return b"ok"
+
+    middleware = AiodineMiddleware(
+        make_app(store, handler), store, prefetch=lambda scope: ["db"]
+    )
+    await call(middleware)
+    await sleep(0.02)
+    assert events == ["build"]
+
+    # Setups still in progress are cancelled when the session exits.
+    await store.exit_session()
+    await call(middleware)
+    await store.exit_session()
+    assert events == ["build"]
+
+
+async def test_unused_prefetched_failures_are_discarded():
+    store = Store()
+
+    @store.provider(scope="request")
+    async def broken():
+        raise ValueError
+
+    @store.consumer
+    async def handler():
+        return b"ok"
+
+    middleware = AiodineMiddleware(
+        make_app(store, handler), store, prefetch=lambda scope: ["broken"]
+    )
+    sent = await call(middleware)
+    assert sent[-1]["body"] == b"ok"
+
+
+async def test_request_scope_without_middleware(store: Store):
+    @store.provider(scope="request")
+    async def db():
+        return object()
+
+    @store.consumer
+    async def handler(db):
+        return db
+
+    async with store.request():
+        assert await handler() is await handler()
+    assert await handler() is not await handler()
+
+
+async def test_session_providers_must_not_depend_on_request_providers():
+    store = Store()
+
+    @store.provider(scope="request")
+    async def db():
+        pass
+
+    @store.provider(scope="session")
+    async def cache(db):
+        pass
+
+    assert store.check().stale == [("cache", "db")]
@@ -1,8 +1,7 @@
 import pytest
-from inspect import iscoroutine
+from inspect import isawaitable
 
-from aiodine import Store, scopes
-from aiodine.exceptions import ProviderDeclarationError
+from aiodine import Store
 
 pytestmark = pytest.mark.asyncio
 
@@ -31,15 +30,8 @@ async def test_lazy_async_provider(store: Store):
 
     @store.consumer
     async def play(pitch):
-        assert iscoroutine(pitch)
+        assert isawaitable(pitch)
         return 2 * await pitch
 
     assert await play() == "C#C#"
 
-
-async def test_lazy_provider_must_be_function_scoped(store: Store):
-    with pytest.raises(ProviderDeclarationError):
-
-        @store.provider(lazy=True, scope=scopes.SESSION)
-        async def pitch():
-            pass
@@ -0,0 +1,192 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from aiodine import Store
+from aiodine.__main__ import load, main
+
+
+def declare(store: Store):
+    with store.exit_freeze():
+
+        @store.provider(scope="session")
+        def pool(settings):
+            return "pool"
+
+        @store.provider
+        def settings():
+            return {}
+
+        @store.provider
+        def repo(db_conn, settings):
+            return "repo"
+
+        @store.provider
+        def db_conn(pool, settings):
+            return "conn"
+
+        @store.provider
+        @store.useprovider("gone")
+        def unused():
+            pass
+
+        @store.provider(autouse=True)
+        def tracer(settings):
+            pass
+
+    @store.consumer
+    @store.useprovider("missing")
+    def handler(repo):
+        pass
+
+    return handler
+
+
+def test_check():
+    store = Store()
+    handler = declare(store)
+
+    report = store.check()
+
+    assert report.cycles == []
+    assert report.stale == [("pool", "settings")]
+    assert report.missing == {
+        "unused": ["gone"],
+        handler.__qualname__: ["missing"],
+    }
+    assert report.unused == ["unused"]
+    assert report.rebuilt == {
+        handler.__qualname__: sum(store.analyze(handler).evaluated.values())
+    }
+    assert not report.ok
+
+
+def test_cycles_of_any_length():
+    store = Store()
+
+    @store.provider
+    def a(b):
+        pass
+
+    @store.provider
+    def b(c):
+        pass
+
+    @store.provider
+    def c(a):
+        pass
+
+    @store.provider
+    @store.useprovider("d")
+    def d():
+        pass
+
+    report = store.check()
+    assert report.cycles == [["a", "b", "c"], ["d"]]
+    assert not report.ok
+
+
+def test_valid_graph():
+    store = Store()
+
+    @store.provider
+    def a():
+        pass
+
+    @store.consumer
+    def consume(a):
+        pass
+
+    report = store.check()
+    assert report.ok
+    assert report.rebuilt == {"test_valid_graph.<locals>.consume": 1}
+
+
+@pytest.fixture(name="module")
+def fixture_module(tmp_path, monkeypatch):
+    (tmp_path / "checked_app.py").write_text(textwrap.dedent("""
+            import aiodine
+
+            store = aiodine.Store()
+
+            @store.provider
+            def a():
+                pass
+
+            @store.provider
+            def b(a):
+                pass
+
+            @store.consumer
+            def handler(a, b):
+                pass
+
+            not_a_store = object()
+            """))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.chdir(tmp_path)
+    return "checked_app"
+
+
+def test_load(module: str):
+    import aiodine  # pylint: disable=import-outside-toplevel
+
+    assert isinstance(load(f"{module}:store"), Store)
+    assert load(module) is aiodine._STORE  # pylint: disable=protected-access
+    with pytest.raises(TypeError):
+        load(f"{module}:not_a_store")
+
+
+def test_cli(module: str, capsys):
+    assert main(["check", f"{module}:store"]) == 0
+    assert capsys.readouterr().out == (
+        "Function-scoped providers evaluated per call:\n  handler: 3\n"
+    )
+
+    assert main(["check", f"{module}:store", "--max-rebuilt", "2"]) == 1
+    assert "handler: 3 (too many)" in capsys.readouterr().out
+
+    assert main(["check", f"{module}:store", "--json"]) == 0
+    output = json.loads(capsys.readouterr().out)
+    assert output["ok"]
+    assert output["rebuilt"] == {"handler": 3}
+
+
+def test_cli_reports_problems(capsys):
+    store = Store()
+    handler = declare(store)  # Consumers are registered weakly.
+    sys.modules["checked_broken_app"] = type(sys)("checked_broken_app")
+    sys.modules["checked_broken_app"].store = store
+    try:
+        assert main(["check", "checked_broken_app:store"]) == 1
+    finally:
+        del sys.modules["checked_broken_app"]
+
+    output = capsys.readouterr().out
+    assert "pool -> settings" in output
+    assert f"{handler.__qualname__}: missing" in output
+    assert "Unused providers:\n  unused" in output
+
+
+def test_empty_report(capsys):
+    sys.modules["checked_empty_app"] = type(sys)("checked_empty_app")
+    sys.modules["checked_empty_app"].store = Store()
+    try:
+        assert main(["check", "checked_empty_app:store"]) == 0
+    finally:
+        del sys.modules["checked_empty_app"]
+    assert capsys.readouterr().out == "No problems found.\n"
+
+
+def test_module_entry_point(module: str):
+    result = subprocess.run(
+        [sys.executable, "-m", "aiodine", "check", f"{module}:store"],
+        stdout=subprocess.PIPE,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    )
+    assert result.returncode == 0
+    assert b"handler: 3" in result.stdout
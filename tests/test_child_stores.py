@@ -0,0 +1,184 @@
+import pytest
+
+from aiodine import Store
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture(name="parent")
+def fixture_parent():
+    parent = Store()
+
+    @parent.provider
+    def db():
+        return "db"
+
+    @parent.provider
+    def cache():
+        return "cache"
+
+    return parent
+
+
+async def test_child_overrides_providers(parent: Store):
+    child = parent.child()
+
+    @child.provider(name="db")
+    def fake_db():
+        return "fake db"
+
+    @child.consumer
+    def consume(db, cache):
+        return db, cache
+
+    @parent.consumer
+    def consume_parent(db, cache):
+        return db, cache
+
+    assert await consume() == ("fake db", "cache")
+    assert await consume_parent() == ("db", "cache")
+    assert not parent.providers["db"] is child.providers["db"]
+
+
+async def test_creating_a_child_does_not_copy_providers(parent: Store):
+    child = parent.child()
+    assert child.parent is parent
+    assert child.providers.maps[0] == {}
+
+    @parent.provider
+    def logger():
+        pass
+
+    assert child.providers["logger"] is parent.providers["logger"]
+    assert child.has_provider("db")
+    assert not child.empty()
+
+
+async def test_plans_are_invalidated_by_parent_changes(parent: Store):
+    child = parent.child()
+
+    @child.consumer
+    def consume(db, logger=None):
+        return db, logger
+
+    assert await consume() == ("db", None)
+
+    @parent.provider
+    def logger():
+        return "logger"
+
+    assert await consume() == ("db", "logger")
+
+
+async def test_session_instances_are_shared(parent: Store):
+    setups = 0
+    teardown = False
+
+    @parent.provider(scope="session")
+    async def resource():
+        nonlocal setups, teardown
+        setups += 1
+        yield "resource"
+        teardown = True
+
+    child = parent.child()
+
+    @child.consumer
+    def consume(resource):
+        return resource
+
+    async with parent.session():
+        async with child.session():
+            assert await consume() == "resource"
+        # The parent remains in charge of its session instances.
+        assert not teardown
+        assert await consume() == "resource"
+
+    assert setups == 1
+    assert teardown
+
+
+async def test_child_session_providers(parent: Store):
+    teardown = False
+
+    child = parent.child()
+
+    @child.provider(scope="session", autouse=True)
+    async def resource():
+        nonlocal teardown
+        yield "resource"
+        teardown = True
+
+    assert "resource" not in parent.session_providers
+    assert "resource" not in parent.autouse_providers
+
+    async with child.session():
+        pass
+    assert teardown
+
+
+async def test_freezing_a_child_leaves_the_parent_alone(parent: Store):
+    child = parent.child()
+
+    @child.provider
+    def repo(db):
+        return f"repo({db})"
+
+    child.freeze()
+
+    @child.consumer
+    def consume(repo):
+        return repo
+
+    assert await consume() == "repo(db)"
+    assert not isinstance(parent.providers["db"].func, type(consume))
+
+
+async def test_frozen_parent_providers_see_child_overrides(parent: Store):
+    @parent.provider
+    def repo(db):
+        return f"repo({db})"
+
+    @parent.provider(scope="session")
+    def config(db):
+        return f"config({db})"
+
+    parent.freeze()
+    child = parent.child()
+
+    @child.provider(name="db")
+    def fake_db():
+        return "fake"
+
+    @child.consumer
+    def consume(repo, db, config):
+        return repo, db, config
+
+    @parent.consumer
+    def consume_parent(repo):
+        return repo
+
+    # Session instances remain those of the parent.
+    assert await consume() == ("repo(fake)", "fake", "config(db)")
+    assert await consume_parent() == "repo(db)"
+    assert child.providers["repo"] is child.providers["repo"]
+
+    grandchild = child.child()
+
+    @grandchild.provider(name="db")
+    def other_db():
+        return "other"
+
+    @grandchild.consumer
+    def consume_grandchild(repo):
+        return repo
+
+    assert await consume_grandchild() == "repo(other)"
+
+    # Changes to the parent are still visible.
+    @parent.provider
+    def repo(db):  # pylint: disable=function-redefined
+        return f"new repo({db})"
+
+    parent.freeze()
+    assert await consume() == ("new repo(fake)", "fake", "config(db)")
@@ -0,0 +1,176 @@
+from asyncio import sleep
+
+import pytest
+
+from aiodine import Store
+from aiodine.cleanup import ConcurrentExitStack
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_independent_providers_are_cleaned_up_concurrently(store: Store):
+    events = []
+
+    def make_provider(name):
+        async def provider():
+            yield name
+            events.append(f"start {name}")
+            await sleep(0.01)
+            events.append(f"end {name}")
+
+        return store.provider(provider, name=name)
+
+    make_provider("foo")
+    make_provider("bar")
+
+    @store.consumer(concurrent_cleanup=True)
+    async def consume(foo, bar):
+        return foo + bar
+
+    assert await consume() == "foobar"
+    assert events[:2] == ["start bar", "start foo"]
+    assert sorted(events[2:]) == ["end bar", "end foo"]
+
+
+async def test_sync_generators_are_cleaned_up_as_usual(store: Store):
+    events = []
+
+    @store.provider
+    def foo():
+        yield
+        events.append("foo")
+
+    @store.provider
+    async def bar():
+        yield
+        events.append("bar")
+
+    @store.consumer(concurrent_cleanup=True)
+    async def consume(foo, bar):
+        pass
+
+    await consume()
+    assert events == ["bar", "foo"]
+
+
+async def test_dependants_are_cleaned_up_first():
+    store = Store()
+
+    @store.provider
+    async def db():
+        pass
+
+    @store.provider
+    async def repo(db):
+        pass
+
+    @store.provider
+    async def cache():
+        pass
+
+    store.freeze()
+
+    @store.consumer(concurrent_cleanup=True)
+    async def consume(repo, cache, db):
+        pass
+
+    levels = {
+        name: prov.level
+        for name, prov, _, _ in consume._level(consume.get_plan()).injected
+    }
+    assert levels == {"repo": 1, "cache": 0, "db": 0}
+
+
+async def test_levels_are_unwound_from_highest_to_lowest():
+    events = []
+
+    async def cleanup(name):
+        events.append(f"start {name}")
+        await sleep(0.01)
+        events.append(f"end {name}")
+
+    async with ConcurrentExitStack() as stack:
+        stack.push_async_callback(cleanup, "db")
+        stack.level = 1
+        stack.push_async_callback(cleanup, "repo")
+        stack.level = 0
+        stack.push_async_callback(cleanup, "cache")
+
+    assert events[:2] == ["start repo", "end repo"]
+    assert sorted(events[2:]) == [
+        "end cache",
+        "end db",
+        "start cache",
+        "start db",
+    ]
+
+
+async def test_exceptions_are_chained(store: Store):
+    teardown = False
+
+    @store.provider
+    async def foo():
+        yield
+        raise KeyError
+
+    @store.provider
+    async def bar():
+        yield
+        raise ValueError
+
+    @store.provider
+    async def baz():
+        nonlocal teardown
+        yield
+        teardown = True
+
+    @store.consumer(concurrent_cleanup=True)
+    async def consume(foo, bar, baz):
+        raise RuntimeError
+
+    with pytest.raises(KeyError) as ctx:
+        await consume()
+
+    assert teardown
+    assert isinstance(ctx.value.__context__, ValueError)
+    assert isinstance(ctx.value.__context__.__context__, RuntimeError)
+
+
+async def test_combine_with_deferred_cleanup(store: Store):
+    teardown = False
+
+    @store.provider
+    async def foo():
+        nonlocal teardown
+        yield "foo"
+        await sleep(0.01)
+        teardown = True
+
+    @store.consumer(deferred_cleanup=True, concurrent_cleanup=True)
+    async def consume(foo):
+        return foo
+
+    assert await consume() == "foo"
+    assert not teardown
+    await store.exit_session()
+    assert teardown
+
+
+async def test_lazy_and_profiled_providers(store: Store):
+    @store.provider(lazy=True)
+    async def foo():
+        return "foo"
+
+    @store.provider
+    async def bar():
+        yield "bar"
+
+    @store.consumer(concurrent_cleanup=True)
+    async def consume(foo, bar):
+        return await foo + bar
+
+    with store.profile() as profiler:
+        assert await consume() == "foobar"
+        assert await consume() == "foobar"
+
+    assert profiler.stats()["consume;bar"].count == 2
@@ -0,0 +1,184 @@
+from contextlib import contextmanager
+
+import pytest
+
+from aiodine import Store
+from aiodine.exceptions import ProviderDeclarationError
+
+pytestmark = pytest.mark.asyncio
+
+
+class Resource:
+    def __init__(self, events: list, name: str = "resource"):
+        self.events = events
+        self.name = name
+
+    async def __aenter__(self):
+        self.events.append("enter")
+        return self.name
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.events.append(("exit", exc_type))
+        return exc_type is KeyError
+
+
+async def test_value_is_provided_and_exited_after_the_call(store: Store):
+    events = []
+
+    @store.provider(context_manager=True)
+    def resource():
+        return Resource(events)
+
+    @store.consumer
+    async def use(resource):
+        events.append(resource)
+        return resource
+
+    assert await use() == "resource"
+    assert events == ["enter", "resource", ("exit", None)]
+
+
+async def test_exceptions_are_propagated_to_exit(store: Store):
+    events = []
+
+    @store.provider(context_manager=True)
+    def resource():
+        return Resource(events)
+
+    @store.consumer
+    async def use(resource, exc_type):
+        raise exc_type
+
+    with pytest.raises(ValueError):
+        await use(ValueError)
+    assert events == ["enter", ("exit", ValueError)]
+
+    # The context manager may suppress the exception.
+    assert await use(KeyError) is None
+
+
+async def test_async_functions_and_lambdas(store: Store):
+    events = []
+
+    @store.provider(context_manager=True)
+    async def resource():
+        return Resource(events, name="async")
+
+    store.provider(name="other", context_manager=True)(
+        lambda: Resource(events, name="lambda")
+    )
+
+    @store.consumer
+    async def use(resource, other):
+        return resource, other
+
+    assert await use() == ("async", "lambda")
+    assert events.count("enter") == 2
+
+
+async def test_sync_context_managers(store: Store):
+    events = []
+
+    @store.provider(context_manager=True)
+    @contextmanager
+    def transaction():
+        events.append("begin")
+        try:
+            yield "tx"
+        except ValueError:
+            events.append("rollback")
+            raise
+        events.append("commit")
+
+    @store.consumer
+    async def use(transaction, fail=False):
+        if fail:
+            raise ValueError
+        return transaction
+
+    assert await use() == "tx"
+    with pytest.raises(ValueError):
+        await use(fail=True)
+    assert events == ["begin", "commit", "begin", "rollback"]
+
+
+async def test_frozen_providers(store: Store):
+    events = []
+
+    @store.provider
+    async def name():
+        return "frozen"
+
+    @store.provider(context_manager=True)
+    def resource(name):
+        return Resource(events, name=name)
+
+    store.freeze()
+
+    @store.consumer
+    async def use(resource):
+        return resource
+
+    assert await use() == "frozen"
+    assert events == ["enter", ("exit", None)]
+
+
+async def test_lazy_providers(store: Store):
+    events = []
+
+    @store.provider(context_manager=True, lazy=True)
+    def resource():
+        return Resource(events)
+
+    @store.consumer
+    async def use(resource):
+        return await resource
+
+    assert await use() == "resource"
+    assert events == ["enter", ("exit", None)]
+
+
+async def test_session_providers(store: Store):
+    events = []
+
+    @store.provider(scope="session", context_manager=True)
+    def resource():
+        return Resource(events)
+
+    @store.consumer
+    async def use(resource):
+        return resource
+
+    async with store.session():
+        assert await use() == "resource"
+        assert await use() == "resource"
+        assert events == ["enter"]
+    assert events == ["enter", ("exit", None)]
+
+
+async def test_request_providers(store: Store):
+    events = []
+
+    @store.provider(scope="request", context_manager=True)
+    def resource():
+        return Resource(events)
+
+    @store.consumer
+    async def use(resource):
+        return resource
+
+    async with store.request():
+        await use()
+        await use()
+        assert events == ["enter"]
+    assert events == ["enter", ("exit", None)]
+
+
+async def test_invalid_declarations(store: Store):
+    with pytest.raises(ProviderDeclarationError):
+        store.provider(context_manager=True, max_concurrency=1)(Resource)
+
+    with pytest.raises(ProviderDeclarationError):
+        store.provider(scope="session", context_manager=True, persistent=True)(
+            Resource
+        )
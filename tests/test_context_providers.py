@@ -65,3 +65,61 @@ async def test_multi_client(store: Store):
             await sleep(0.01)
 
     await gather(client1(), client2())
+
+
+async def test_variables_are_read_inline(store: Store):
+    provider = store.create_context_provider("name", "title")
+
+    @store.consumer
+    def get_them(name, title):
+        return name, title
+
+    assert get_them.sync
+    with provider.assign(name="alice", title="Slim Fox"):
+        assert get_them.call_sync() == ("alice", "Slim Fox")
+        assert await get_them() == ("alice", "Slim Fox")
+
+
+async def test_frozen_context_provider(store: Store):
+    provider = store.create_context_provider("name")
+
+    @store.provider
+    def greeting(name):
+        return f"Hello, {name}!"
+
+    store.freeze()
+
+    @store.consumer
+    async def greet(greeting):
+        return greeting
+
+    with provider.assign(name="alice"):
+        assert await greet() == "Hello, alice!"
+
+
+async def test_run_in_context(store: Store):
+    provider = store.create_context_provider("name", "title")
+
+    @store.consumer
+    async def get_them(name, title):
+        await sleep(0.01)
+        return name, title
+
+    first = provider.run_in_context({"name": "alice"}, get_them())
+    second = provider.run_in_context(
+        {"name": "bob", "title": "Slim Fox"}, get_them()
+    )
+
+    assert await gather(first, second) == [
+        ("alice", None),
+        ("bob", "Slim Fox"),
+    ]
+    assert await get_them() == (None, None)
+
+
+async def test_provider_function_returns_value():
+    store = Store()
+    provider = store.create_context_provider("name")
+
+    with provider.assign(name="alice"):
+        assert store.providers["name"].func() == "alice"
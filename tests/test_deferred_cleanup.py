@@ -0,0 +1,146 @@
+from asyncio import Event, get_event_loop, sleep
+
+import pytest
+
+from aiodine import Store
+from aiodine.cleanup import CleanupQueue
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_cleanup_runs_after_value_is_returned(store: Store):
+    events = []
+
+    @store.provider
+    async def resource():
+        yield "resource"
+        await sleep(0.01)
+        events.append("teardown")
+
+    @store.consumer(deferred_cleanup=True)
+    async def consume(resource):
+        return resource
+
+    assert await consume() == "resource"
+    assert events == []
+
+    await store.exit_session()
+    assert events == ["teardown"]
+
+
+async def test_cleanup_is_inline_if_consumer_fails(store: Store):
+    teardown = False
+
+    @store.provider
+    def resource():
+        nonlocal teardown
+        yield
+        teardown = True
+
+    @store.consumer(deferred_cleanup=True)
+    async def consume(resource):
+        raise ValueError
+
+    with pytest.raises(ValueError):
+        await consume()
+    assert teardown
+
+
+async def test_drain_before_tearing_down_session_providers(store: Store):
+    events = []
+
+    @store.provider(scope="session")
+    async def pool():
+        yield "pool"
+        events.append("pool")
+
+    @store.provider
+    async def conn():
+        yield "conn"
+        await sleep(0.01)
+        events.append("conn")
+
+    @store.consumer(deferred_cleanup=True)
+    async def consume(pool):
+        pass
+
+    @store.consumer(deferred_cleanup=True)
+    @store.useprovider("conn")
+    async def consume_conn():
+        pass
+
+    async with store.session():
+        await consume()
+        await consume_conn()
+
+    assert events == ["conn", "pool"]
+
+
+async def test_cleanup_errors_are_reported():
+    errors = []
+    store = Store()
+    store.cleanup_queue = CleanupQueue(on_error=errors.append)
+
+    @store.provider
+    async def resource():
+        yield
+        raise ValueError("oops")
+
+    @store.consumer(deferred_cleanup=True)
+    async def consume(resource):
+        pass
+
+    await consume()
+    await store.cleanup_queue.drain()
+    assert [str(exc) for exc in errors] == ["oops"]
+
+
+async def test_cleanup_errors_default_to_loop_exception_handler():
+    store = Store()
+    reported = Event()
+
+    @store.provider
+    def resource():
+        yield
+        raise ValueError
+
+    @store.consumer(deferred_cleanup=True)
+    async def consume(resource):
+        pass
+
+    loop = get_event_loop()
+    loop.set_exception_handler(lambda _, context: reported.set())
+    try:
+        await consume()
+        await store.cleanup_queue.drain()
+        assert reported.is_set()
+    finally:
+        loop.set_exception_handler(None)
+
+
+async def test_bounded_concurrency():
+    store = Store()
+    store.cleanup_queue = CleanupQueue(max_concurrency=2)
+    running = 0
+    max_running = 0
+
+    @store.provider
+    async def resource():
+        nonlocal running, max_running
+        yield
+        running += 1
+        max_running = max(max_running, running)
+        await sleep(0.01)
+        running -= 1
+
+    @store.consumer(deferred_cleanup=True)
+    async def consume(resource):
+        pass
+
+    for _ in range(5):
+        await consume()
+    assert len(store.cleanup_queue) == 5
+
+    await store.cleanup_queue.drain()
+    assert max_running == 2
+    assert len(store.cleanup_queue) == 0
@@ -0,0 +1,183 @@
+import asyncio
+import os
+from uuid import uuid4
+from weakref import WeakSet
+
+import pytest
+
+from aiodine import Store, forks
+from aiodine.exceptions import ForkedSessionError, UnknownForkPolicy
+
+
+def declare(store: Store, fork: str):
+    cleaned_up = []
+
+    @store.provider(scope="session", fork=fork)
+    async def resource():
+        value = object()
+        yield value
+        cleaned_up.append(value)
+
+    @store.consumer
+    async def consume(resource):
+        return resource
+
+    return cleaned_up, consume
+
+
+@pytest.mark.asyncio
+async def test_share_reuses_instance_in_child(store: Store):
+    cleaned_up, consume = declare(store, forks.SHARE)
+    before = await consume()
+
+    store.after_fork_in_child()
+
+    assert await consume() is before
+    await store.exit_session()
+    # The parent remains in charge of cleanup.
+    assert cleaned_up == []
+
+
+@pytest.mark.asyncio
+async def test_reinit_rebuilds_instance_in_child(store: Store):
+    cleaned_up, consume = declare(store, forks.REINIT)
+    before = await consume()
+
+    store.after_fork_in_child()
+
+    after = await consume()
+    assert after is not before
+    await store.exit_session()
+    assert cleaned_up == [after]
+
+
+@pytest.mark.asyncio
+async def test_forbid_raises_in_child(store: Store):
+    _, consume = declare(store, forks.FORBID)
+    await consume()
+
+    store.after_fork_in_child()
+
+    with pytest.raises(ForkedSessionError):
+        await consume()
+
+    # A fresh session can be entered in the child.
+    await store.exit_session()
+    await consume()
+
+
+@pytest.mark.asyncio
+async def test_forbid_raises_in_child_for_sync_provider(store: Store):
+    @store.provider(scope="session", fork=forks.FORBID)
+    def resource():
+        return object()
+
+    @store.consumer
+    def consume(resource):
+        return resource
+
+    await consume()
+    store.after_fork_in_child()
+
+    with pytest.raises(ForkedSessionError):
+        await consume()
+
+
+@pytest.mark.asyncio
+async def test_policy_does_not_apply_if_not_set_up(store: Store):
+    _, consume = declare(store, forks.FORBID)
+    store.after_fork_in_child()
+    await consume()
+
+
+@pytest.mark.asyncio
+async def test_fork_hook_applies_to_tracked_stores(monkeypatch):
+    store = Store()
+    _, consume = declare(store, forks.FORBID)
+    await consume()
+    # Only track the store under test.
+    monkeypatch.setattr(forks, "_STORES", WeakSet([store]))
+
+    forks.after_fork_in_child()
+
+    with pytest.raises(ForkedSessionError):
+        await consume()
+
+
+def test_unknown_fork_policy(store: Store):
+    with pytest.raises(UnknownForkPolicy):
+
+        @store.provider(scope="session", fork="blabla")
+        def resource():
+            pass
+
+
+@pytest.mark.skipif(
+    not hasattr(os, "register_at_fork"), reason="requires os.register_at_fork"
+)
+def test_reinit_on_actual_fork():
+    store = Store()
+
+    @store.provider(scope="session", fork=forks.REINIT)
+    def pid():
+        return os.getpid()
+
+    @store.consumer
+    def get_pid(pid):
+        return pid
+
+    assert asyncio.run(get_pid()) == os.getpid()
+
+    read, write = os.pipe()
+    child = os.fork()
+    if child == 0:  # pragma: no cover
+        ok = asyncio.run(get_pid()) == os.getpid()
+        os.write(write, b"1" if ok else b"0")
+        os._exit(0)
+
+    os.close(write)
+    os.waitpid(child, 0)
+    assert os.read(read, 1) == b"1"
+    os.close(read)
+
+
+@pytest.mark.skipif(
+    not hasattr(os, "register_at_fork"), reason="requires os.register_at_fork"
+)
+def test_forked_workers_take_their_own_shared_segment_reference():
+    from aiodine.shared import _open
+
+    segment_name = f"aiodine-test-{uuid4().hex[:8]}"
+    store = Store()
+    calls = []
+
+    @store.provider(scope="session", shared=segment_name)
+    def table():
+        calls.append(1)
+        return b"lookup table"
+
+    @store.consumer
+    def read(table):
+        return bytes(table)
+
+    # Preload in the master process.
+    asyncio.run(store.enter_session())
+
+    for _ in range(2):
+        read_fd, write_fd = os.pipe()
+        child = os.fork()
+        if child == 0:  # pragma: no cover
+            ok = asyncio.run(read()) == b"lookup table"
+            asyncio.run(store.exit_session())
+            os.write(write_fd, b"1" if ok else b"0")
+            os._exit(0)
+        os.close(write_fd)
+        os.waitpid(child, 0)
+        assert os.read(read_fd, 1) == b"1"
+        os.close(read_fd)
+
+    # Workers exiting their session did not destroy the segment.
+    assert asyncio.run(read()) == b"lookup table"
+    assert calls == [1]
+    asyncio.run(store.exit_session())
+    assert _open(segment_name) is None
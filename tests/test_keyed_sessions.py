@@ -0,0 +1,209 @@
+from asyncio import ensure_future, sleep
+
+import pytest
+
+from aiodine import Store, forks
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture(name="events")
+def fixture_events():
+    return []
+
+
+@pytest.fixture(name="store")
+def fixture_store(events: list):
+    store = Store(max_sessions=2)
+
+    @store.provider(scope="session")
+    async def pool():
+        pool = object()
+        events.append(("setup", pool))
+        yield pool
+        events.append(("teardown", pool))
+
+    return store
+
+
+async def test_each_key_has_its_own_instances(store: Store, events: list):
+    @store.consumer
+    async def get_pool(pool):
+        return pool
+
+    async with store.session(key="a"):
+        pool_a = await get_pool()
+    async with store.session(key="b"):
+        pool_b = await get_pool()
+    async with store.session(key="a"):
+        assert await get_pool() is pool_a
+
+    assert pool_a is not pool_b
+    assert events == [("setup", pool_a), ("setup", pool_b)]
+    assert list(store.sessions) == ["b", "a"]
+
+    # The default session is unaffected.
+    async with store.session():
+        assert await get_pool() not in (pool_a, pool_b)
+
+
+async def test_least_recently_used_idle_session_is_evicted(
+    store: Store, events: list
+):
+    @store.consumer
+    async def get_pool(pool):
+        return pool
+
+    pools = {}
+    for key in "abac":
+        async with store.session(key=key):
+            pools[key] = await get_pool()
+
+    assert list(store.sessions) == ["a", "c"]
+    assert "b" not in store.sessions
+    assert ("teardown", pools["b"]) in events
+
+    await store.sessions.close_all()
+    assert len(store.sessions) == 0
+    assert events[-2:] == [("teardown", pools["a"]), ("teardown", pools["c"])]
+
+
+async def test_active_sessions_are_not_evicted(store: Store, events: list):
+    async with store.session(key="a"):
+        async with store.session(key="b"):
+            async with store.session(key="c"):
+                assert len(store.sessions) == 3
+    assert not any(event == "teardown" for event, _ in events)
+
+    async with store.session(key="d"):
+        pass
+    assert list(store.sessions) == ["c", "d"]
+
+
+async def test_nested_keyed_sessions(store: Store):
+    @store.consumer
+    async def get_pool(pool):
+        return pool
+
+    async with store.session(key="a"):
+        pool_a = await get_pool()
+        async with store.session(key="b"):
+            assert await get_pool() is not pool_a
+        assert await get_pool() is pool_a
+
+
+async def test_sync_and_lazy_session_providers():
+    store = Store()
+
+    @store.provider(scope="session")
+    def config():
+        return {}
+
+    @store.provider(scope="session", lazy=True)
+    async def client():
+        await sleep(0)
+        return object()
+
+    @store.consumer
+    def get_config(config):
+        return config
+
+    @store.consumer
+    async def get_client(client):
+        return await client
+
+    async with store.session(key="a"):
+        config_a = get_config.call_sync()
+        client_a = await get_client()
+    async with store.session(key="b"):
+        assert get_config.call_sync() is not config_a
+        assert await get_client() is not client_a
+    async with store.session(key="a"):
+        assert get_config.call_sync() is config_a
+        assert await get_client() is client_a
+
+
+async def test_failing_setup_releases_the_session():
+    store = Store(max_sessions=1)
+
+    fail = True
+
+    @store.provider(scope="session")
+    async def broken():
+        if fail:
+            raise ValueError
+
+    with pytest.raises(ValueError):
+        async with store.session(key="a"):
+            pass
+
+    assert "a" in store.sessions
+    fail = False
+    async with store.session(key="b"):
+        pass
+    # The failed session was idle, so it has been evicted.
+    assert list(store.sessions) == ["b"]
+
+
+async def test_close_a_session(store: Store, events: list):
+    async with store.session(key="a"):
+        pass
+    await store.sessions.close("a")
+    await store.sessions.close("unknown")
+    assert [event for event, _ in events] == ["setup", "teardown"]
+
+
+async def test_fork_policies_apply_to_keyed_sessions():
+    store = Store()
+
+    @store.provider(scope="session", fork=forks.REINIT)
+    async def pool():
+        return object()
+
+    @store.consumer
+    async def get_pool(pool):
+        return pool
+
+    async with store.session(key="a"):
+        pool = await get_pool()
+        store.after_fork_in_child()
+        assert await get_pool() is not pool
+
+
+async def test_child_stores_share_the_max_sessions(store: Store):
+    assert store.child().sessions.max_sessions == 2
+
+
+async def test_sessions_reacquired_during_eviction_are_kept(events: list):
+    store = Store(max_sessions=2)
+
+    @store.provider(scope="session")
+    async def pool():
+        yield object()
+        await sleep(0)  # Let other tasks run during teardown.
+        events.append("teardown")
+
+    for key in "ab":
+        async with store.session(key=key):
+            pass
+    store.sessions.max_sessions = 1
+
+    async def reenter_b():
+        async with store.session(key="b"):
+            await sleep(0.01)
+
+    # Evicts "a", while "b" is re-acquired.
+    task = ensure_future(reenter_b())
+    async with store.session(key="c"):
+        await task
+
+    assert "b" in store.sessions
+    assert events == ["teardown"]
+    await store.sessions.close_all()
+
+
+async def test_release_after_close(store: Store):
+    await store.sessions.acquire("a")
+    await store.sessions.close("a")
+    store.sessions.release("a")
+    assert "a" not in store.sessions
@@ -0,0 +1,234 @@
+from asyncio import CancelledError, Event, gather, sleep, wait_for
+
+import pytest
+
+from aiodine import Store
+from aiodine.exceptions import ProviderDeclarationError
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_lazy_value_can_be_awaited_many_times(store: Store):
+    calls = 0
+
+    @store.provider(lazy=True)
+    async def answer():
+        nonlocal calls
+        calls += 1
+        await sleep(0.01)
+        return 42
+
+    async def helper(value):
+        return await value
+
+    @store.consumer
+    async def consume(answer):
+        first = await gather(helper(answer), helper(answer))
+        return first, await answer
+
+    assert await consume() == ([42, 42], 42)
+    assert calls == 1
+
+
+async def test_lazy_value_never_awaited_is_not_evaluated(store: Store):
+    called = False
+
+    @store.provider(lazy=True)
+    async def answer():
+        nonlocal called
+        called = True
+
+    @store.consumer
+    async def consume(answer):
+        pass
+
+    await consume()
+    assert not called
+
+
+async def test_failed_prefetch_never_awaited_is_discarded(store: Store):
+    @store.provider(lazy=True, prefetch=True)
+    async def answer():
+        raise ValueError
+
+    @store.consumer
+    async def consume(answer):
+        await sleep(0.01)
+
+    await consume()
+
+
+async def test_prefetch_starts_evaluation_at_injection(store: Store):
+    started = Event()
+
+    @store.provider(lazy=True, prefetch=True)
+    async def answer():
+        started.set()
+        return 42
+
+    @store.consumer
+    async def consume(answer):
+        await wait_for(started.wait(), timeout=1)
+        value = await answer
+        assert answer.done()
+        return value
+
+    assert await consume() == 42
+
+
+async def test_pending_prefetch_is_cancelled_on_exit(store: Store):
+    cancelled = False
+
+    @store.provider(lazy=True, prefetch=True)
+    async def answer():
+        nonlocal cancelled
+        try:
+            await sleep(10)
+        except CancelledError:
+            cancelled = True
+            raise
+
+    @store.consumer
+    async def consume(answer):
+        await sleep(0)
+
+    await consume()
+    await sleep(0)
+    assert cancelled
+
+
+async def test_cancelling_an_awaiter_does_not_cancel_others(store: Store):
+    @store.provider(lazy=True)
+    async def answer():
+        await sleep(0.01)
+        return 42
+
+    @store.consumer
+    async def consume(answer):
+        with pytest.raises(Exception):
+            await wait_for(answer, timeout=0.001)
+        return await answer
+
+    assert await consume() == 42
+
+
+async def test_only_lazy_providers_can_be_prefetched(store: Store):
+    with pytest.raises(ProviderDeclarationError):
+
+        @store.provider(prefetch=True)
+        async def answer():
+            pass
+
+
+async def test_lazy_session_provider_is_shared(store: Store):
+    calls = 0
+
+    @store.provider(scope="session", lazy=True)
+    async def pool():
+        nonlocal calls
+        calls += 1
+        return object()
+
+    @store.consumer
+    async def consume(pool):
+        return pool
+
+    async with store.session():
+        first, second = await consume(), await consume()
+        assert first is second
+        assert calls == 0
+        assert await first is await second
+
+    assert calls == 1
+
+
+async def test_failed_lazy_session_provider_is_built_again(store: Store):
+    calls = 0
+
+    @store.provider(scope="session", lazy=True)
+    async def pool():
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise ConnectionError
+        return "pool"
+
+    @store.consumer
+    async def consume(pool):
+        return await pool
+
+    async with store.session():
+        with pytest.raises(ConnectionError):
+            await consume()
+        assert await consume() == "pool"
+        assert await consume() == "pool"
+
+    assert calls == 2
+
+
+async def test_lazy_session_provider_does_not_block_enter(store: Store):
+    built = False
+
+    @store.provider(scope="session", lazy=True)
+    async def pool():
+        nonlocal built
+        built = True
+
+    async with store.session():
+        assert not built
+
+
+async def test_prefetch_lazy_session_provider_on_enter(store: Store):
+    teardown = False
+
+    @store.provider(scope="session", lazy=True, prefetch=True)
+    async def pool():
+        nonlocal teardown
+        await sleep(0.01)
+        yield "pool"
+        teardown = True
+
+    @store.consumer
+    async def consume(pool):
+        return await pool
+
+    await store.enter_session()
+    await sleep(0.02)
+    assert await consume() == "pool"
+    await store.exit_session()
+    assert teardown
+
+
+async def test_pending_session_prefetch_is_cancelled_on_exit(store: Store):
+    cancelled = False
+
+    @store.provider(scope="session", lazy=True, prefetch=True)
+    async def pool():
+        nonlocal cancelled
+        try:
+            await sleep(10)
+        except CancelledError:
+            cancelled = True
+            raise
+
+    await store.enter_session()
+    await sleep(0)  # Start the prefetch, which starts the setup.
+    await sleep(0)
+    await store.exit_session()
+    assert cancelled
+
+
+async def test_lazy_used_provider(store: Store):
+    called = False
+
+    @store.provider(lazy=True, autouse=True)
+    async def answer():
+        nonlocal called
+        called = True
+
+    @store.consumer
+    async def consume():
+        pass
+
+    await consume()
+    assert not called
@@ -0,0 +1,204 @@
+import asyncio
+import gc
+import warnings
+import weakref
+from contextlib import contextmanager
+
+import pytest
+
+from aiodine import Store
+from aiodine.leaks import LeakWarning, _check_all
+
+
+@contextmanager
+def recorded_warnings():
+    with warnings.catch_warnings(record=True) as record:
+        warnings.simplefilter("always")
+        yield record
+
+
+def make_store() -> Store:
+    store = Store(track_leaks=True)
+
+    @store.provider(scope="session")
+    async def db():
+        yield "db"
+
+    @store.consumer
+    async def use(db):
+        pass
+
+    return store, use
+
+
+@pytest.mark.asyncio
+async def test_finalized_instances_are_not_leaks():
+    store, use = make_store()
+
+    async with store.session():
+        await use()
+        assert store.leaks.live() == {"db": 1}
+
+    assert store.leaks.live() == {}
+    assert store.leaks.leaks() == []
+
+
+@pytest.mark.asyncio
+async def test_instances_set_up_outside_of_a_session_are_leaks():
+    store, use = make_store()
+
+    await use()  # Oops: outside of a session.
+
+    [leak] = store.leaks.leaks()
+    assert leak.provider == "db"
+    assert "await use()" in leak.site[-1]
+    assert not any("aiodine/" in frame for frame in leak.site)
+
+    with recorded_warnings() as record:
+        store.leaks.check()
+        # Each leak is only reported once.
+        store.leaks.check()
+    [warning] = record
+    assert warning.category is LeakWarning
+    assert "db was set up but never finalized" in str(warning.message)
+
+    await store.exit_session()
+    assert store.leaks.live() == {}
+
+
+def test_leaks_can_be_checked_per_event_loop():
+    store, use = make_store()
+    other, use_other = make_store()
+
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(use())
+    other_loop = asyncio.new_event_loop()
+    other_loop.run_until_complete(use_other())
+    close = loop.close
+
+    # E.g. on shutdown, before closing the loop.
+    with recorded_warnings() as record:
+        store.leaks.check(loop)
+    assert [w.category for w in record] == [LeakWarning]
+    # Event loops are left alone.
+    assert loop.close == close
+
+    # Only leaks of the given loop are reported.
+    assert other.leaks.leaks(loop) == []
+    with recorded_warnings() as record:
+        other.leaks.check(other_loop)
+    assert len(record) == 1
+
+    loop.close()
+    other_loop.close()
+
+
+def test_detectors_are_checked_at_exit():
+    store, use = make_store()
+    asyncio.run(use())
+
+    with recorded_warnings() as record:
+        _check_all()
+    assert any("db was set up" in str(w.message) for w in record)
+
+    # Detectors are not kept alive by the exit hook.
+    detector = weakref.ref(store.leaks)
+    del store, use
+    gc.collect()
+    assert detector() is None
+
+
+@pytest.mark.asyncio
+async def test_live_instances_are_counted_per_provider():
+    store, use = make_store()
+
+    @store.provider(scope="session")
+    def config():
+        yield {}
+
+    @store.provider(scope="session", context_manager=True)
+    @contextmanager
+    def client():
+        yield "client"
+
+    @store.provider(scope="session")
+    async def settings():
+        return {}  # Nothing to finalize: not tracked.
+
+    @store.consumer
+    async def use_all(db, config, client, settings):
+        pass
+
+    for key in ("a", "b"):
+        async with store.session(key=key):
+            await use_all()
+    assert store.leaks.live() == {"db": 2, "config": 2, "client": 2}
+
+    await store.sessions.close_all()
+    assert store.leaks.live() == {}
+
+
+@pytest.mark.asyncio
+async def test_garbage_collected_instances_are_forgotten():
+    store, _ = make_store()
+
+    def generator():
+        yield
+
+    gen = generator()
+    store.leaks.track(store.providers["db"], gen)
+    assert store.leaks.live() == {"db": 1}
+    del gen
+    gc.collect()
+    assert store.leaks.live() == {}
+
+
+@pytest.mark.asyncio
+async def test_child_stores_share_the_detector():
+    store, _ = make_store()
+    child = store.child()
+
+    @child.provider(scope="session")
+    async def cache():
+        yield
+
+    @child.consumer
+    async def use(db, cache):
+        pass
+
+    async with child.session():
+        await use()
+        assert store.leaks.live() == {"db": 1, "cache": 1}
+
+    await store.exit_session()
+    assert store.leaks.live() == {}
+
+
+@pytest.mark.asyncio
+async def test_parent_instances_are_forgotten_after_fork():
+    store, use = make_store()
+    await use()
+    store.after_fork_in_child()
+    assert store.leaks.live() == {}
+
+
+def test_leaks_are_not_tracked_by_default():
+    assert Store().leaks is None
+
+
+def test_sync_instances_outside_of_an_event_loop():
+    store = Store(track_leaks=True)
+
+    @store.provider(scope="session")
+    def config():
+        yield {}
+
+    @store.consumer
+    def use(config):
+        pass
+
+    use.call_sync()
+    assert store.leaks.live() == {"config": 1}
+    with recorded_warnings() as record:
+        store.leaks.check()
+    assert len(record) == 1
@@ -0,0 +1,133 @@
+from asyncio import Event, gather, sleep
+
+import pytest
+
+from aiodine import Store
+from aiodine.exceptions import ProviderDeclarationError, ProviderOverloaded
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_concurrent_evaluations_are_limited(store: Store):
+    active = 0
+    max_active = 0
+
+    @store.provider(max_concurrency=2)
+    async def db_conn():
+        nonlocal active, max_active
+        active += 1
+        max_active = max(max_active, active)
+        await sleep(0.01)
+        active -= 1
+        return "conn"
+
+    @store.consumer
+    async def handle(db_conn):
+        return db_conn
+
+    assert await gather(*(handle() for _ in range(5))) == ["conn"] * 5
+    assert max_active == 2
+
+
+async def test_slots_of_generators_are_held_until_cleanup():
+    store = Store()
+    events = []
+
+    @store.provider(max_concurrency=1)
+    def db_conn():
+        events.append("setup")
+        yield "conn"
+        events.append("teardown")
+
+    @store.consumer
+    async def handle(db_conn):
+        await sleep(0.01)
+        events.append("handle")
+
+    await gather(handle(), handle())
+    assert events == ["setup", "handle", "teardown"] * 2
+
+    stats = store.providers["db_conn"].limiter.stats()
+    assert stats.active == stats.waiting == stats.rejected == 0
+    assert stats.acquired == 2
+    assert 0 < stats.max_wait <= stats.total_wait
+
+
+async def test_queue_timeout():
+    store = Store()
+    release = Event()
+
+    @store.provider(max_concurrency=1, queue_timeout=0.01)
+    async def upstream_client():
+        yield "client"
+
+    @store.consumer
+    async def slow(upstream_client):
+        await release.wait()
+
+    @store.consumer
+    async def fast(upstream_client):
+        pass
+
+    task = gather(slow())
+    await sleep(0)
+    with pytest.raises(ProviderOverloaded) as ctx:
+        await fast()
+    assert ctx.value.name == "upstream_client"
+
+    stats = store.providers["upstream_client"].limiter.stats()
+    assert (stats.active, stats.rejected) == (1, 1)
+
+    release.set()
+    await task
+    await fast()
+
+
+async def test_sync_provider():
+    store = Store()
+
+    @store.provider(max_concurrency=1, queue_timeout=1)
+    def settings():
+        return {}
+
+    @store.consumer
+    def consume(settings):
+        return settings
+
+    assert not store.providers["settings"].sync
+    assert await consume() == {}
+
+
+async def test_frozen_provider():
+    store = Store()
+
+    with store.exit_freeze():
+
+        @store.provider
+        async def pool():
+            return "pool"
+
+        @store.provider(max_concurrency=1)
+        async def db_conn(pool):
+            return f"conn({pool})"
+
+    @store.consumer
+    async def handle(db_conn):
+        return db_conn
+
+    assert await handle() == "conn(pool)"
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"scope": "session", "max_concurrency": 1},
+        {"queue_timeout": 1},
+    ],
+)
+async def test_invalid_declarations(store: Store, kwargs: dict):
+    with pytest.raises(ProviderDeclarationError):
+
+        @store.provider(**kwargs)
+        async def resource():
+            pass
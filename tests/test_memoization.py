@@ -0,0 +1,287 @@
+from asyncio import gather, sleep
+
+import pytest
+
+from aiodine import Store, memoize
+from aiodine.exceptions import ProviderDeclarationError, UnknownScope
+from aiodine.memo import batch
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture(name="calls")
+def fixture_calls():
+    return []
+
+
+@pytest.fixture(name="get_note")
+def fixture_get_note(store: Store, calls: list):
+    def declare(**kwargs):
+        @store.provider
+        @memoize(**kwargs)
+        async def get_note():
+            async def _get_note(pk: int) -> dict:
+                calls.append(pk)
+                await sleep(0.01)
+                return {"id": pk}
+
+            return _get_note
+
+    return declare
+
+
+async def test_results_are_cached_by_arguments(store: Store, get_note, calls):
+    get_note()
+
+    @store.consumer
+    async def show(get_note):
+        return [await get_note(1), await get_note(2), await get_note(1)]
+
+    assert await show() == [{"id": 1}, {"id": 2}, {"id": 1}]
+    assert calls == [1, 2]
+
+    # Call-scoped: not shared across evaluations of the provider.
+    await show()
+    assert calls == [1, 2, 1, 2]
+
+
+async def test_concurrent_identical_calls_are_deduplicated(
+    store: Store, get_note, calls
+):
+    get_note()
+
+    @store.consumer
+    async def show(get_note):
+        return await gather(get_note(1), get_note(1), get_note(pk=1))
+
+    assert await show() == [{"id": 1}] * 3
+    assert calls == [1, 1]  # Keyword arguments use another key.
+
+
+async def test_session_scope(store: Store, get_note, calls):
+    get_note(scope="session")
+
+    @store.consumer
+    async def show(get_note):
+        return await get_note(1)
+
+    await show()
+    await show()
+    assert calls == [1]
+
+    await store.exit_session()
+    await show()
+    assert calls == [1, 1]
+
+
+async def test_batch_scope(store: Store, get_note, calls):
+    get_note(scope="batch")
+
+    @store.consumer
+    async def show(get_note):
+        return await get_note(1)
+
+    with batch():
+        await show()
+        await show()
+    assert calls == [1]
+
+    await show()
+    await show()
+    assert calls == [1, 1, 1]
+
+
+async def test_maxsize(store: Store, get_note, calls):
+    get_note(maxsize=1)
+
+    @store.consumer
+    async def show(get_note):
+        for pk in (1, 2, 1):
+            await get_note(pk)
+
+    await show()
+    assert calls == [1, 2, 1]
+
+
+async def test_ttl(store: Store, get_note, calls):
+    get_note(ttl=0.02)
+
+    @store.consumer
+    async def show(get_note):
+        await get_note(1)  # Takes 0.01s.
+        await get_note(1)
+        await sleep(0.02)
+        await get_note(1)
+
+    await show()
+    assert calls == [1, 1]
+
+
+async def test_invalidation(store: Store, get_note, calls):
+    get_note()
+
+    @store.consumer
+    async def show(get_note):
+        await get_note(1)
+        await get_note(2)
+        get_note.invalidate(1)
+        await get_note(1)
+        await get_note(2)
+        get_note.invalidate(3)
+        get_note.cache_clear()
+        await get_note(2)
+
+    await show()
+    assert calls == [1, 2, 1, 2]
+
+
+async def test_failures_are_not_cached(store: Store, calls):
+    @store.provider
+    @memoize
+    def get_note():
+        async def _get_note(pk: int):
+            calls.append(pk)
+            raise KeyError(pk)
+
+        return _get_note
+
+    @store.consumer
+    async def show(get_note):
+        for _ in range(2):
+            with pytest.raises(KeyError):
+                await get_note(1)
+
+    await show()
+    assert calls == [1, 1]
+
+
+async def test_sync_generator_provider(store: Store):
+    teardown = False
+
+    @store.provider
+    @memoize
+    def get_square():
+        nonlocal teardown
+        calls = []
+
+        def _get_square(x):
+            calls.append(x)
+            return x**2
+
+        yield _get_square
+        assert calls == [2]
+        teardown = True
+
+    @store.consumer
+    def compute(get_square):
+        return get_square(2) + get_square(2)
+
+    assert await compute() == 8
+    assert teardown
+
+
+async def test_async_generator_provider(store: Store, calls):
+    teardown = False
+
+    @store.provider(scope="session")
+    @memoize(scope="session")
+    async def get_note():
+        nonlocal teardown
+
+        async def _get_note(pk):
+            calls.append(pk)
+            return pk
+
+        yield _get_note
+        teardown = True
+
+    @store.consumer
+    async def show(get_note):
+        return await get_note(1)
+
+    async with store.session():
+        assert await show() == 1
+        assert await show() == 1
+    assert calls == [1]
+    assert teardown
+
+
+async def test_provided_value_must_be_callable(store: Store):
+    @store.provider
+    @memoize
+    def value():
+        return 42
+
+    @store.consumer
+    def consume(value):
+        pass
+
+    with pytest.raises(ProviderDeclarationError):
+        await consume()
+
+
+async def test_unknown_scope():
+    with pytest.raises(UnknownScope):
+        memoize(scope="foo")(lambda: None)
+
+
+async def test_frozen_provider_with_dependencies(store: Store, calls):
+    with store.exit_freeze():
+
+        @store.provider(scope="session")
+        async def notes():
+            return {1: "Groceries"}
+
+        @store.provider
+        @memoize(scope="session")
+        async def get_note(notes):
+            async def _get_note(pk: int):
+                calls.append(pk)
+                return notes[pk]
+
+            return _get_note
+
+    @store.consumer
+    async def show(pk, get_note):
+        return await get_note(pk)
+
+    assert await show(1) == "Groceries"
+    assert await show(1) == "Groceries"
+    assert calls == [1]
+
+
+async def test_session_caches_are_separate_for_each_key(calls):
+    store = Store()
+
+    @store.provider
+    @memoize(scope="session")
+    async def get_note():
+        async def _get_note(pk: int) -> dict:
+            calls.append(pk)
+            return {"id": pk}
+
+        return _get_note
+
+    @store.consumer
+    async def show(get_note):
+        return await get_note(1)
+
+    async with store.session(key="a"):
+        await show()
+    async with store.session(key="b"):
+        await show()
+    assert calls == [1, 1]
+
+    # Exiting the default session doesn't clear keyed caches.
+    await store.exit_session()
+    async with store.session(key="a"):
+        await show()
+    assert calls == [1, 1]
+
+    await store.sessions.close("a")
+    async with store.session(key="a"):
+        await show()
+    async with store.session(key="b"):
+        await show()
+    assert calls == [1, 1, 1]
+    await store.sessions.close_all()
@@ -0,0 +1,146 @@
+import sys
+import tracemalloc
+
+import pytest
+
+from aiodine import Store
+from aiodine.memory import MemoryProfiler, deep_sizeof
+
+pytestmark = pytest.mark.asyncio
+
+
+def make_store() -> Store:
+    store = Store()
+
+    @store.provider(scope="session")
+    async def cache():
+        return {}
+
+    @store.provider
+    async def buffer():
+        return bytearray(100_000)
+
+    @store.provider
+    def small():
+        return 1
+
+    @store.consumer
+    async def handle(cache, buffer, small, n=0):
+        cache[n] = bytearray(1000)
+
+    return store, handle
+
+
+async def test_values_are_sized():
+    store, handle = make_store()
+
+    with store.memory_profile(sample_every=1) as profiler:
+        for n in range(3):
+            await handle(n=n)
+
+    stats = profiler.stats()
+    assert stats["buffer"].samples == 3
+    assert stats["buffer"].scope == "function"
+    assert stats["buffer"].mean >= 100_000
+    # Session instances are measured as they grow.
+    cache = stats["cache"]
+    assert cache.scope == "session"
+    assert cache.peak == cache.last > cache.mean
+
+    assert [name for name, _ in profiler.top(2)] == ["buffer", "cache"]
+    assert [name for name, _ in profiler.top(scope="session")] == ["cache"]
+    assert set(profiler.by_scope()) == {"function", "session"}
+    assert store.tracers == ()
+
+
+async def test_calls_are_sampled():
+    store, handle = make_store()
+
+    with store.memory_profile(sample_every=4) as profiler:
+        profiler.start()  # No-op: already started.
+        for _ in range(8):
+            await handle()
+
+    assert profiler.stats()["buffer"].samples == 2
+    profiler.clear()
+    assert profiler.stats() == {}
+
+
+async def test_tracemalloc_excludes_nested_providers():
+    store = Store()
+
+    @store.provider
+    async def big():
+        return bytearray(200_000)
+
+    @store.provider
+    async def wrapper(big):
+        return [big]
+
+    store.freeze()
+
+    @store.consumer
+    async def handle(wrapper):
+        pass
+
+    assert not tracemalloc.is_tracing()
+    profiler = store.memory_profile(sample_every=1, method="tracemalloc")
+    with profiler:
+        assert tracemalloc.is_tracing()
+        await handle()
+    assert not tracemalloc.is_tracing()
+
+    stats = profiler.stats()
+    assert stats["big"].mean >= 200_000
+    assert stats["wrapper"].mean < 200_000
+
+
+async def test_failing_providers_are_not_recorded(store: Store):
+    @store.provider
+    async def broken():
+        raise ValueError
+
+    @store.provider
+    def broken_sync():
+        raise ValueError
+
+    @store.consumer
+    async def handle(broken):
+        pass
+
+    @store.consumer
+    def handle_sync(broken_sync):
+        pass
+
+    for method in ("sizeof", "tracemalloc"):
+        with store.memory_profile(sample_every=1, method=method) as profiler:
+            with pytest.raises(ValueError):
+                await handle()
+            with pytest.raises(ValueError):
+                handle_sync.call_sync()
+        assert profiler.stats() == {}
+
+
+async def test_unknown_method(store: Store):
+    with pytest.raises(ValueError):
+        store.memory_profile(method="unknown")
+
+
+async def test_deep_sizeof():
+    class Slotted:
+        __slots__ = ("data", "empty")
+
+        def __init__(self):
+            self.data = bytearray(1000)
+
+    class Plain:
+        def __init__(self):
+            self.data = [bytearray(1000), Slotted()]
+
+    assert deep_sizeof(Plain()) > 2000
+    assert deep_sizeof(MemoryProfiler) == 0  # Classes are shared.
+    shared = bytearray(1000)
+    assert deep_sizeof([shared, shared]) < 2000
+    assert deep_sizeof([bytearray(1000)] * 2, max_objects=1) == (
+        sys.getsizeof([None] * 2)
+    )
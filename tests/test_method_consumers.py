@@ -0,0 +1,114 @@
+import inspect
+
+import pytest
+
+from aiodine import Store
+from aiodine.consumers import BoundConsumer
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_consumer_binds_to_instances(store: Store):
+    @store.provider
+    async def message():
+        return "hello"
+
+    class View:
+        def __init__(self, name):
+            self.name = name
+
+        @store.consumer
+        async def get(self, message, suffix="!"):
+            return f"{message}, {self.name}{suffix}"
+
+    alice, bob = View("alice"), View("bob")
+    assert await alice.get() == "hello, alice!"
+    assert await bob.get(suffix="?") == "hello, bob?"
+    assert await View.get(alice) == "hello, alice!"
+
+    # The plan is shared by all instances.
+    assert isinstance(alice.get, BoundConsumer)
+    assert alice.get.__func__ is bob.get.__func__ is View.__dict__["get"]
+    assert alice.get.__self__ is alice
+    assert alice.get == alice.get and alice.get != bob.get
+    assert hash(alice.get) == hash(alice.get)
+    assert alice.get.__name__ == "get"
+    assert repr(alice.get).startswith("<bound consumer ")
+    # As seen by frameworks inspecting handlers.
+    assert list(inspect.signature(alice.get).parameters) == [
+        "message",
+        "suffix",
+    ]
+
+
+async def test_self_is_not_looked_up_as_a_provider(store: Store):
+    @store.provider
+    def self():
+        return "provided"
+
+    class View:
+        @store.consumer
+        def get(self):
+            return self
+
+    view = View()
+    assert view.get.sync
+    assert view.get.call_sync() is view
+
+
+async def test_consumer_assigned_after_class_creation(store: Store):
+    @store.provider
+    def this():
+        return "provided"
+
+    async def get(this):
+        return this
+
+    class View:
+        pass
+
+    View.get = store.consumer(get)
+    view = View()
+    assert await view.get() is view
+
+
+async def test_methods_without_positional_parameters(store: Store):
+    @store.provider
+    def message():
+        return "hello"
+
+    class View:
+        @store.consumer
+        def ping():
+            return "pong"
+
+        @store.consumer
+        def get(*, message):
+            return message
+
+    view = View()
+    assert view.ping.call_sync() == "pong"
+    assert view.get.call_sync() == "hello"
+    assert list(inspect.signature(view.get).parameters) == ["message"]
+
+    # Not inspected again on every access.
+    View.__dict__["ping"].func = None
+    assert isinstance(view.ping, BoundConsumer)
+
+
+async def test_analysis_of_methods(store: Store):
+    @store.provider
+    def self():
+        pass
+
+    @store.provider
+    def message():
+        pass
+
+    class View:
+        @store.consumer
+        def get(self, message):
+            pass
+
+    analysis = store.analyze(View.get)
+    assert analysis.critical_path == ["get", "message"]
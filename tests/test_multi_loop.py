@@ -0,0 +1,156 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+
+from aiodine import Store, memoize
+from aiodine.sessions import running_loop
+
+
+def run_in_threads(count: int, coro_func):
+    # Run a coroutine function in its own event loop on each thread.
+    with ThreadPoolExecutor(count) as executor:
+        futures = [
+            executor.submit(asyncio.run, coro_func()) for _ in range(count)
+        ]
+        return [future.result() for future in futures]
+
+
+def test_session_instances_are_isolated_by_event_loop():
+    store = Store(session_key=running_loop)
+    events = []
+
+    @store.provider(scope="session")
+    async def client():
+        loop = asyncio.get_event_loop()
+        events.append("setup")
+        yield loop
+        events.append("teardown")
+
+    @store.consumer
+    async def get_client_loop(client):
+        return client
+
+    async def main():
+        async with store.session():
+            first = await get_client_loop()
+            second = await get_client_loop()
+        assert first is second is asyncio.get_event_loop()
+        return first
+
+    loops = run_in_threads(3, main)
+    assert len(set(map(id, loops))) == 3
+    assert events.count("setup") == events.count("teardown") == 3
+    assert store.providers["client"]._keyed == {}
+
+
+def test_warmup_enters_the_session_of_the_event_loop():
+    store = Store(session_key=running_loop)
+    events = []
+
+    @store.provider(scope="session")
+    async def client():
+        events.append("setup")
+        yield "client"
+        events.append("teardown")
+
+    @store.consumer
+    async def use(client):
+        pass
+
+    async def main():
+        await store.warmup()
+        await use()
+        await store.exit_session()
+
+    asyncio.run(main())
+    assert events == ["setup", "teardown"]
+
+
+def test_sync_consumers_outside_event_loops_use_the_default_session():
+    store = Store(session_key=running_loop)
+
+    @store.provider(scope="session")
+    def config():
+        return {}
+
+    @store.consumer
+    def get_config(config):
+        return config
+
+    assert get_config.call_sync() is get_config.call_sync()
+
+    async def main():
+        return get_config.call_sync()
+
+    assert asyncio.run(main()) is not get_config.call_sync()
+
+
+def test_session_memoization_caches_are_isolated_by_event_loop():
+    store = Store(session_key=running_loop)
+    barrier = Barrier(2)
+
+    @store.provider
+    @memoize(scope="session")
+    async def get_loop():
+        async def _get_loop(pk: int):
+            await asyncio.sleep(0.01)
+            return asyncio.get_event_loop()
+
+        return _get_loop
+
+    @store.consumer
+    async def use(get_loop):
+        return await get_loop(1)
+
+    async def main():
+        # Calls are in progress on both event loops at the same time.
+        barrier.wait()
+        async with store.session():
+            return await use() is asyncio.get_event_loop()
+
+    assert run_in_threads(2, main) == [True, True]
+
+
+def test_child_stores_inherit_the_session_key():
+    store = Store(session_key=running_loop)
+    assert store.child().session_key is running_loop
+
+
+def test_concurrent_registration():
+    store = Store()
+    barrier = Barrier(8)
+
+    def register(index: int):
+        barrier.wait()
+        for i in range(50):
+            store.provider(lambda: None, name=f"p{index}-{i}")
+
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(register, range(8)))
+
+    assert len(store.providers) == 8 * 50
+    assert store.version == 8 * 50
+
+
+def test_deferred_cleanup_and_limits_on_several_loops():
+    store = Store()
+    teardowns = 0
+
+    @store.provider(max_concurrency=1)
+    async def resource():
+        nonlocal teardowns
+        yield
+        await asyncio.sleep(0.01)
+        teardowns += 1
+
+    @store.consumer(deferred_cleanup=True)
+    async def consume(resource):
+        pass
+
+    async def main():
+        await asyncio.gather(consume(), consume())
+        await store.exit_session()
+
+    run_in_threads(2, main)
+    assert teardowns == 4
+    assert len(store.cleanup_queue) == 0
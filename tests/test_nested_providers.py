@@ -1,3 +1,5 @@
+from threading import Thread
+
 import pytest
 
 from aiodine import Store
@@ -47,3 +49,113 @@ async def test_detect_recursive_provider(store: Store):
         @store.provider
         def a(b):
             return a * 2
+
+
+async def test_bulk_registration_is_deferred(store: Store):
+    with store.bulk_register():
+
+        @store.provider
+        def b(a):
+            return a * 2
+
+        with store.bulk_register():  # Nested blocks are merged.
+
+            @store.provider
+            def a():
+                return "a"
+
+        assert not store.has_provider("a")
+
+    assert store.has_provider("a") and store.has_provider("b")
+    store.freeze()
+    func = store.consumer(lambda b: 2 * b)
+    assert await func() == "aaaa"
+
+
+async def test_register_many(store: Store):
+    def a():
+        return "a"
+
+    def b(not_a_provider=None):
+        return "b"
+
+    providers = store.register_many([a, b], scope="session")
+    assert [prov.name for prov in providers] == ["a", "b"]
+    assert all(prov.scope == "session" for prov in providers)
+
+
+async def test_bulk_registration_detects_recursive_providers(store: Store):
+    @store.provider
+    def c(a):
+        return a
+
+    def a(b):
+        pass
+
+    def b(a, c):
+        pass
+
+    def d(d):
+        pass
+
+    def uses_c(c):
+        pass
+
+    # Same errors as when registering providers one by one.
+    with pytest.raises(RecursiveProviderError) as ctx:
+        store.register_many([a, b])
+    assert str(ctx.value) == str(RecursiveProviderError("b", "a"))
+    assert not store.has_provider("a")
+
+    with pytest.raises(RecursiveProviderError) as ctx:
+        store.register_many([b, a])
+    assert str(ctx.value) == str(RecursiveProviderError("a", "b"))
+
+    with pytest.raises(RecursiveProviderError) as ctx:
+        store.register_many([uses_c], name="a")
+    assert str(ctx.value) == str(RecursiveProviderError("a", "c"))
+
+    with pytest.raises(RecursiveProviderError) as ctx:
+        store.register_many([d])
+    assert str(ctx.value) == str(RecursiveProviderError("d", "d"))
+
+    # Only the last provider registered under a name is checked.
+    store.register_many([a, lambda: None], name="a")
+    assert store.has_provider("a")
+
+
+async def test_failed_bulk_registration(store: Store):
+    with pytest.raises(ValueError):
+        with store.bulk_register():
+
+            @store.provider
+            def a():
+                pass
+
+            raise ValueError
+
+    assert not store.has_provider("a")
+
+
+async def test_bulk_registration_is_per_thread(store: Store):
+    def register():
+        @store.provider
+        def other():
+            pass
+
+    with pytest.raises(ValueError):
+        with store.bulk_register():
+
+            @store.provider
+            def a():
+                pass
+
+            # Registered right away, and not discarded with the batch.
+            thread = Thread(target=register)
+            thread.start()
+            thread.join()
+            assert store.has_provider("other")
+            raise ValueError
+
+    assert store.has_provider("other")
+    assert not store.has_provider("a")
@@ -35,3 +35,28 @@ async def test_override_provider_after_usage(store: Store):
         return "HELLO"
 
     assert await say() == "HELLO"
+
+
+async def test_overlay_restores_overridden_providers(store: Store):
+    @store.provider
+    async def hello():
+        return "hello"
+
+    @store.consumer
+    async def say(hello):
+        return hello
+
+    with store.overlay():
+
+        @store.provider
+        async def hello():
+            return "HELLO"
+
+        @store.provider
+        async def world():
+            return "world"
+
+        assert await say() == "HELLO"
+
+    assert await say() == "hello"
+    assert not store.has_provider("world")
@@ -0,0 +1,232 @@
+import os
+import pickle
+from threading import current_thread, main_thread
+
+import pytest
+
+from aiodine import Store
+from aiodine.exceptions import ForkedSessionError, ProviderDeclarationError
+from aiodine.persistent import DiskCache
+
+pytestmark = pytest.mark.asyncio
+
+
+class Array:
+    """Pickled out-of-band, like NumPy arrays."""
+
+    def __init__(self, data):
+        self.data = data
+
+    def __reduce_ex__(self, protocol):
+        return Array, (pickle.PickleBuffer(self.data),)
+
+
+def make_store(tmp_path, builds, version=True, **kwargs) -> Store:
+    # A new store with the same providers, as after a restart.
+    store = Store(cache_dir=str(tmp_path), **kwargs)
+
+    @store.provider(scope="session", persistent=version)
+    async def table():
+        builds.append("table")
+        return {"pattern": "a+b"}
+
+    @store.provider(scope="session", persistent="1")
+    async def index(table):
+        builds.append("index")
+        return bytearray(table["pattern"].encode() * 1000)
+
+    store.freeze()
+    return store
+
+
+async def build(store: Store):
+    @store.consumer
+    async def use(table, index):
+        return table, index
+
+    async with store.session():
+        return await use()
+
+
+async def test_value_is_loaded_on_next_start(tmp_path):
+    builds = []
+    first = await build(make_store(tmp_path, builds))
+    assert builds == ["table", "index"]
+
+    assert await build(make_store(tmp_path, builds)) == first
+    assert builds == ["table", "index"]
+
+
+async def test_changing_the_version_rebuilds_dependants(tmp_path):
+    builds = []
+    await build(make_store(tmp_path, builds))
+    await build(make_store(tmp_path, builds, version="2"))
+    assert builds == ["table", "index"] * 2
+
+
+async def test_source_changes_rebuild_the_value(tmp_path):
+    def make(source: str) -> Store:
+        store = Store(cache_dir=str(tmp_path))
+        namespace = {}
+        exec(source, namespace)
+        store.provider(scope="session", persistent=True)(namespace["value"])
+        return store
+
+    async def value(store: Store):
+        @store.consumer
+        async def use(value):
+            return value
+
+        async with store.session():
+            return await use()
+
+    assert await value(make("def value(): return 1")) == 1
+    assert await value(make("def value(): return 2")) == 2
+
+
+async def test_sync_providers_are_loaded_off_the_event_loop(
+    tmp_path, monkeypatch
+):
+    threads = []
+    load = DiskCache.load
+
+    def record(cache: DiskCache, key: str):
+        threads.append(current_thread())
+        return load(cache, key)
+
+    monkeypatch.setattr(DiskCache, "load", record)
+    store = Store(cache_dir=str(tmp_path))
+    builds = []
+
+    @store.provider(scope="session", persistent=True)
+    def config():
+        builds.append("config")
+        return {"debug": False}
+
+    @store.consumer
+    def use(config):
+        return config
+
+    assert not store.providers["config"].sync
+    assert await use() == {"debug": False}
+    store.providers["config"]._instance = None
+    assert await use() == {"debug": False}
+    assert builds == ["config"]
+    assert len(threads) == 2
+    assert main_thread() not in threads
+
+
+async def test_corrupted_entries_are_rebuilt(tmp_path):
+    builds = []
+    await build(make_store(tmp_path, builds))
+    for name in os.listdir(tmp_path):
+        with open(tmp_path / name, "wb") as file:
+            file.write(b"garbage")
+    await build(make_store(tmp_path, builds))
+    assert builds == ["table", "index"] * 2
+
+
+async def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = DiskCache(str(tmp_path), max_size=3000)
+    cache.dump("a", bytearray(1000))
+    cache.dump("b", bytearray(1000))
+    os.utime(tmp_path / "a.pickle", (0, 0))
+    os.utime(tmp_path / "b.pickle", (1, 1))
+    assert cache.load("a") == bytearray(1000)  # Marked as recently used.
+    cache.dump("c", bytearray(1000))
+    assert sorted(os.listdir(tmp_path)) == ["a.pickle", "c.pickle"]
+
+    # Entries larger than the limit are not kept.
+    cache.dump("d", bytearray(4000))
+    assert os.listdir(tmp_path) == []
+
+    DiskCache(str(tmp_path / "missing")).clear()
+
+
+async def test_clear(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    cache.dump("a", 1)
+    cache.clear()
+    assert os.listdir(tmp_path) == []
+
+
+async def test_buffers_are_loaded_from_a_memory_map(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    cache.dump("data", [Array(b"x" * 100), Array(bytearray(b"y" * 10))])
+    first, second = cache.load("data")
+    # Zero-copy: views of the (read-only) memory map.
+    assert first.data.readonly and second.data.readonly
+    assert (bytes(first.data), bytes(second.data)) == (b"x" * 100, b"y" * 10)
+
+
+async def test_failed_writes_leave_no_temporary_file(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    os.mkdir(tmp_path / "bad.pickle")
+    with pytest.raises(OSError):
+        cache.dump("bad", 1)
+    assert os.listdir(tmp_path) == ["bad.pickle"]
+
+
+async def test_forbidden_after_fork(tmp_path):
+    store = Store(cache_dir=str(tmp_path))
+
+    @store.provider(scope="session", persistent=True, fork="forbid")
+    def table():
+        return {}
+
+    prov = store.providers["table"]
+    await prov._setup()
+    await prov._setup()  # Already set up.
+    prov._forked = True
+    with pytest.raises(ForkedSessionError):
+        await prov._setup()
+    with pytest.raises(ForkedSessionError):
+        prov._setup_sync()
+
+
+async def test_dependencies_must_be_persistent(tmp_path):
+    store = Store(cache_dir=str(tmp_path))
+
+    @store.provider(scope="session")
+    async def settings():
+        return {}
+
+    @store.provider(scope="session", persistent=True)
+    async def table(settings):
+        return settings
+
+    store.freeze()
+
+    with pytest.raises(ProviderDeclarationError):
+        async with store.session():
+            pass
+
+
+async def test_persistent_providers_must_be_session_scoped(store: Store):
+    with pytest.raises(ProviderDeclarationError):
+
+        @store.provider(persistent=True)
+        async def table():
+            pass
+
+
+async def test_persistent_providers_cannot_be_generators(store: Store):
+    with pytest.raises(ProviderDeclarationError):
+
+        @store.provider(scope="session", persistent=True)
+        async def table():
+            yield
+
+
+async def test_default_cache_directory_is_per_user(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    store = Store()
+    assert store.cache.directory == str(tmp_path / "aiodine")
+
+    @store.provider(scope="session", persistent=True)
+    async def table():
+        return "table"
+
+    await store.enter_session()
+    assert os.stat(store.cache.directory).st_mode & 0o777 == 0o700
+    await store.exit_session()
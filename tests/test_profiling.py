@@ -0,0 +1,152 @@
+import pytest
+
+from aiodine import Store
+from aiodine.profiling import OTHER
+from aiodine.tracing import Tracer
+
+pytestmark = pytest.mark.asyncio
+
+
+def declare(store: Store):
+    with store.exit_freeze():
+
+        @store.provider
+        def db_conn():
+            return "conn"
+
+        @store.provider
+        async def repo(db_conn):
+            return db_conn
+
+    @store.provider
+    def session_conf():
+        yield "conf"
+
+    @store.consumer
+    async def handler(repo, session_conf):
+        return repo, session_conf
+
+    return handler
+
+
+async def test_record_provider_stacks():
+    store = Store()
+    handler = declare(store)
+
+    with store.profile() as profiler:
+        await handler()
+        await handler()
+
+    stats = profiler.stats()
+    assert set(stats) == {
+        "handler",
+        "handler;repo",
+        "handler;repo;db_conn",
+        "handler;session_conf",
+    }
+    assert stats["handler;repo;db_conn"].count == 2
+    for stat in stats.values():
+        assert 0 <= stat.self_time <= stat.total
+
+    total = stats["handler"].total
+    assert total == pytest.approx(sum(s.self_time for s in stats.values()))
+
+
+async def test_collapsed_output():
+    store = Store()
+    handler = declare(store)
+
+    with store.profile() as profiler:
+        await handler()
+
+    lines = profiler.collapsed().splitlines()
+    assert [line.split()[0] for line in lines] == [
+        "handler",
+        "handler;repo",
+        "handler;repo;db_conn",
+        "handler;session_conf",
+    ]
+    assert all(int(line.split()[1]) >= 0 for line in lines)
+    assert "handler;repo 1" in profiler.collapsed(stat="count")
+
+
+async def test_profile_sync_consumer():
+    store = Store()
+
+    @store.provider
+    def pitch():
+        return "C#"
+
+    @store.consumer
+    def play(pitch):
+        return pitch
+
+    with store.profile() as profiler:
+        assert play.call_sync() == "C#"
+        assert await play() == "C#"
+
+    assert profiler.stats()["play;pitch"].count == 2
+
+
+async def test_sample_rate():
+    store = Store()
+    handler = declare(store)
+
+    with store.profile(sample_rate=0) as profiler:
+        await handler()
+
+    assert profiler.stats() == {}
+
+
+async def test_bounded_number_of_stacks():
+    store = Store()
+    handler = declare(store)
+
+    with store.profile(max_stacks=2) as profiler:
+        await handler()
+        await handler()
+
+    stats = profiler.stats()
+    assert len(stats) == 3
+    assert stats[OTHER].count == 4
+    assert set(profiler.timings()) == {"repo", "db_conn"}
+
+
+async def test_stop_profiling():
+    store = Store()
+    handler = declare(store)
+    profiler = store.profile()
+
+    profiler.start()
+    profiler.start()  # No-op.
+    await handler()
+    profiler.stop()
+    await handler()
+
+    assert profiler.stats()["handler"].count == 1
+    profiler.clear()
+    assert profiler.stats() == {}
+
+
+async def test_lazy_providers_are_not_traced():
+    store = Store()
+
+    @store.provider(lazy=True)
+    async def answer():
+        return 42
+
+    @store.consumer
+    async def consume(answer):
+        return await answer
+
+    with store.profile() as profiler:
+        assert await consume() == 42
+
+    assert set(profiler.stats()) == {"consume"}
+
+
+async def test_base_tracer_is_noop():
+    store = Store()
+    handler = declare(store)
+    store.tracers = (Tracer(),)
+    assert await handler() == ("conn", "conf")
@@ -0,0 +1,185 @@
+import pytest
+
+pytest_plugins = ["pytester"]
+
+PROVIDERS = """
+import aiodine
+
+store = aiodine.Store()
+setups = []
+
+@store.provider(scope="session")
+async def schema():
+    setups.append("schema")
+    yield "schema"
+    setups.append("teardown")
+
+@store.provider
+async def db(schema):
+    return "db"
+
+store.freeze()
+"""
+
+
+@pytest.fixture
+def run(pytester):
+    pytester.makepyfile(providers=PROVIDERS)
+    pytester.makeini("""
+        [pytest]
+        aiodine_store = providers:store
+        """)
+
+    def run(*args, **files):
+        pytester.makepyfile(**files)
+        return pytester.runpytest_inprocess(
+            "-p",
+            "aiodine.pytest_plugin",
+            "-p",
+            "no:cacheprovider",
+            "-p",
+            "no:asyncio",
+            *args
+        )
+
+    return run
+
+
+def test_consumers_are_tests(run):
+    result = run(test_one="""
+        from providers import store, setups
+
+        @store.consumer
+        async def test_db(db, schema):
+            assert (db, schema) == ("db", "schema")
+
+        @store.consumer
+        async def test_fails(db):
+            assert db == "other"
+
+        @store.consumer
+        async def helper(db):
+            raise AssertionError("not a test")
+        """)
+    result.assert_outcomes(passed=1, failed=1)
+
+
+def test_session_is_entered_once_across_modules(run):
+    module = """
+    from providers import store, setups
+
+    @store.consumer
+    async def test_session(schema):
+        assert setups == ["schema"]
+    """
+    result = run(
+        test_one=module,
+        test_two=module,
+        test_three="""
+        from providers import setups
+
+        def test_session_fixture(aiodine_session):
+            assert setups == ["schema"]
+        """,
+    )
+    result.assert_outcomes(passed=3)
+
+
+def test_session_setup_is_reported_in_durations(run):
+    result = run(
+        "--durations=0",
+        "-vv",
+        test_one="""
+        import time
+        from providers import store
+
+        @store.provider(scope="session")
+        async def slow():
+            time.sleep(0.01)
+
+        @store.consumer
+        async def test_slow(slow):
+            pass
+        """,
+    )
+    result.assert_outcomes(passed=1)
+    result.stdout.re_match_lines([r".*s setup\s+test_one.py::test_slow"])
+
+
+def test_consumers_can_use_pytest_fixtures(run):
+    result = run(test_one="""
+        import pytest
+        from providers import store
+
+        @pytest.fixture
+        def number():
+            return 42
+
+        @store.consumer
+        async def test_fixtures(db, number, tmp_path):
+            assert db == "db"
+            assert number == 42
+            assert tmp_path.exists()
+        """)
+    result.assert_outcomes(passed=1)
+
+
+def test_marks_below_consumer_are_kept(run):
+    result = run(test_one="""
+        import pytest
+        from providers import store
+
+        @store.consumer
+        @pytest.mark.skip
+        async def test_skipped(db):
+            pass
+        """)
+    result.assert_outcomes(skipped=1)
+
+
+def test_overlay_overrides_providers_for_one_test(run):
+    result = run(test_one="""
+        import pytest
+        from providers import store
+
+        teardowns = []
+
+        @pytest.fixture
+        def fake_db(aiodine_overlay):
+            @aiodine_overlay.provider(name="db")
+            async def fake():
+                return "fake"
+
+            @aiodine_overlay.provider(name="schema", scope="session")
+            async def fake_schema():
+                yield "fake"
+                teardowns.append("fake")
+
+        @store.consumer
+        async def test_overridden(fake_db, db, schema):
+            assert (db, schema) == ("fake", "fake")
+
+        @store.consumer
+        async def test_restored(db, schema):
+            assert (db, schema) == ("db", "schema")
+            assert teardowns == ["fake"]
+        """)
+    result.assert_outcomes(passed=2)
+
+
+def test_default_store_is_used_without_configuration(pytester):
+    pytester.makepyfile(test_one="""
+        import aiodine
+
+        def test_store(aiodine_store):
+            assert aiodine_store is aiodine._STORE
+        """)
+    result = pytester.runpytest_inprocess(
+        "-p",
+        "aiodine.pytest_plugin",
+        "-p",
+        "no:cacheprovider",
+        "-p",
+        "no:asyncio",
+    )
+    result.assert_outcomes(passed=1)
@@ -0,0 +1,220 @@
+from asyncio import CancelledError, ensure_future, sleep, wait_for
+from uuid import uuid4
+
+import pytest
+
+from aiodine import Store
+from aiodine.exceptions import ProviderDeclarationError
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def segment_name() -> str:
+    return f"aiodine-test-{uuid4().hex[:8]}"
+
+
+def declare(store: Store, segment_name: str) -> list:
+    calls = []
+
+    @store.provider(scope="session", shared=segment_name)
+    def table():
+        calls.append(1)
+        return b"lookup table"
+
+    return calls
+
+
+async def test_value_is_built_once_and_shared(segment_name: str):
+    first, second = Store(), Store()
+    first_calls = declare(first, segment_name)
+    second_calls = declare(second, segment_name)
+
+    @first.consumer
+    def read_first(table):
+        return table
+
+    @second.consumer
+    def read_second(table):
+        return table
+
+    async with first.session(), second.session():
+        value = await read_first()
+        assert isinstance(value, memoryview)
+        assert bytes(value) == b"lookup table"
+        assert bytes(await read_second()) == b"lookup table"
+        del value
+
+    assert first_calls == [1]
+    assert second_calls == []
+
+
+async def test_segment_is_destroyed_when_last_session_exits(
+    segment_name: str
+):
+    first, second = Store(), Store()
+    first_calls = declare(first, segment_name)
+    declare(second, segment_name)
+
+    await first.enter_session()
+    await first.enter_session()  # No-op.
+    await second.enter_session()
+    await first.exit_session()
+    await first.exit_session()  # No-op.
+
+    # Still attached by the second store.
+    await first.enter_session()
+    assert first_calls == [1]
+
+    await first.exit_session()
+    await second.exit_session()
+
+    # Destroyed: the value is built again.
+    await first.enter_session()
+    assert first_calls == [1, 1]
+    await first.exit_session()
+
+
+async def test_generator_provider_is_finalized_after_copy(
+    store: Store, segment_name: str
+):
+    teardown = False
+
+    @store.provider(scope="session", shared=segment_name)
+    async def table():
+        nonlocal teardown
+        yield bytearray(b"data")
+        teardown = True
+
+    async with store.session():
+        assert teardown
+
+
+async def test_value_must_be_bytes_like(store: Store, segment_name: str):
+    @store.provider(scope="session", shared=segment_name)
+    def table():
+        return {"not": "bytes"}
+
+    with pytest.raises(TypeError):
+        await store.enter_session()
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{"scope": "function"}, {"scope": "session", "fork": "reinit"}],
+)
+async def test_invalid_declaration(store: Store, kwargs: dict):
+    with pytest.raises(ProviderDeclarationError):
+
+        @store.provider(shared=True, **kwargs)
+        def table():
+            pass
+
+
+async def test_keyed_sessions_share_the_segment(segment_name: str):
+    store = Store()
+    calls = declare(store, segment_name)
+
+    @store.consumer
+    def read(table):
+        return bytes(table)
+
+    async with store.session(key="a"):
+        assert await read() == b"lookup table"
+    async with store.session(key="b"):
+        assert await read() == b"lookup table"
+
+    keyed = store.providers["table"]._keyed
+    assert keyed["a"].segment_name == keyed["b"].segment_name == segment_name
+    assert calls == [1]
+
+    await store.sessions.close_all()
+
+
+async def test_refcount_never_goes_below_zero(segment_name: str):
+    from aiodine.shared import _HEADER, _open
+
+    store = Store()
+    declare(store, segment_name)
+    await store.enter_session()
+    segment = store.providers["table"]._segment
+    # E.g. released by a process which did not hold a reference.
+    _HEADER.pack_into(segment.buf, 0, len(b"lookup table"), 0)
+
+    await store.exit_session()
+    segment = _open(segment_name)
+    assert _HEADER.unpack_from(segment.buf, 0)[1] == 0
+    segment.unlink()
+    segment.close()
+
+
+async def test_reference_is_taken_again_after_fork(segment_name: str):
+    store = Store()
+    calls = declare(store, segment_name)
+
+    @store.consumer
+    def read(table):
+        return bytes(table)
+
+    store.after_fork_in_child()  # Not attached yet: no-op.
+    await store.enter_session()
+    inherited = store.providers["table"]._segment
+    store.after_fork_in_child()
+    assert store.providers["table"]._segment is None
+
+    assert await read() == b"lookup table"
+    assert store.providers["table"]._segment is not inherited
+    assert calls == [1]
+    await store.exit_session()
+
+
+
+async def test_value_is_read_only(store: Store, segment_name: str):
+    declare(store, segment_name)
+
+    @store.consumer
+    def write(table):
+        table[0] = 0
+
+    async with store.session():
+        with pytest.raises(TypeError):
+            await write()
+
+
+async def test_default_segment_name_depends_on_the_source():
+    first, second = Store(), Store()
+
+    @first.provider(scope="session", shared=True)
+    def table():
+        return b"lookup table"
+
+    @second.provider(scope="session", shared=True)
+    def table():  # pylint: disable=function-redefined
+        return b"another lookup table"
+
+    name = first.providers["table"].segment_name
+    assert name.startswith("aiodine-table-")
+    assert name != second.providers["table"].segment_name
+
+
+async def test_lock_is_released_when_cancelled(
+    segment_name: str, tmp_path, monkeypatch
+):
+    from aiodine.shared import _SegmentLock
+
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    holder = _SegmentLock(segment_name)
+    await holder.__aenter__()
+    assert (tmp_path / "aiodine" / "locks" / f"{segment_name}.lock").exists()
+
+    waiter = ensure_future(_SegmentLock(segment_name).__aenter__())
+    await sleep(0.01)
+    waiter.cancel()
+    with pytest.raises(CancelledError):
+        await waiter
+    await holder.__aexit__()
+
+    # Not held by the cancelled waiter.
+    lock = _SegmentLock(segment_name)
+    await wait_for(lock.__aenter__(), timeout=1)
+    await lock.__aexit__()
@@ -0,0 +1,199 @@
+from asyncio import ensure_future, sleep
+
+import pytest
+
+from aiodine import Store
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_sync_providers_are_sync(store: Store):
+    @store.provider
+    def sync_func():
+        pass
+
+    @store.provider
+    def sync_gen():
+        yield
+
+    @store.provider
+    async def async_func():
+        pass
+
+    @store.provider(lazy=True)
+    def lazy_func():
+        pass
+
+    assert sync_func.sync
+    assert sync_gen.sync
+    assert not async_func.sync
+    assert not lazy_func.sync
+
+
+async def test_consumer_is_sync_if_all_providers_are_sync(store: Store):
+    @store.provider
+    def pitch():
+        return "C#"
+
+    @store.provider
+    async def octave():
+        return 4
+
+    @store.consumer
+    def play(pitch):
+        return pitch
+
+    @store.consumer
+    def play_octave(pitch, octave):
+        return pitch, octave
+
+    @store.consumer
+    async def play_async(pitch):
+        return pitch
+
+    assert play.sync
+    assert play.call_sync() == "C#"
+    assert not play_octave.sync
+    assert not play_async.sync
+
+
+async def test_frozen_sync_providers_are_sync(store: Store):
+    with store.exit_freeze():
+
+        @store.provider
+        def a():
+            return "a"
+
+        @store.provider
+        def b(a):
+            return a * 2
+
+    assert b.sync
+    frozen = b.func
+    store.freeze()
+    assert b.func is frozen
+
+    @store.consumer
+    def consume(b):
+        return b
+
+    assert consume.sync
+    assert await consume() == "aa"
+
+
+async def test_sync_generator_cleanup_is_registered_as_sync_callback(
+    store: Store
+):
+    events = []
+
+    @store.provider
+    def resource():
+        events.append("setup")
+        yield "resource"
+        events.append("teardown")
+
+    @store.consumer
+    def consume(resource):
+        events.append(resource)
+
+    consume.call_sync()
+    assert events == ["setup", "resource", "teardown"]
+
+
+async def test_sync_session_generator_provider(store: Store):
+    events = []
+
+    @store.provider(scope="session")
+    def resource():
+        events.append("setup")
+        yield "resource"
+        events.append("teardown")
+
+    @store.consumer
+    def consume(resource):
+        return resource
+
+    assert consume.call_sync() == "resource"
+    assert consume.call_sync() == "resource"
+    assert events == ["setup"]
+    await store.exit_session()
+    assert events == ["setup", "teardown"]
+
+
+async def test_sync_session_provider_built_while_entering_session(
+    store: Store
+):
+    built = []
+    closed = []
+
+    @store.provider(scope="session")
+    def conn():
+        index = len(built)
+        built.append(index)
+        yield f"conn{index}"
+        closed.append(index)
+
+    @store.consumer
+    def consume(conn):
+        return conn
+
+    entering = ensure_future(store.enter_session())
+    await sleep(0)
+    # The setup is pending, but hasn't run yet.
+    assert consume.call_sync() == "conn0"
+    await entering
+    assert consume.call_sync() == "conn0"
+    await store.exit_session()
+    assert built == [0]
+    assert closed == [0]
+
+
+async def test_sync_used_providers(store: Store):
+    used = []
+
+    @store.provider(autouse=True)
+    def setup_stuff():
+        used.append("autouse")
+
+    @store.provider
+    def other_stuff():
+        used.append("used")
+
+    @store.consumer
+    @store.useprovider("other_stuff")
+    def consume():
+        pass
+
+    consume.call_sync()
+    assert used == ["autouse", "used"]
+    await consume()
+    assert used == ["autouse", "used"] * 2
+
+
+async def test_keyword_arguments_take_precedence(store: Store):
+    @store.provider
+    def pitch():
+        raise AssertionError("should not be called")
+
+    @store.consumer
+    def play(pitch):
+        return pitch
+
+    assert play.call_sync(pitch="D") == "D"
+    assert await play(pitch="D") == "D"
+
+
+async def test_plan_is_invalidated_when_providers_change(store: Store):
+    @store.consumer
+    def play(pitch):
+        return pitch
+
+    assert play.sync
+    assert await play("D") == "D"
+
+    @store.provider
+    async def pitch():
+        return "C#"
+
+    assert not play.sync
+    assert await play() == "C#"
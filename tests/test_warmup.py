@@ -0,0 +1,84 @@
+import gc
+
+import pytest
+
+from aiodine import Store
+from aiodine.exceptions import ProviderDoesNotExist
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_plans_are_resolved_and_sessions_entered(store: Store):
+    setups = 0
+
+    @store.provider(scope="session")
+    async def pool():
+        nonlocal setups
+        setups += 1
+        return "pool"
+
+    @store.consumer
+    async def consume(pool):
+        return pool
+
+    report = await store.warmup()
+
+    assert setups == 1
+    assert consume._plan is not None
+    assert report.consumers >= 1
+    assert set(report.session_providers) == {"pool"}
+    assert report.total == report.discover + report.plans + report.sessions
+    assert await consume() == "pool"
+    assert setups == 1
+    await store.exit_session()
+
+
+async def test_missing_providers_are_detected():
+    store = Store()
+
+    @store.consumer
+    @store.useprovider("missing")
+    async def consume():
+        pass
+
+    with pytest.raises(ProviderDoesNotExist):
+        await store.warmup()
+
+
+async def test_given_consumers_without_sessions():
+    store = Store()
+    setups = 0
+
+    @store.provider(scope="session")
+    async def pool():
+        nonlocal setups
+        setups += 1
+
+    @store.consumer
+    async def consume(pool):
+        pass
+
+    @store.consumer
+    async def other(pool):
+        pass
+
+    report = await store.warmup(consumers=[consume], sessions=False)
+
+    assert report.consumers == 1
+    assert report.session_providers == {}
+    assert setups == 0
+    assert consume._plan is not None
+    assert other._plan is None
+
+
+async def test_consumers_are_registered_weakly():
+    store = Store()
+
+    @store.consumer
+    async def consume():
+        pass
+
+    assert list(store.consumers) == [consume]
+    del consume
+    gc.collect()
+    assert list(store.consumers) == []